@@ -1,7 +1,9 @@
 from flask import Flask
 from flask_cors import CORS
 from .models import db
+from .database import init_db
 from .routes import api
+from .media_routes import media
 import os
 
 
@@ -14,6 +16,10 @@ def create_app():
         'DATABASE_URL', 'sqlite:///anki_langchain.db'
     )
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # 由前端代理（nginx X-Accel / Apache X-Sendfile）直接发送媒体文件
+    app.config['USE_X_SENDFILE'] = (
+        os.getenv('MEDIA_X_SENDFILE', 'false').lower() == 'true'
+    )
     
     # 初始化扩展
     db.init_app(app)
@@ -21,16 +27,18 @@ def create_app():
     
     # 注册蓝图
     app.register_blueprint(api)
+    app.register_blueprint(media)
     
-    # 创建数据库表
-    with app.app_context():
-        db.create_all()
+    # 建表是独立的初始化步骤（flask init-db或migrations/init_schema.py），
+    # 创建应用时不执行DDL
+    @app.cli.command('init-db')
+    def init_db_command():
+        """创建缺失的数据库表"""
+        init_db(app)
+        print('✓ 数据库表已创建')
     
     @app.route('/')
     def index():
         return {'message': 'Anki LangChain API 服务器运行中'}
     
     return app
-
-
-app = create_app()
\ No newline at end of file
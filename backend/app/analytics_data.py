@@ -0,0 +1,175 @@
+"""学习分析数据层
+
+LearningAnalytics需要的小时分布、会话间隔和错误统计都下推为
+SQL的GROUP BY和窗口查询，只把几十行的聚合结果读入Python，
+学习历史再长也不需要逐条加载会话。
+
+数据来源：
+    learning_session：按用户的学习时间、间隔、强度和错误统计
+    practice_session：整体每日正确率（练习记录不含user_id）
+"""
+
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from sqlalchemy import case, extract, func
+
+from .models import LearningSession, PracticeSession, db
+from .practice_counters import get_counters
+
+# 会话的主观难度（1-5）划分为错误统计使用的难度档
+EASY_DIFFICULTY = 2
+HARD_DIFFICULTY = 4
+
+# 会话只记录答错的单词数，没有错误类型，统一归为该类别
+UNTYPED_ERROR = 'unknown'
+
+
+def _epoch_seconds(column):
+    """时间列转换为秒数的SQL表达式"""
+    if db.engine.dialect.name == 'sqlite':
+        return (func.julianday(column) - 2440587.5) * 86400
+    return extract('epoch', column)
+
+
+def load_pattern_aggregates(user_id: str) -> Dict[str, Any]:
+    """读取用户学习模式的聚合统计，供LearningAnalytics.analyze_aggregates使用"""
+    aggregates = {}
+    aggregates.update(_session_aggregates(user_id))
+    aggregates.update(_interval_aggregates(user_id))
+    aggregates.update(_error_aggregates(user_id))
+    return aggregates
+
+
+def _session_aggregates(user_id: str) -> Dict[str, Any]:
+    """会话数、平均时长/单词数和开始时间的小时分布"""
+    session_count, avg_duration, avg_words = db.session.query(
+        func.count(LearningSession.id),
+        func.avg(LearningSession.duration_minutes),
+        func.avg(LearningSession.total_words),
+    ).filter(LearningSession.user_id == user_id).one()
+
+    hour = extract('hour', LearningSession.start_time)
+    hour_counts = db.session.query(
+        hour, func.count(LearningSession.id)
+    ).filter(
+        LearningSession.user_id == user_id
+    ).group_by(hour).all()
+
+    return {
+        'session_count': session_count or 0,
+        'avg_duration': float(avg_duration or 0),
+        'avg_words': float(avg_words or 0),
+        'hour_counts': {int(h): count for h, count in hour_counts},
+    }
+
+
+def _interval_aggregates(user_id: str) -> Dict[str, Any]:
+    """相邻会话间隔（小时）的个数、均值和样本标准差
+
+    间隔由LAG窗口函数在数据库中计算，只返回一行聚合。方差分两遍计算：
+    先求均值，再对离差平方求和，避免平方和公式在间隔较大时的抵消误差。
+    """
+    epoch = _epoch_seconds(LearningSession.start_time)
+    gaps = db.session.query(
+        ((epoch - func.lag(epoch).over(
+            order_by=LearningSession.start_time
+        )) / 3600).label('gap')
+    ).filter(LearningSession.user_id == user_id).subquery()
+
+    count, mean = db.session.query(
+        func.count(gaps.c.gap), func.avg(gaps.c.gap)
+    ).one()
+
+    count = count or 0
+    if not count:
+        return {'interval_count': 0, 'interval_mean': 0, 'interval_std': 0}
+
+    mean = float(mean)
+    variance = 0
+    if count > 1:
+        squared_deviations = db.session.query(
+            func.sum((gaps.c.gap - mean) * (gaps.c.gap - mean))
+        ).scalar()
+        variance = float(squared_deviations or 0) / (count - 1)
+    return {
+        'interval_count': count,
+        'interval_mean': mean,
+        'interval_std': math.sqrt(max(variance, 0)),
+    }
+
+
+def _error_aggregates(user_id: str) -> Dict[str, Any]:
+    """用户答错的单词数按会话主观难度档和开始小时的分布
+
+    练习记录不含user_id，也没有错误类型，错误数取自用户学习会话的
+    total_words - correct_words，类型统一记为UNTYPED_ERROR。
+    """
+    errors = case(
+        (LearningSession.total_words > LearningSession.correct_words,
+         LearningSession.total_words - LearningSession.correct_words),
+        else_=0
+    )
+    owned = LearningSession.user_id == user_id
+
+    total_errors = db.session.query(func.sum(errors)).filter(owned).scalar()
+
+    level = case(
+        (LearningSession.perceived_difficulty.is_(None), 'medium'),
+        (LearningSession.perceived_difficulty <= EASY_DIFFICULTY, 'easy'),
+        (LearningSession.perceived_difficulty < HARD_DIFFICULTY, 'medium'),
+        else_='hard'
+    )
+    difficulty_rows = db.session.query(
+        level, func.sum(errors)
+    ).filter(owned).group_by(level).all()
+
+    hour = extract('hour', LearningSession.start_time)
+    hour_rows = db.session.query(
+        hour, func.sum(errors)
+    ).filter(owned).group_by(hour).all()
+
+    return {
+        'error_types': ({UNTYPED_ERROR: int(total_errors)}
+                        if total_errors else {}),
+        'error_difficulties': {
+            label: int(count) for label, count in difficulty_rows if count
+        },
+        'error_hours': {
+            int(h): int(count) for h, count in hour_rows if count
+        },
+    }
+
+
+def load_current_performance() -> Dict[str, Any]:
+    """当前整体表现，直接读取练习计数器"""
+    counters = get_counters()
+    total = counters['total_sessions']
+    return {
+        'accuracy': counters['correct_sessions'] / total if total else 0,
+        'total_practices': total,
+        'correct_practices': counters['correct_sessions'],
+    }
+
+
+def load_daily_accuracy(days: int = 14) -> List[Dict[str, Any]]:
+    """最近若干天每天的练习次数和正确率"""
+    since = datetime.utcnow() - timedelta(days=days)
+    day = func.date(PracticeSession.created_at)
+    rows = db.session.query(
+        day,
+        func.count(PracticeSession.id),
+        func.sum(case((PracticeSession.is_correct.is_(True), 1), else_=0)),
+    ).filter(
+        PracticeSession.created_at >= since
+    ).group_by(day).order_by(day).all()
+
+    return [
+        {
+            'date': str(date_value),
+            'practices': total,
+            'accuracy': (correct or 0) / total if total else 0,
+        }
+        for date_value, total, correct in rows
+    ]
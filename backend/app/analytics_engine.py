@@ -1,7 +1,9 @@
 from datetime import datetime
-from typing import Dict, List, Any
-import statistics
-from collections import defaultdict, Counter
+from typing import Dict, List, Any, Tuple
+
+import numpy as np
+
+EPOCH = datetime(1970, 1, 1)
 
 
 class LearningAnalytics:
@@ -16,21 +18,47 @@ class LearningAnalytics:
         }
     
     def analyze_learning_pattern(self, sessions: List[Dict]) -> Dict[str, Any]:
-        """分析学习模式"""
+        """分析学习模式
+        
+        会话先转换为列式数组（每个时间戳只解析一次），
+        汇总为聚合统计后再分析时间、频率、强度和错误模式。
+        """
         if not sessions:
             return {'pattern': 'insufficient_data', 'confidence': 0}
         
+        return self.analyze_aggregates(
+            self._summarize(self._to_columns(sessions))
+        )
+    
+    def analyze_aggregates(self, aggregates: Dict[str, Any]) -> Dict[str, Any]:
+        """基于聚合统计分析学习模式
+        
+        Args:
+            aggregates: 由_summarize或analytics_data.load_pattern_aggregates生成
+                session_count: 会话数
+                hour_counts: {小时: 会话数}
+                interval_count / interval_mean / interval_std: 相邻会话间隔（小时）
+                avg_duration / avg_words: 平均时长与单词数
+                error_types: {错误类型: 次数}，次数相同时按该顺序排列
+                error_difficulties: {难度: 错误次数}
+                error_hours: {小时: 错误次数}
+        """
+        if not aggregates['session_count'] and not aggregates['error_types']:
+            return {'pattern': 'insufficient_data', 'confidence': 0}
+        
         # 分析学习时间偏好
-        time_distribution = self._analyze_time_preference(sessions)
+        time_distribution = self._analyze_time_preference(
+            aggregates['hour_counts']
+        )
         
         # 分析学习频率
-        frequency_pattern = self._analyze_frequency_pattern(sessions)
+        frequency_pattern = self._analyze_frequency_pattern(aggregates)
         
         # 分析学习强度
-        intensity_pattern = self._analyze_intensity_pattern(sessions)
+        intensity_pattern = self._analyze_intensity_pattern(aggregates)
         
         # 分析错误模式
-        error_pattern = self._analyze_error_pattern(sessions)
+        error_pattern = self._analyze_error_pattern(aggregates)
         
         return {
             'time_preference': time_distribution,
@@ -42,59 +70,137 @@ class LearningAnalytics:
             )
         }
     
-    def _analyze_time_preference(self, sessions: List[Dict]) -> Dict[str, Any]:
-        """分析时间偏好"""
-        hour_counts = defaultdict(int)
+    @staticmethod
+    def _to_columns(sessions: List[Dict]) -> Dict[str, Any]:
+        """把会话列表转换为列式数组
+        
+        Returns:
+            epoch: 有时间戳会话的时间（秒），hour: 对应的小时
+            duration / words: 缺失值为NaN
+            error_type / error_difficulty: 错误的类别编码及类别表
+            error_hour: 错误所在会话的小时，会话没有时间戳时为-1
+        """
+        n = len(sessions)
+        epoch = np.full(n, np.nan)
+        hour = np.full(n, -1, dtype=np.int16)
+        duration = np.full(n, np.nan)
+        words = np.full(n, np.nan)
+        error_types = []
+        error_difficulties = []
+        error_session = []
+        
+        for i, session in enumerate(sessions):
+            timestamp = session.get('timestamp')
+            if timestamp:
+                moment = datetime.fromisoformat(timestamp)
+                hour[i] = moment.hour
+                epoch[i] = (moment.timestamp() if moment.tzinfo
+                            else (moment - EPOCH).total_seconds())
+            if session.get('duration') is not None:
+                duration[i] = session['duration']
+            if session.get('words_practiced') is not None:
+                words[i] = session['words_practiced']
+            for error in session.get('errors') or ():
+                error_types.append(error.get('type', 'unknown'))
+                error_difficulties.append(
+                    error.get('word_difficulty', 'medium')
+                )
+                error_session.append(i)
+        
+        type_labels, type_codes = _encode(error_types)
+        difficulty_labels, difficulty_codes = _encode(error_difficulties)
         
-        for session in sessions:
-            # 假设session有timestamp字段
-            if 'timestamp' in session:
-                hour = datetime.fromisoformat(session['timestamp']).hour
-                hour_counts[hour] += 1
+        return {
+            'count': n,
+            'epoch': epoch,
+            'hour': hour,
+            'duration': duration,
+            'words': words,
+            'error_type': type_codes,
+            'error_type_labels': type_labels,
+            'error_difficulty': difficulty_codes,
+            'error_difficulty_labels': difficulty_labels,
+            'error_hour': hour[np.array(error_session, dtype=np.int64)],
+        }
+    
+    @staticmethod
+    def _summarize(columns: Dict[str, Any]) -> Dict[str, Any]:
+        """把列式数组向量化汇总为analyze_aggregates使用的聚合统计"""
+        hours = columns['hour'][columns['hour'] >= 0]
+        
+        # 相邻会话的学习间隔（小时）
+        epoch = columns['epoch'][~np.isnan(columns['epoch'])]
+        intervals = np.diff(np.sort(epoch)) / 3600
+        
+        type_counts = np.bincount(
+            columns['error_type'],
+            minlength=len(columns['error_type_labels'])
+        )
+        difficulty_counts = np.bincount(
+            columns['error_difficulty'],
+            minlength=len(columns['error_difficulty_labels'])
+        )
+        error_hours = columns['error_hour']
         
-        if not hour_counts:
+        return {
+            'session_count': columns['count'],
+            'hour_counts': _nonzero_counts(np.bincount(hours, minlength=24)),
+            'interval_count': int(intervals.size),
+            'interval_mean': (float(intervals.mean())
+                              if intervals.size else 0),
+            'interval_std': (float(intervals.std(ddof=1))
+                             if intervals.size > 1 else 0),
+            'avg_duration': _mean_present(columns['duration']),
+            'avg_words': _mean_present(columns['words']),
+            # 类别表按首次出现的顺序排列
+            'error_types': {
+                label: int(count) for label, count in zip(
+                    columns['error_type_labels'], type_counts
+                )
+            },
+            'error_difficulties': {
+                label: int(count) for label, count in zip(
+                    columns['error_difficulty_labels'], difficulty_counts
+                )
+            },
+            'error_hours': _nonzero_counts(
+                np.bincount(error_hours[error_hours >= 0], minlength=24)
+            ),
+        }
+    
+    def _analyze_time_preference(self, hour_counts: Dict[int, int]) -> Dict[str, Any]:
+        """分析时间偏好"""
+        total = sum(hour_counts.values())
+        if not total:
             return {'preferred_time': 'unknown', 'confidence': 0}
         
         # 计算各时间段的学习次数
-        pattern_scores = {}
-        for pattern_name, time_range in self.learning_patterns.items():
-            score = 0
-            for hour in range(time_range['start'], time_range['end']):
-                score += hour_counts.get(hour, 0)
-            pattern_scores[pattern_name] = score
+        pattern_scores = {
+            pattern_name: sum(
+                count for hour, count in hour_counts.items()
+                if time_range['start'] <= hour < time_range['end']
+            )
+            for pattern_name, time_range in self.learning_patterns.items()
+        }
         
         # 找出最活跃的时间段
         best_pattern = max(pattern_scores, key=pattern_scores.get)
-        total_sessions = sum(hour_counts.values())
-        confidence = pattern_scores[best_pattern] / total_sessions if total_sessions > 0 else 0
+        confidence = pattern_scores[best_pattern] / total
         
         return {
             'preferred_time': best_pattern,
             'confidence': confidence,
-            'distribution': dict(hour_counts),
+            'distribution': dict(sorted(hour_counts.items())),
             'pattern_scores': pattern_scores
         }
     
-    def _analyze_frequency_pattern(self, sessions: List[Dict]) -> Dict[str, Any]:
+    def _analyze_frequency_pattern(self, aggregates: Dict) -> Dict[str, Any]:
         """分析学习频率模式"""
-        if len(sessions) < 2:
-            return {'pattern': 'insufficient_data', 'avg_interval': 0}
-        
-        # 计算学习间隔
-        intervals = []
-        sorted_sessions = sorted(sessions, key=lambda x: x.get('timestamp', ''))
-        
-        for i in range(1, len(sorted_sessions)):
-            prev_time = datetime.fromisoformat(sorted_sessions[i-1]['timestamp'])
-            curr_time = datetime.fromisoformat(sorted_sessions[i]['timestamp'])
-            interval = (curr_time - prev_time).total_seconds() / 3600  # 小时
-            intervals.append(interval)
-        
-        if not intervals:
+        if not aggregates['interval_count']:
             return {'pattern': 'insufficient_data', 'avg_interval': 0}
         
-        avg_interval = statistics.mean(intervals)
-        std_interval = statistics.stdev(intervals) if len(intervals) > 1 else 0
+        avg_interval = aggregates['interval_mean']
+        std_interval = aggregates['interval_std']
         
         # 判断学习频率模式
         if avg_interval < 2:  # 小于2小时
@@ -113,22 +219,13 @@ class LearningAnalytics:
             'consistency': 1 / (1 + std_interval / avg_interval) if avg_interval > 0 else 0
         }
     
-    def _analyze_intensity_pattern(self, sessions: List[Dict]) -> Dict[str, Any]:
+    def _analyze_intensity_pattern(self, aggregates: Dict) -> Dict[str, Any]:
         """分析学习强度模式"""
-        if not sessions:
+        if not aggregates['session_count']:
             return {'pattern': 'no_data', 'avg_duration': 0}
         
-        durations = []
-        word_counts = []
-        
-        for session in sessions:
-            if 'duration' in session:
-                durations.append(session['duration'])
-            if 'words_practiced' in session:
-                word_counts.append(session['words_practiced'])
-        
-        avg_duration = statistics.mean(durations) if durations else 0
-        avg_words = statistics.mean(word_counts) if word_counts else 0
+        avg_duration = aggregates['avg_duration']
+        avg_words = aggregates['avg_words']
         
         # 判断学习强度
         if avg_duration > 60 and avg_words > 50:  # 超过1小时，50个单词
@@ -145,30 +242,17 @@ class LearningAnalytics:
             'efficiency': avg_words / avg_duration if avg_duration > 0 else 0
         }
     
-    def _analyze_error_pattern(self, sessions: List[Dict]) -> Dict[str, Any]:
+    def _analyze_error_pattern(self, aggregates: Dict) -> Dict[str, Any]:
         """分析错误模式"""
-        error_types = Counter()
-        difficulty_errors = defaultdict(int)
-        time_errors = defaultdict(int)
-        
-        for session in sessions:
-            if 'errors' in session:
-                for error in session['errors']:
-                    error_types[error.get('type', 'unknown')] += 1
-                    
-                    # 按难度分析错误
-                    difficulty = error.get('word_difficulty', 'medium')
-                    difficulty_errors[difficulty] += 1
-                    
-                    # 按时间分析错误
-                    if 'timestamp' in session:
-                        hour = datetime.fromisoformat(session['timestamp']).hour
-                        time_errors[hour] += 1
+        error_types = aggregates['error_types']
+        
+        # 次数相同时保持输入顺序（与Counter.most_common一致）
+        common = sorted(error_types.items(), key=lambda item: -item[1])[:5]
         
         return {
-            'common_error_types': dict(error_types.most_common(5)),
-            'difficulty_distribution': dict(difficulty_errors),
-            'time_distribution': dict(time_errors),
+            'common_error_types': dict(common),
+            'difficulty_distribution': dict(aggregates['error_difficulties']),
+            'time_distribution': dict(sorted(aggregates['error_hours'].items())),
             'total_errors': sum(error_types.values())
         }
     
@@ -229,7 +313,12 @@ class LearningAnalytics:
         
         # 基于错误模式的建议
         error_pattern = learning_pattern.get('error_pattern', {})
-        common_errors = error_pattern.get('common_error_types', {})
+        # 没有类型的错误（'unknown'）无法给出针对性建议
+        common_errors = {
+            error_type: count for error_type, count
+            in error_pattern.get('common_error_types', {}).items()
+            if error_type != 'unknown'
+        }
         if common_errors:
             most_common_error = max(common_errors, key=common_errors.get)
             recommendations.append({
@@ -289,4 +378,49 @@ class LearningAnalytics:
             'recommended_end_hour': 11,
             'suggested_interval_hours': 24,
             'confidence': 0.3
-        }
\ No newline at end of file
+        }
+
+    def build_performance_insights(self, learning_pattern: Dict[str, Any],
+                                   current_performance: Dict[str, Any],
+                                   daily_accuracy: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """汇总学习表现洞察"""
+        error_pattern = learning_pattern.get('error_pattern', {})
+        
+        # 最近一半天数与前一半天数的正确率之差
+        accuracies = [day['accuracy'] for day in daily_accuracy]
+        half = len(accuracies) // 2
+        trend = (sum(accuracies[half:]) / (len(accuracies) - half)
+                 - sum(accuracies[:half]) / half) if half else 0
+        
+        return {
+            'overall_pattern': learning_pattern.get('overall_pattern',
+                                                    'undefined_pattern'),
+            'current_performance': current_performance,
+            'accuracy_trend': trend,
+            'daily_accuracy': daily_accuracy,
+            'total_errors': error_pattern.get('total_errors', 0),
+            'common_error_types': error_pattern.get('common_error_types', {}),
+            'optimal_study_time': self.predict_optimal_study_time(
+                learning_pattern
+            )
+        }
+
+
+def _encode(values: List) -> Tuple[List, np.ndarray]:
+    """类别编码：按首次出现顺序编号，返回(类别表, 编码数组)"""
+    labels = {}
+    codes = np.fromiter(
+        (labels.setdefault(value, len(labels)) for value in values),
+        dtype=np.int64, count=len(values)
+    )
+    return list(labels), codes
+
+
+def _mean_present(values: np.ndarray) -> float:
+    """忽略缺失值（NaN）的均值，没有数据时为0"""
+    present = values[~np.isnan(values)]
+    return float(present.mean()) if present.size else 0
+
+
+def _nonzero_counts(counts: np.ndarray) -> Dict[int, int]:
+    return {int(key): int(counts[key]) for key in np.flatnonzero(counts)}
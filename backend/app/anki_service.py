@@ -1,7 +1,18 @@
+import asyncio
 import requests
 import re
 from urllib.parse import unquote
 
+try:
+    import httpx
+except ImportError:  # 未安装httpx时异步客户端退回线程池执行requests
+    httpx = None
+
+# 同步的学习中卡片查询
+LEARNING_QUERY = "deck:英语::小学单词 is:learn"
+# 限制数量，避免一次获取太多
+MAX_LEARNING_CARDS = 50
+
 
 class AnkiConnectService:
     def __init__(self, url="http://localhost:8765"):
@@ -9,27 +20,29 @@ class AnkiConnectService:
     
     def _request(self, action, params=None):
         """向AnkiConnect发送请求"""
-        if params is None:
-            params = {}
-        
-        request_data = {
-            "action": action,
-            "version": 6,
-            "params": params
-        }
-        
         try:
-            response = requests.post(self.url, json=request_data)
+            response = requests.post(
+                self.url, json=self._payload(action, params)
+            )
             response.raise_for_status()
-            result = response.json()
-            
-            if result.get("error"):
-                raise Exception(f"AnkiConnect错误: {result['error']}")
-            
-            return result.get("result")
+            return self._result(response.json())
         except requests.exceptions.RequestException as e:
             raise Exception(f"连接Anki失败: {e}")
     
+    @staticmethod
+    def _payload(action, params=None):
+        return {
+            "action": action,
+            "version": 6,
+            "params": params or {}
+        }
+    
+    @staticmethod
+    def _result(result):
+        if result.get("error"):
+            raise Exception(f"AnkiConnect错误: {result['error']}")
+        return result.get("result")
+    
     def get_deck_names(self):
         """获取所有牌组名称"""
         return self._request("deckNames")
@@ -50,21 +63,22 @@ class AnkiConnectService:
     def get_learning_cards(self):
         """获取正在学习的卡片"""
         # 获取【英语::小学单词】牌组中正在学习的卡片
-        query = "deck:英语::小学单词 is:learn"
-        card_ids = self._request("findCards", {"query": query})
+        card_ids = self._request("findCards", {"query": LEARNING_QUERY})
         
         if not card_ids:
             return []
         
-        # 限制数量，避免一次获取太多
-        card_ids = card_ids[:50]
+        card_ids = card_ids[:MAX_LEARNING_CARDS]
         cards_info = self.get_cards_info(card_ids)
         
         # 获取笔记信息
         note_ids = [card["note"] for card in cards_info]
         notes_info = self.get_notes_info(note_ids)
         
-        # 组合卡片和笔记信息
+        return self._combine_cards(cards_info, notes_info)
+    
+    def _combine_cards(self, cards_info, notes_info):
+        """组合卡片和笔记信息"""
         words = []
         for i, card in enumerate(cards_info):
             note = notes_info[i]
@@ -277,4 +291,68 @@ class AnkiConnectService:
                             return clean_value
                     return clean_value
         
-        return None
\ No newline at end of file
+        return None
+
+
+class AsyncAnkiConnectService(AnkiConnectService):
+    """AnkiConnect异步客户端
+
+    等待AnkiConnect响应时不占用事件循环，字段解析沿用同步版本。
+    需要在async with中使用，以便复用同一个HTTP连接。
+    """
+    
+    def __init__(self, url="http://localhost:8765", timeout=30.0):
+        super().__init__(url)
+        self.timeout = timeout
+        self._client = None
+    
+    async def __aenter__(self):
+        if httpx is not None:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def _arequest(self, action, params=None):
+        """异步向AnkiConnect发送请求"""
+        if self._client is None:
+            return await asyncio.to_thread(self._request, action, params)
+        
+        try:
+            response = await self._client.post(
+                self.url, json=self._payload(action, params)
+            )
+            response.raise_for_status()
+            return self._result(response.json())
+        except httpx.HTTPError as e:
+            raise Exception(f"连接Anki失败: {e}")
+    
+    async def aget_learning_cards(self):
+        """get_learning_cards的异步版本"""
+        card_ids = await self._arequest(
+            "findCards", {"query": LEARNING_QUERY}
+        )
+        
+        if not card_ids:
+            return []
+        
+        card_ids = card_ids[:MAX_LEARNING_CARDS]
+        cards_info = await self._arequest("cardsInfo", {"cards": card_ids})
+        
+        note_ids = [card["note"] for card in cards_info]
+        notes_info = await self._arequest("notesInfo", {"notes": note_ids})
+        
+        return self._combine_cards(cards_info, notes_info)
+    
+    async def aretrieve_media_file(self, filename):
+        """获取Anki媒体文件的base64内容，失败时返回None"""
+        try:
+            return await self._arequest(
+                "retrieveMediaFile", {"filename": filename}
+            )
+        except Exception as e:
+            print(f"获取Anki媒体文件失败: {e}")
+            return None
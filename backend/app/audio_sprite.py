@@ -0,0 +1,170 @@
+"""会话音频合集（audio sprite）
+
+把接下来K个单词的发音拼接成一个WAV文件，并附带每个单词的偏移表，
+客户端一次请求即可加载整个会话的发音，按offset/duration截取播放。
+合集按单词集合排序后的哈希缓存，相同单词集合只拼接一次。
+"""
+
+import hashlib
+import json
+import os
+import wave
+from typing import Dict, List, Optional
+
+from .media_store import MEDIA_ROOT, media_url
+from .data_version import WORDS, bump_data_version
+from .models import Word, db
+
+# 相邻两段发音之间插入的静音（秒），避免播放边界串音
+GAP_SECONDS = 0.15
+
+LOCAL_AUDIO_PREFIXES = ('/media/audio/', '/static/audio/')
+
+
+class AudioSpriteService:
+    """会话音频合集服务"""
+
+    def __init__(self, audio_dir: str = None):
+        self.audio_dir = audio_dir or os.path.join(MEDIA_ROOT, 'audio')
+
+    def build_bundle(self, words: List[Word]) -> Dict:
+        """为一组单词生成音频合集
+
+        Returns:
+            {
+                'url': 合集WAV地址（没有可拼接的音频时为None）,
+                'offsets': {word_id: {'word', 'start', 'duration'}},
+                'external': {word_id: 无法拼接、需单独加载的音频URL}
+            }
+        """
+        self._ensure_audio(words)
+
+        local = []
+        external = {}
+        for word in words:
+            path = self._local_wav_path(word.audio_url)
+            if path and os.path.exists(path):
+                local.append((word, path))
+            elif word.audio_url:
+                external[str(word.id)] = word.audio_url
+
+        if not local:
+            return {'url': None, 'offsets': {}, 'external': external}
+
+        bundle_key = self.bundle_key(local)
+        wav_name = f"sprite_{bundle_key}.wav"
+        wav_path = os.path.join(self.audio_dir, wav_name)
+        map_path = os.path.join(self.audio_dir, f"sprite_{bundle_key}.json")
+
+        if os.path.exists(wav_path) and os.path.exists(map_path):
+            with open(map_path, 'r', encoding='utf-8') as f:
+                bundle = json.load(f)
+        else:
+            bundle = self._concatenate(local, wav_path, map_path)
+
+        bundle_external = dict(bundle.get('external', {}))
+        bundle_external.update(external)
+        return {
+            'url': media_url('audio', wav_name),
+            'offsets': bundle['offsets'],
+            'external': bundle_external
+        }
+
+    @staticmethod
+    def bundle_key(local) -> str:
+        """按排序后的单词集合及其音频文件计算合集哈希"""
+        members = sorted(
+            f"{word.id}:{os.path.basename(path)}" for word, path in local
+        )
+        return hashlib.sha256(
+            '|'.join(members).encode('utf-8')
+        ).hexdigest()[:32]
+
+    def _ensure_audio(self, words: List[Word]) -> None:
+        """没有音频的单词批量合成，并写回数据库"""
+        missing = [word for word in words if not word.audio_url]
+        if not missing:
+            return
+
+        from .langchain_service import get_langchain_service
+
+        urls = get_langchain_service().generate_audio_batch(
+            [word.word for word in missing]
+        )
+        updated = False
+        for word in missing:
+            url = urls.get(word.word)
+            if url:
+                word.audio_url = url
+                updated = True
+        if updated:
+            bump_data_version(WORDS)
+            db.session.commit()
+
+    def _local_wav_path(self, audio_url: Optional[str]) -> Optional[str]:
+        """本地WAV文件路径，远程或非WAV音频返回None"""
+        if not audio_url or not audio_url.lower().endswith('.wav'):
+            return None
+        for prefix in LOCAL_AUDIO_PREFIXES:
+            if audio_url.startswith(prefix):
+                filename = os.path.basename(audio_url[len(prefix):])
+                return os.path.join(self.audio_dir, filename)
+        return None
+
+    def _concatenate(self, local, wav_path: str, map_path: str) -> Dict:
+        """拼接WAV并写出偏移表，采样参数不一致的文件放入external"""
+        offsets = {}
+        external = {}
+        params = None
+        frames_written = 0
+        tmp_wav = f"{wav_path}.{os.getpid()}.tmp"
+
+        with wave.open(tmp_wav, 'wb') as out:
+            for word, path in local:
+                try:
+                    with wave.open(path, 'rb') as clip:
+                        clip_params = (clip.getnchannels(),
+                                       clip.getsampwidth(),
+                                       clip.getframerate())
+                        if params is None:
+                            params = clip_params
+                            out.setnchannels(params[0])
+                            out.setsampwidth(params[1])
+                            out.setframerate(params[2])
+                        if clip_params != params:
+                            external[str(word.id)] = word.audio_url
+                            continue
+                        frames = clip.readframes(clip.getnframes())
+                        clip_frames = clip.getnframes()
+                except (wave.Error, EOFError) as e:
+                    print(f"读取音频失败，单独加载: {path} {e}")
+                    external[str(word.id)] = word.audio_url
+                    continue
+
+                framerate = params[2]
+                offsets[str(word.id)] = {
+                    'word': word.word,
+                    'start': round(frames_written / framerate, 4),
+                    'duration': round(clip_frames / framerate, 4)
+                }
+                out.writeframes(frames)
+                frames_written += clip_frames
+
+                gap_frames = int(GAP_SECONDS * framerate)
+                out.writeframes(b'\x00' * gap_frames * params[0] * params[1])
+                frames_written += gap_frames
+
+            if params is None:
+                # 没有可读的音频时写出合法的空文件
+                out.setnchannels(1)
+                out.setsampwidth(2)
+                out.setframerate(22050)
+
+        bundle = {'offsets': offsets, 'external': external}
+        tmp_map = f"{map_path}.{os.getpid()}.tmp"
+        with open(tmp_map, 'w', encoding='utf-8') as f:
+            json.dump(bundle, f, ensure_ascii=False)
+        # 先写偏移表再发布WAV，保证读到WAV时偏移表已存在
+        os.replace(tmp_map, map_path)
+        os.replace(tmp_wav, wav_path)
+        return bundle
@@ -0,0 +1,126 @@
+"""慢I/O后台任务
+
+同步Anki、生成媒体、LLM补全等接口会长时间等待外部服务。Flask的异步视图
+在WSGI服务器下仍会占用接收请求的工作线程直到等待结束，因此这些接口只
+创建任务并返回202和任务ID，实际工作在进程内的后台线程池中执行
+（异步任务函数在线程内用asyncio.run运行），请求线程立即释放。
+
+任务状态保存在background_job表中，客户端轮询GET /api/jobs/<id>，
+请求落在哪个工作进程上都能查到。相同kind和key的任务在运行期间只执行
+一个，重复提交返回同一个任务。进程退出时未完成的任务超过
+JOB_STALE_SECONDS后视为失效，可以重新提交。
+"""
+
+import asyncio
+import atexit
+import inspect
+import os
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+
+from .models import BackgroundJob, db
+
+PENDING = 'pending'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+ACTIVE_STATUSES = (PENDING, RUNNING)
+
+# 未完成的任务超过该时间没有更新即视为失效（所在进程已退出）
+JOB_STALE_SECONDS = int(os.getenv('BACKGROUND_JOB_STALE_SECONDS', 1800))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """进程级共享的后台线程池，首次提交任务时创建"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv('BACKGROUND_JOB_WORKERS', 4)),
+                    thread_name_prefix='background-job'
+                )
+                atexit.register(_executor.shutdown, wait=False,
+                                cancel_futures=True)
+    return _executor
+
+
+def find_active_job(kind: str, key: str = '') -> Optional[BackgroundJob]:
+    """查找仍在运行的同类任务"""
+    fresh_after = datetime.utcnow() - timedelta(seconds=JOB_STALE_SECONDS)
+    return BackgroundJob.query.filter(
+        BackgroundJob.kind == kind,
+        BackgroundJob.key == key,
+        BackgroundJob.status.in_(ACTIVE_STATUSES),
+        BackgroundJob.updated_at >= fresh_after
+    ).order_by(BackgroundJob.created_at.desc()).first()
+
+
+def submit_job(kind: str, func: Callable, *args,
+               key: str = '') -> BackgroundJob:
+    """创建任务并交给后台线程池（提交事务）
+
+    Args:
+        kind: 任务类型
+        func: 任务函数，在新的应用上下文中调用，返回可JSON序列化的结果；
+            协程函数用asyncio.run执行
+        key: 去重键，相同kind和key的任务运行期间重复提交返回已有任务
+    """
+    job = find_active_job(kind, key)
+    if job is not None:
+        return job
+
+    job = BackgroundJob(id=uuid.uuid4().hex, kind=kind, key=key,
+                        status=PENDING)
+    db.session.add(job)
+    db.session.commit()
+
+    app = current_app._get_current_object()
+    _get_executor().submit(_run_job, app, job.id, func, args)
+    return job
+
+
+def get_job(job_id: str) -> Optional[BackgroundJob]:
+    return db.session.get(BackgroundJob, job_id)
+
+
+def _run_job(app, job_id: str, func: Callable, args: tuple) -> None:
+    """在后台线程中执行任务并记录结果"""
+    with app.app_context():
+        _set_status(job_id, RUNNING)
+        try:
+            if inspect.iscoroutinefunction(func):
+                result = asyncio.run(func(*args))
+            else:
+                result = func(*args)
+        except Exception as e:
+            db.session.rollback()
+            traceback.print_exc()
+            _set_status(job_id, FAILED, error=str(e))
+        else:
+            _set_status(job_id, SUCCEEDED, result=result)
+
+
+def _set_status(job_id: str, status: str, result=None,
+                error: str = None) -> None:
+    try:
+        db.session.query(BackgroundJob).filter_by(id=job_id).update({
+            'status': status,
+            'result': result,
+            'error': error,
+            'updated_at': datetime.utcnow(),
+        }, synchronize_session=False)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        print(f"更新后台任务{job_id}状态失败: {e}")
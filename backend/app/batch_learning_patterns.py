@@ -0,0 +1,161 @@
+"""学习模式批量计算
+
+管理后台需要每个用户的学习模式分类（如morning_learner_daily_learner）。
+任务先在SQL中找出需要重算的用户（没有结果、会话数变化或有会话在
+上次计算之后更新），再按用户分块流式读取会话，每块作为一个工作单元
+交给进程池运行LearningAnalytics.analyze_learning_pattern，
+结果以紧凑的列写入user_learning_pattern，并记录计算时间。
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from itertools import groupby
+from typing import Dict, List, Tuple
+
+from sqlalchemy import func, or_
+
+from .analytics_engine import LearningAnalytics
+from .models import LearningSession, UserLearningPattern, db
+
+# 每个工作单元包含的用户数
+CHUNK_USERS = 200
+
+
+def stale_user_ids(full: bool = False) -> List[str]:
+    """需要重新计算学习模式的用户"""
+    latest = db.session.query(
+        LearningSession.user_id.label('user_id'),
+        func.count(LearningSession.id).label('session_count'),
+        func.max(LearningSession.updated_at).label('updated_at'),
+    ).group_by(LearningSession.user_id).subquery()
+
+    query = db.session.query(latest.c.user_id).outerjoin(
+        UserLearningPattern, UserLearningPattern.user_id == latest.c.user_id
+    )
+    if not full:
+        query = query.filter(or_(
+            UserLearningPattern.id.is_(None),
+            UserLearningPattern.session_count != latest.c.session_count,
+            latest.c.updated_at > UserLearningPattern.computed_at,
+        ))
+    return [user_id for (user_id,) in query.order_by(latest.c.user_id)]
+
+
+def load_sessions(user_ids: List[str]) -> List[Tuple[str, list]]:
+    """按用户流式读取会话，只取分析需要的列"""
+    rows = db.session.query(
+        LearningSession.user_id,
+        LearningSession.start_time,
+        LearningSession.duration_minutes,
+        LearningSession.total_words,
+    ).filter(
+        LearningSession.user_id.in_(user_ids)
+    ).order_by(
+        LearningSession.user_id, LearningSession.start_time
+    ).yield_per(5000)
+
+    return [
+        (user_id, [
+            (start_time.isoformat() if start_time else None,
+             duration, words)
+            for _, start_time, duration, words in user_rows
+        ])
+        for user_id, user_rows in groupby(rows, key=lambda row: row[0])
+    ]
+
+
+def analyze_chunk(chunk: List[Tuple[str, list]]) -> List[Dict]:
+    """进程池任务：分析一块用户的学习模式，返回紧凑结果"""
+    analytics = LearningAnalytics()
+    results = []
+    for user_id, sessions in chunk:
+        pattern = analytics.analyze_learning_pattern([
+            {'timestamp': timestamp, 'duration': duration,
+             'words_practiced': words}
+            for timestamp, duration, words in sessions
+        ])
+        time_pref = pattern.get('time_preference', {})
+        frequency = pattern.get('frequency_pattern', {})
+        intensity = pattern.get('intensity_pattern', {})
+        results.append({
+            'user_id': user_id,
+            'overall_pattern': pattern.get('overall_pattern',
+                                           'insufficient_data'),
+            'preferred_time': time_pref.get('preferred_time'),
+            'time_confidence': time_pref.get('confidence', 0),
+            'frequency_pattern': frequency.get('pattern'),
+            'avg_interval_hours': frequency.get('avg_interval', 0),
+            'intensity_pattern': intensity.get('pattern'),
+            'avg_duration': intensity.get('avg_duration', 0),
+            'avg_words': intensity.get('avg_words_per_session', 0),
+            'session_count': len(sessions),
+        })
+    return results
+
+
+def compute_learning_patterns(full: bool = False, workers: int = None,
+                              chunk_users: int = CHUNK_USERS) -> int:
+    """批量计算学习模式，返回写入的用户数
+
+    Args:
+        full: 为True时重算全部用户，否则只重算有新会话的用户
+        workers: 进程数，默认读取ANALYTICS_JOB_WORKERS
+        chunk_users: 每个工作单元的用户数
+    """
+    workers = workers or int(
+        os.getenv('ANALYTICS_JOB_WORKERS', os.cpu_count() or 1)
+    )
+    # 计算开始前取时间戳，计算期间更新的会话会在下次任务中重算
+    computed_at = datetime.utcnow()
+
+    user_ids = stale_user_ids(full)
+    chunks = [user_ids[start:start + chunk_users]
+              for start in range(0, len(user_ids), chunk_users)]
+    if not chunks:
+        return 0
+
+    written = 0
+    if workers <= 1 or len(chunks) == 1:
+        for chunk_ids in chunks:
+            written += _write_results(
+                analyze_chunk(load_sessions(chunk_ids)), computed_at
+            )
+        return written
+
+    # 在途的工作单元不超过进程数的两倍，会话按块读取，内存占用有上限
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for chunk_ids in chunks:
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    written += _write_results(future.result(), computed_at)
+            pending.add(pool.submit(analyze_chunk, load_sessions(chunk_ids)))
+        for future in pending:
+            written += _write_results(future.result(), computed_at)
+    return written
+
+
+def _write_results(results: List[Dict], computed_at: datetime) -> int:
+    """批量写入一块结果：已有记录更新，其余插入"""
+    existing = dict(db.session.query(
+        UserLearningPattern.user_id, UserLearningPattern.id
+    ).filter(
+        UserLearningPattern.user_id.in_([row['user_id'] for row in results])
+    ))
+
+    inserts = []
+    updates = []
+    for row in results:
+        row['computed_at'] = computed_at
+        if row['user_id'] in existing:
+            row['id'] = existing[row['user_id']]
+            updates.append(row)
+        else:
+            inserts.append(row)
+
+    db.session.bulk_update_mappings(UserLearningPattern, updates)
+    db.session.bulk_insert_mappings(UserLearningPattern, inserts)
+    db.session.commit()
+    return len(results)
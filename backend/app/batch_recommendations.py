@@ -0,0 +1,277 @@
+"""每日推荐批量预计算
+
+夜间任务用一次列式查询读出全部用户的画像和增量学习统计，
+用NumPy对所有用户同时计算推荐，按分片交给进程池执行，最后批量写回
+daily_practice_recommendation。早上的请求只需按(user_id, date)读取。
+
+学习分析直接调用learning_stats.analyze_buckets，阈值、权重和推荐理由
+来自recommendation_engine的模块级常量和build_reasoning，与逐用户计算
+共用同一份定义；benchmarks/bench_batch_recommendations.py断言两条路径
+对同一批用户的结果一致。
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from typing import Dict
+
+import numpy as np
+from sqlalchemy import func, literal
+
+from .learning_stats import analyze_buckets
+from .models import (
+    DailyPracticeRecommendation, DataVersion, UserLearningProfile,
+    UserLearningStats, db
+)
+from .recommendation_engine import (
+    ACCURACY_THRESHOLD, AUTONOMY_FACTORS, AUTONOMY_WEIGHT, BASE_WORD_COUNT,
+    COMPETENCE_FACTORS, COMPETENCE_WEIGHT, CONFIDENCE_FACTORS,
+    CONFIDENT_ACCURACY, CONFIDENT_SESSION_COUNT, CONSISTENCY_BONUS,
+    DEFAULT_OPTIMAL_DIFFICULTY, DEFAULT_SESSION_LENGTH, DIFFICULTY_ADJUSTMENT,
+    DURATION_MATCH_RANGE, EASY_ACCURACY, HARD_ACCURACY, HIGH_ACCURACY_FACTOR,
+    LEARNING_SPEED_FACTOR, LOW_ACCURACY, LOW_ACCURACY_FACTOR, MAX_DIFFICULTY,
+    MAX_STREAK_BONUS, MAX_TARGET_ACCURACY, MAX_WORD_COUNT, MIN_CONFIDENCE,
+    MIN_DIFFICULTY, MIN_WORD_COUNT, PROFILE_COMPLETENESS,
+    PROGRESS_TREND_OFFSET, PROGRESS_TREND_RANGE, RECOMMENDATION_FIELDS,
+    STREAK_BONUS_PER_DAY, TARGET_ACCURACY_MARGIN, TREND_DOWN_FACTOR,
+    TREND_THRESHOLD, TREND_UP_FACTOR, WORD_COUNT_MATCH_RANGE,
+    build_reasoning
+)
+
+# 每个进程处理的用户数
+SHARD_SIZE = 2000
+
+
+def load_user_columns() -> Dict[str, np.ndarray]:
+    """一次查询读出全部用户的画像、学习统计和画像数据版本"""
+    profile_scope = literal('profile:') + UserLearningProfile.user_id
+    rows = db.session.query(
+        UserLearningProfile.user_id,
+        UserLearningProfile.preferred_daily_words,
+        UserLearningProfile.learning_speed,
+        UserLearningProfile.preferred_session_length,
+        UserLearningProfile.optimal_difficulty,
+        UserLearningProfile.current_streak,
+        UserLearningStats.day_buckets,
+        func.coalesce(DataVersion.version, 0),
+    ).outerjoin(
+        UserLearningStats,
+        UserLearningStats.user_id == UserLearningProfile.user_id
+    ).outerjoin(
+        DataVersion, DataVersion.scope == profile_scope
+    ).all()
+
+    (user_ids, daily_words, speed, session_length, difficulty, streak,
+     day_buckets, versions) = zip(*rows) if rows else ([],) * 8
+
+    def column(values, default, dtype=float):
+        return np.array(
+            [default if v is None else v for v in values], dtype=dtype
+        )
+
+    buckets = np.empty(len(rows), dtype=object)
+    buckets[:] = list(day_buckets)
+
+    return {
+        'user_id': np.array(user_ids, dtype=object),
+        # “or 默认值”语义：None和0都使用默认值
+        'daily_words': column(daily_words, 0),
+        'learning_speed': column(speed, 1.0),
+        'session_length': column(session_length, 0),
+        'optimal_difficulty': column(difficulty, 0),
+        'current_streak': column(streak, 0),
+        'day_buckets': buckets,
+        'profile_version': column(versions, 0, dtype=np.int64),
+    }
+
+
+def analyze_columns(cols: Dict[str, np.ndarray],
+                    today: date) -> Dict[str, np.ndarray]:
+    """逐用户调用learning_stats.analyze_buckets（与推荐引擎同一份分析），
+    结果转换为列"""
+    analyses = [analyze_buckets(buckets, today)
+                for buckets in cols['day_buckets']]
+    return {
+        name: np.array([analysis[name] for analysis in analyses],
+                       dtype=float)
+        for name in ('total_sessions', 'avg_accuracy', 'accuracy_trend',
+                     'learning_consistency')
+    }
+
+
+def compute_recommendations(cols: Dict[str, np.ndarray],
+                            today: date) -> Dict[str, np.ndarray]:
+    """RecommendationEngine.generate_daily_recommendation的向量化版本
+
+    阈值、权重和推荐理由都来自recommendation_engine的模块级常量，
+    运算顺序与逐用户计算相同；两条路径的一致性由
+    benchmarks/bench_batch_recommendations.py检查。
+    """
+    analysis = analyze_columns(cols, today)
+    accuracy = analysis['avg_accuracy']
+    trend = analysis['accuracy_trend']
+    consistency = analysis['learning_consistency']
+
+    preferred_words = np.where(
+        cols['daily_words'] > 0, cols['daily_words'], BASE_WORD_COUNT
+    )
+    preferred_length = np.where(
+        cols['session_length'] > 0, cols['session_length'],
+        DEFAULT_SESSION_LENGTH
+    )
+    optimal_difficulty = np.where(
+        cols['optimal_difficulty'] > 0, cols['optimal_difficulty'],
+        DEFAULT_OPTIMAL_DIFFICULTY
+    )
+
+    # 基础推荐参数
+    adjusted = preferred_words * (cols['learning_speed']
+                                  * LEARNING_SPEED_FACTOR)
+    adjusted = adjusted * np.where(
+        accuracy > ACCURACY_THRESHOLD, HIGH_ACCURACY_FACTOR,
+        np.where(accuracy < LOW_ACCURACY, LOW_ACCURACY_FACTOR, 1.0)
+    )
+    adjusted = adjusted * np.where(
+        trend > TREND_THRESHOLD, TREND_UP_FACTOR,
+        np.where(trend < -TREND_THRESHOLD, TREND_DOWN_FACTOR, 1.0)
+    )
+    word_count = np.clip(np.trunc(adjusted), MIN_WORD_COUNT, MAX_WORD_COUNT)
+    session_length = np.trunc(
+        preferred_length * (word_count / preferred_words)
+    )
+    target_accuracy = np.minimum(
+        MAX_TARGET_ACCURACY, accuracy + TARGET_ACCURACY_MARGIN
+    )
+    difficulty = np.where(
+        accuracy > HARD_ACCURACY,
+        np.minimum(MAX_DIFFICULTY, optimal_difficulty + DIFFICULTY_ADJUSTMENT),
+        np.where(accuracy < EASY_ACCURACY,
+                 np.maximum(MIN_DIFFICULTY,
+                            optimal_difficulty - DIFFICULTY_ADJUSTMENT),
+                 optimal_difficulty)
+    )
+
+    # 心理学因素
+    word_weight, duration_weight, consistency_weight = AUTONOMY_FACTORS
+    autonomy = np.clip(
+        (1.0 - np.abs(word_count - preferred_words)
+         / WORD_COUNT_MATCH_RANGE) * word_weight
+        + (1.0 - np.abs(session_length - preferred_length)
+           / DURATION_MATCH_RANGE) * duration_weight
+        + consistency * consistency_weight,
+        0.0, 1.0
+    )
+    accuracy_weight, difficulty_weight, progress_weight = COMPETENCE_FACTORS
+    competence = np.clip(
+        np.minimum(1.0, accuracy / CONFIDENT_ACCURACY) * accuracy_weight
+        + (1.0 - np.abs(difficulty - optimal_difficulty)) * difficulty_weight
+        + np.clip((trend + PROGRESS_TREND_OFFSET) / PROGRESS_TREND_RANGE,
+                  0.0, 1.0) * progress_weight,
+        0.0, 1.0
+    )
+    motivation = np.clip(
+        autonomy * AUTONOMY_WEIGHT + competence * COMPETENCE_WEIGHT
+        + np.minimum(MAX_STREAK_BONUS,
+                     cols['current_streak'] * STREAK_BONUS_PER_DAY)
+        + consistency * CONSISTENCY_BONUS,
+        0.0, 1.0
+    )
+    data_weight, stability_weight, profile_weight = CONFIDENCE_FACTORS
+    confidence = np.clip(
+        np.minimum(1.0, analysis['total_sessions'] / CONFIDENT_SESSION_COUNT)
+        * data_weight
+        + consistency * stability_weight
+        + PROFILE_COMPLETENESS * profile_weight,
+        MIN_CONFIDENCE, 1.0
+    )
+
+    return {
+        'recommended_word_count': word_count.astype(np.int64),
+        'recommended_session_length': session_length.astype(np.int64),
+        'target_accuracy': target_accuracy,
+        'difficulty_level': difficulty,
+        'autonomy_score': autonomy,
+        'competence_score': competence,
+        'motivation_boost': motivation,
+        'reasoning': [
+            build_reasoning(*values) for values in zip(
+                accuracy.tolist(), trend.tolist(), autonomy.tolist(),
+                competence.tolist(),
+                cols['current_streak'].astype(np.int64).tolist()
+            )
+        ],
+        'confidence_level': confidence,
+    }
+
+
+def _compute_shard(args):
+    """进程池任务：计算一个分片"""
+    cols, today = args
+    return compute_recommendations(cols, today)
+
+
+def _split(cols: Dict[str, np.ndarray], shard_size: int):
+    total = len(cols['user_id'])
+    for start in range(0, total, shard_size):
+        yield {name: values[start:start + shard_size]
+               for name, values in cols.items()}
+
+
+def precompute_daily_recommendations(target_date: date = None,
+                                     workers: int = None,
+                                     shard_size: int = SHARD_SIZE) -> int:
+    """为全部用户预计算指定日期（默认UTC今天）的推荐，返回写入的记录数"""
+    target_date = target_date or datetime.utcnow().date()
+    workers = workers or int(
+        os.getenv('RECOMMENDATION_JOB_WORKERS', os.cpu_count() or 1)
+    )
+
+    cols = load_user_columns()
+    if not len(cols['user_id']):
+        return 0
+
+    shards = list(_split(cols, shard_size))
+    if workers > 1 and len(shards) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(
+                _compute_shard,
+                [(shard, target_date) for shard in shards]
+            ))
+    else:
+        results = [compute_recommendations(shard, target_date)
+                   for shard in shards]
+
+    return _bulk_write(target_date, shards, results)
+
+
+def _bulk_write(target_date: date, shards, results) -> int:
+    """批量写入推荐：已有记录更新计算字段，其余插入"""
+    existing = dict(db.session.query(
+        DailyPracticeRecommendation.user_id,
+        DailyPracticeRecommendation.id
+    ).filter(DailyPracticeRecommendation.date == target_date))
+
+    inserts = []
+    updates = []
+    for shard, result in zip(shards, results):
+        for i, user_id in enumerate(shard['user_id']):
+            row = {field: _python_value(result[field][i])
+                   for field in RECOMMENDATION_FIELDS}
+            row['profile_version'] = int(shard['profile_version'][i])
+            if user_id in existing:
+                row['id'] = existing[user_id]
+                updates.append(row)
+            else:
+                row['user_id'] = user_id
+                row['date'] = target_date
+                inserts.append(row)
+
+    db.session.bulk_update_mappings(DailyPracticeRecommendation, updates)
+    db.session.bulk_insert_mappings(DailyPracticeRecommendation, inserts)
+    db.session.commit()
+    return len(inserts) + len(updates)
+
+
+def _python_value(value):
+    """NumPy标量转换为Python类型，便于数据库驱动绑定"""
+    return value.item() if isinstance(value, np.generic) else value
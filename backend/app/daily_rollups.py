@@ -0,0 +1,136 @@
+"""每日汇总维护
+
+练习次数、准确率之和、新单词数和活跃用户数按天保存在daily_rollup表中，
+由写入练习记录、单词记忆和学习会话的代码在同一事务内增量更新。
+趋势查询最多读取90行，耗时不随历史增长。汇总缺失或不一致时
+可调用rebuild_rollups从原始表重建。
+
+两类行的指标来源不同：
+    全局行（user_id为GLOBAL_ROLLUP_USER）：practice_count和accuracy_sum
+        来自practice_session的逐次答题，new_words来自word_memory，
+        active_users为当天有学习会话的用户数；日期为UTC日期
+    用户行：practice_count和accuracy_sum来自learning_session的
+        total_words和accuracy_rate（练习记录不含user_id），
+        日期为会话的session_date
+因此全局行的练习次数与各用户行之和不一定相等。
+"""
+
+from datetime import date, datetime
+from typing import Dict
+
+from sqlalchemy import case, func
+from sqlalchemy.exc import IntegrityError
+
+from .models import (
+    DailyRollup, LearningSession, PracticeSession, WordMemory, db
+)
+
+# 全局汇总行使用的user_id
+GLOBAL_ROLLUP_USER = '*'
+
+
+def _utc_today() -> date:
+    """练习记录和单词记忆的created_at为UTC时间，全局汇总按UTC日期归档"""
+    return datetime.utcnow().date()
+
+
+def _increment(day: date, user_id: str, **deltas) -> bool:
+    """增量更新一天的汇总行，行不存在时插入
+
+    Returns:
+        是否新插入了该行
+    """
+    updated = DailyRollup.query.filter_by(day=day, user_id=user_id).update(
+        {getattr(DailyRollup, name): getattr(DailyRollup, name) + value
+         for name, value in deltas.items()},
+        synchronize_session=False
+    )
+    if updated:
+        return False
+
+    try:
+        with db.session.begin_nested():
+            db.session.add(DailyRollup(day=day, user_id=user_id, **deltas))
+        return True
+    except IntegrityError:
+        # 并发事务已插入同一天的行，改为更新
+        return _increment(day, user_id, **deltas)
+
+
+def record_practice_rollup(count: int, correct: int,
+                           day: date = None) -> None:
+    """把练习记录计入全局汇总，随调用方的事务一起提交"""
+    if count or correct:
+        _increment(day or _utc_today(), GLOBAL_ROLLUP_USER,
+                   practice_count=count, accuracy_sum=correct)
+
+
+def record_new_words(count: int = 1, day: date = None) -> None:
+    """把新建的单词记忆计入全局汇总"""
+    _increment(day or _utc_today(), GLOBAL_ROLLUP_USER, new_words=count)
+
+
+def record_session_rollup(user_id: str, session_data: Dict) -> None:
+    """把一次学习会话计入用户汇总；用户当天首次学习时全局活跃用户数加1
+
+    用户行的练习次数取会话的total_words，准确率按accuracy_rate加权，
+    与全局行按逐次答题统计的口径不同。
+    """
+    day = session_data.get('session_date') or _utc_today()
+    if isinstance(day, datetime):
+        day = day.date()
+    elif isinstance(day, str):
+        day = date.fromisoformat(day)
+
+    total_words = session_data.get('total_words') or 0
+    accuracy = session_data.get('accuracy_rate') or 0.0
+    inserted = _increment(day, user_id, practice_count=total_words,
+                          accuracy_sum=accuracy * total_words)
+    if inserted:
+        _increment(day, GLOBAL_ROLLUP_USER, active_users=1)
+
+
+def rebuild_rollups() -> int:
+    """从原始表重新计算全部汇总（不提交事务），返回写入的行数"""
+    DailyRollup.query.delete()
+    rows: Dict[tuple, Dict] = {}
+
+    def row(day, user_id):
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        return rows.setdefault((day, user_id), {
+            'day': day, 'user_id': user_id, 'practice_count': 0,
+            'accuracy_sum': 0.0, 'new_words': 0, 'active_users': 0
+        })
+
+    practice_day = func.date(PracticeSession.created_at)
+    for day, count, correct in db.session.query(
+        practice_day,
+        func.count(PracticeSession.id),
+        func.sum(case((PracticeSession.is_correct.is_(True), 1), else_=0)),
+    ).filter(PracticeSession.created_at.isnot(None)).group_by(practice_day):
+        target = row(day, GLOBAL_ROLLUP_USER)
+        target['practice_count'] = count
+        target['accuracy_sum'] = float(correct or 0)
+
+    memory_day = func.date(WordMemory.created_at)
+    for day, count in db.session.query(
+        memory_day, func.count(WordMemory.id)
+    ).filter(WordMemory.created_at.isnot(None)).group_by(memory_day):
+        row(day, GLOBAL_ROLLUP_USER)['new_words'] = count
+
+    for day, user_id, total_words, correct in db.session.query(
+        LearningSession.session_date,
+        LearningSession.user_id,
+        func.sum(func.coalesce(LearningSession.total_words, 0)),
+        func.sum(func.coalesce(LearningSession.accuracy_rate, 0)
+                 * func.coalesce(LearningSession.total_words, 0)),
+    ).group_by(LearningSession.session_date, LearningSession.user_id):
+        target = row(day, user_id)
+        target['practice_count'] = total_words or 0
+        target['accuracy_sum'] = float(correct or 0)
+        row(day, GLOBAL_ROLLUP_USER)['active_users'] += 1
+
+    db.session.bulk_insert_mappings(DailyRollup, list(rows.values()))
+    db.session.flush()
+    return len(rows)
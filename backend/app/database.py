@@ -13,9 +13,14 @@ def get_db():
     return db.session
 
 
-def init_db():
-    """初始化数据库"""
-    with current_app.app_context():
+def init_db(app=None):
+    """初始化数据库：创建缺失的表
+    
+    Args:
+        app: Flask应用，默认使用当前应用上下文
+    """
+    app = app or current_app._get_current_object()
+    with app.app_context():
         db.create_all()
 
 
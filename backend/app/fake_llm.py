@@ -0,0 +1,79 @@
+"""离线测试用的确定性LLM
+
+模拟ChatGoogleGenerativeAI的invoke接口，根据提示词中的单词列表
+返回固定格式的JSON，用于在无网络、无API密钥的情况下测试
+批量富化的吞吐量和解析逻辑。
+"""
+
+import asyncio
+import json
+import re
+
+
+class FakeMessage:
+    """模拟AIMessage，只提供content属性"""
+
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeEnrichmentLLM:
+    """确定性假LLM
+
+    Args:
+        malformed_words: 需要返回非法条目的单词集合，用于测试部分重试
+        malformed_times: 每个非法单词连续返回非法结果的次数
+        broken_json_calls: 前N次调用返回无法解析的JSON
+        latency: ainvoke模拟的网络延迟（秒）
+    """
+
+    WORDS_PATTERN = re.compile(r'WORDS:\s*(\[.*?\])', re.S)
+    SINGLE_WORD_PATTERN = re.compile(r"'([^']+)'")
+
+    def __init__(self, malformed_words=None, malformed_times=1,
+                 broken_json_calls=0, latency=0.0):
+        self.malformed_words = set(malformed_words or [])
+        self.malformed_times = malformed_times
+        self.broken_json_calls = broken_json_calls
+        self.latency = latency
+        self.calls = 0
+        self._malformed_counts = {}
+
+    def invoke(self, prompt):
+        """根据提示词生成确定性的响应"""
+        self.calls += 1
+        match = self.WORDS_PATTERN.search(prompt)
+        if not match:
+            single = self.SINGLE_WORD_PATTERN.search(prompt)
+            word = single.group(1) if single else prompt.strip()
+            return FakeMessage(
+                f"含义：{word}的含义\n词性：n.\n例句：This is a {word}."
+            )
+
+        if self.calls <= self.broken_json_calls:
+            return FakeMessage('{"truncated": ')
+
+        words = json.loads(match.group(1))
+        result = {}
+        for word in words:
+            seen = self._malformed_counts.get(word, 0)
+            if word in self.malformed_words and seen < self.malformed_times:
+                self._malformed_counts[word] = seen + 1
+                result[word] = {'meaning': ''}
+                continue
+            result[word] = {
+                'meaning': f'{word}的含义',
+                'part_of_speech': 'n.',
+                'example': f'This is a {word}.',
+                'image_prompt': f'A simple, colorful illustration of {word}'
+            }
+
+        return FakeMessage(
+            '```json\n' + json.dumps(result, ensure_ascii=False) + '\n```'
+        )
+
+    async def ainvoke(self, prompt):
+        """异步版本，可通过latency模拟网络延迟"""
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.invoke(prompt)
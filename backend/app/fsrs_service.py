@@ -5,9 +5,11 @@ FSRS (Free Spaced Repetition Scheduler) 算法服务
 
 import math
 from datetime import datetime, timedelta
-from typing import Dict, Tuple, Optional
+from typing import Dict, List, Tuple, Optional
 from sqlalchemy import func
 from app.models import db, Word, WordMemory
+from app.data_version import REVIEWS, bump_data_version
+from app.daily_rollups import record_new_words
 
 
 class FSRSService:
@@ -152,6 +154,51 @@ class FSRSService:
         
         return earliest_words[0] if earliest_words else None
     
+    def get_next_words(self, limit: int = 10,
+                       exclude_ids: Optional[List[int]] = None) -> List[Word]:
+        """
+        按调度顺序获取接下来要复习的多个单词
+        
+        顺序与get_next_word一致：先到期单词，再新单词，最后最早需要复习的单词
+        
+        Args:
+            limit: 返回单词数量
+            exclude_ids: 需要排除的单词ID
+            
+        Returns:
+            单词列表
+        """
+        now = datetime.utcnow()
+        exclude_ids = list(exclude_ids or [])
+        words = []
+        
+        def remaining():
+            return limit - len(words)
+        
+        def excluded():
+            return exclude_ids + [w.id for w in words]
+        
+        # 1. 到期单词
+        words.extend(db.session.query(Word).join(WordMemory).filter(
+            WordMemory.next_review <= now,
+            ~Word.id.in_(excluded())
+        ).order_by(WordMemory.next_review.asc()).limit(remaining()).all())
+        
+        # 2. 新单词
+        if remaining() > 0:
+            words.extend(db.session.query(Word).outerjoin(WordMemory).filter(
+                WordMemory.id == None,
+                ~Word.id.in_(excluded())
+            ).order_by(func.random()).limit(remaining()).all())
+        
+        # 3. 最早需要复习的单词
+        if remaining() > 0:
+            words.extend(db.session.query(Word).join(WordMemory).filter(
+                ~Word.id.in_(excluded())
+            ).order_by(WordMemory.next_review.asc()).limit(remaining()).all())
+        
+        return words
+    
     def get_review_stats(self, user_id: Optional[int] = None) -> Dict:
         """
         获取复习统计信息
@@ -226,6 +273,7 @@ class FSRSService:
             # 创建新的记忆记录
             word_memory = WordMemory(word_id=word_id)
             db.session.add(word_memory)
+            record_new_words()
             db.session.flush()  # 确保获取ID
         
         # 更新记忆状态
@@ -252,6 +300,7 @@ class FSRSService:
             word_memory.consecutive_correct = 0
         
         try:
+            bump_data_version(REVIEWS)
             db.session.commit()
             
             return {
@@ -279,6 +328,7 @@ class FSRSService:
         word_memory = WordMemory.query.filter_by(word_id=word_id).first()
         if word_memory:
             db.session.delete(word_memory)
+            bump_data_version(REVIEWS)
             db.session.commit()
             return True
         return False
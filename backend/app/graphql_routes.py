@@ -1,7 +1,27 @@
-from flask import Blueprint
+from flask import Blueprint, json as flask_json
 from flask_graphql import GraphQLView
 from .graphql_schema import schema
 from .models import db
+from .serialization import JSON, encode as encode_payload, negotiate_format
+
+
+class NegotiatingGraphQLView(GraphQLView):
+    """支持msgpack/CBOR响应的GraphQL视图，与REST接口共用编码路径"""
+
+    @staticmethod
+    def encode(data, pretty=False):
+        if pretty:
+            return flask_json.dumps(data, indent=2)
+        return encode_payload(data, negotiate_format())
+
+    def dispatch_request(self):
+        response = super().dispatch_request()
+        mimetype = negotiate_format()
+        if response.mimetype == JSON and mimetype != JSON:
+            response.mimetype = mimetype
+        response.vary.add('Accept')
+        return response
+
 
 # 创建GraphQL蓝图
 graphql_bp = Blueprint('graphql', __name__)
@@ -9,7 +29,7 @@ graphql_bp = Blueprint('graphql', __name__)
 # 添加GraphQL视图
 graphql_bp.add_url_rule(
     '/graphql',
-    view_func=GraphQLView.as_view(
+    view_func=NegotiatingGraphQLView.as_view(
         'graphql',
         schema=schema,
         graphiql=True,  # 启用GraphiQL调试界面
@@ -20,10 +40,10 @@ graphql_bp.add_url_rule(
 # 添加GraphQL端点（仅用于生产环境，不启用GraphiQL）
 graphql_bp.add_url_rule(
     '/graphql-api',
-    view_func=GraphQLView.as_view(
+    view_func=NegotiatingGraphQLView.as_view(
         'graphql_api',
         schema=schema,
         graphiql=False,
         get_context=lambda: {'session': db.session}
     )
-)
\ No newline at end of file
+)
@@ -10,6 +10,14 @@ from .models import (
     SystemConfig
 )
 from .services.system_config_service import SystemConfigService
+from .data_version import (
+    PRACTICE, REVIEWS, WORDS, bump_data_version, profile_scope
+)
+from .daily_rollups import record_new_words
+from .practice_counters import increment_counters, record_practice
+from .session_prefetch import release_card
+from .recommendation_engine import RecommendationEngine
+from .learning_stats import session_data_from
 from .services.audit_log_service import AuditLogService
 from .exceptions import (
     ValidationError, ConfigurationError, NotFoundError,
@@ -822,6 +830,8 @@ class CreateWord(graphene.Mutation):
             
             word = Word(**word_data)
             db.session.add(word)
+            increment_counters(words=1)
+            bump_data_version(WORDS)
             db.session.commit()
             
             return CreateWord(
@@ -863,6 +873,7 @@ class UpdateWord(graphene.Mutation):
                     setattr(word, key, value)
             
             word.updated_at = datetime.utcnow()
+            bump_data_version(WORDS)
             db.session.commit()
             
             return UpdateWord(
@@ -901,6 +912,7 @@ class SubmitPracticeSession(graphene.Mutation):
             if not word_memory:
                 word_memory = WordMemory(word_id=session_data.word_id)
                 db.session.add(word_memory)
+                record_new_words()
             
             # 简化的FSRS更新逻辑
             word_memory.last_review = datetime.utcnow()
@@ -928,6 +940,9 @@ class SubmitPracticeSession(graphene.Mutation):
                 days=int(word_memory.stability)
             )
             
+            record_practice(session_data.is_correct)
+            release_card(session_data.word_id)
+            bump_data_version(PRACTICE, REVIEWS)
             db.session.commit()
             
             return SubmitPracticeSession(
@@ -970,6 +985,7 @@ class UpdateUserProfile(graphene.Mutation):
                     setattr(profile, key, value)
             
             profile.updated_at = datetime.utcnow()
+            bump_data_version(profile_scope(profile_data.user_id))
             db.session.commit()
             
             return UpdateUserProfile(
@@ -1014,7 +1030,12 @@ class RecordLearningSession(graphene.Mutation):
                 )
             
             db.session.add(session)
-            db.session.commit()
+            db.session.flush()
+            
+            # 更新用户画像和增量学习统计（同一事务提交）
+            RecommendationEngine().update_user_profile(
+                session.user_id, session_data_from(session)
+            )
             
             return RecordLearningSession(
                 session=session,
@@ -1060,6 +1081,7 @@ class ResetWordMemory(graphene.Mutation):
             word_memory.total_reviews = 0
             word_memory.updated_at = datetime.utcnow()
             
+            bump_data_version(REVIEWS)
             db.session.commit()
             
             return ResetWordMemory(
@@ -1653,6 +1675,8 @@ class DeleteWord(graphene.Mutation):
                 )
             
             db.session.delete(word)
+            increment_counters(words=-1)
+            bump_data_version(WORDS)
             db.session.commit()
             
             return DeleteWord(
@@ -1,32 +1,102 @@
+import asyncio
+import json
 import os
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.prompts import PromptTemplate
+import threading
+from .llm_cache import get_llm_cache
+from .llm_async import AsyncLLMExecutor
+from .media_store import externalize_data_uri, media_url
+from .placeholder_service import get_placeholder_url
+
+MODEL_NAME = "gemini-2.0-flash-exp"
+TEMPERATURE = 0.3
+
+# langchain和langchain_google_genai导入开销较大，
+# 推迟到第一次真正调用LLM时再加载
+_llm_client = None
+_llm_initialized = False
+_llm_lock = threading.Lock()
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def _create_llm():
+    """创建Gemini客户端"""
+    google_api_key = os.getenv('GOOGLE_API_KEY')
+    if not google_api_key:
+        print("警告：未设置GOOGLE_API_KEY，AI功能将不可用")
+        return None
+    
+    try:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        return ChatGoogleGenerativeAI(
+            model=MODEL_NAME,
+            google_api_key=google_api_key,
+            temperature=TEMPERATURE
+        )
+    except Exception as e:
+        print(f"警告：无法初始化Google AI服务: {e}")
+        return None
+
+
+def get_llm():
+    """获取进程级共享的Gemini客户端，首次使用时线程安全地创建"""
+    global _llm_client, _llm_initialized
+    if not _llm_initialized:
+        with _llm_lock:
+            if not _llm_initialized:
+                _llm_client = _create_llm()
+                _llm_initialized = True
+    return _llm_client
+
+
+def get_langchain_service():
+    """获取进程级共享的LangChainService实例"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = LangChainService()
+    return _service
+
+
+def _prompt_template(input_variables, template):
+    """延迟导入PromptTemplate并构造模板"""
+    from langchain.prompts import PromptTemplate
+    return PromptTemplate(input_variables=input_variables, template=template)
 
 
 class LangChainService:
-    def __init__(self):
+    # 批量富化时每个单词必须返回的字段
+    ENRICH_FIELDS = ('meaning', 'part_of_speech', 'example', 'image_prompt')
+    
+    def __init__(self, llm=None):
         # 从环境变量获取API密钥
         self.google_api_key = os.getenv('GOOGLE_API_KEY')
-        self.llm = None
+        self.model_name = MODEL_NAME
+        self.temperature = TEMPERATURE
+        self._llm = llm
+        self.cache = get_llm_cache()
+        # 异步执行器绑定事件循环，按线程分别保存
+        self._async_state = threading.local()
         
-        if self.google_api_key:
-            try:
-                self.llm = ChatGoogleGenerativeAI(
-                    model="gemini-2.0-flash-exp",
-                    google_api_key=self.google_api_key,
-                    temperature=0.3
-                )
-            except Exception as e:
-                print(f"警告：无法初始化Google AI服务: {e}")
-        else:
-            print("警告：未设置GOOGLE_API_KEY，AI功能将不可用")
+        if llm is not None:
+            # 注入的LLM（例如离线测试用的FakeEnrichmentLLM）
+            self.model_name = type(llm).__name__
+    
+    @property
+    def llm(self):
+        """LLM客户端，未注入时使用进程级共享实例"""
+        if self._llm is None:
+            self._llm = get_llm()
+        return self._llm
     
     def generate_image_prompt(self, word):
         """生成图片描述提示词"""
         if not self.llm:
             return f"A simple illustration of {word}"
             
-        prompt_template = PromptTemplate(
+        prompt_template = _prompt_template(
             input_variables=["word"],
             template="""
             为单词 '{word}' 生成一个简单、清晰的图片描述，
@@ -41,17 +111,35 @@ class LangChainService:
         )
         
         prompt = prompt_template.format(word=word)
+        return self._invoke_llm(prompt)
+    
+    def _invoke_llm(self, prompt):
+        """调用LLM，优先读取响应缓存"""
+        key = self.cache.make_key(self.model_name, self.temperature, prompt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
         response = self.llm.invoke(prompt)
-        return response.strip()
+        text = self._response_text(response)
+        self.cache.set(key, text, model=self.model_name)
+        return text
+    
+    @staticmethod
+    def _response_text(response):
+        """提取LLM响应文本"""
+        # Gemini返回的是AIMessage对象，需要获取content
+        if hasattr(response, 'content'):
+            return response.content.strip()
+        return str(response).strip()
     
     def generate_image(self, word, image_info=None):
         """处理单词对应的图片URL"""
         if image_info:
             return self._process_anki_image(image_info)
         else:
-            # 如果没有图片信息，返回占位符
-            base_url = "https://via.placeholder.com/200x200/4CAF50/FFFFFF"
-            return f"{base_url}?text={word}"
+            # 如果没有图片信息，返回本地渲染的占位图
+            return get_placeholder_url(word)
     
     def _process_anki_image(self, image_info):
         """处理Anki图片信息"""
@@ -62,8 +150,13 @@ class LangChainService:
         image_data = image_info.get('data')
         
         if image_type == 'base64':
-            # Base64图片可以直接使用
-            return image_data
+            # 内联Base64图片写入媒体存储，只返回短URL
+            url = externalize_data_uri(image_data, 'images')
+            if url is None:
+                # 保留原值，不丢弃用户数据
+                print("无法解码Anki内联图片，保留原值")
+                return image_data
+            return url
         elif image_type == 'url':
             # 网络图片直接返回URL
             return image_data
@@ -103,58 +196,17 @@ class LangChainService:
     
     def _get_anki_audio_url(self, filename):
         """获取Anki音频媒体文件的URL"""
-        try:
-            import requests
-            import base64
-            import os
-            
-            # 通过AnkiConnect获取媒体文件
-            request_data = {
-                "action": "retrieveMediaFile",
-                "version": 6,
-                "params": {"filename": filename}
-            }
-            
-            response = requests.post("http://localhost:8765", 
-                                     json=request_data)
-            result = response.json()
-            
-            if result.get("error"):
-                print(f"获取Anki音频文件失败: {result['error']}")
-                return None
-                
-            # 获取base64编码的文件内容
-            file_content = result.get("result")
-            if not file_content:
-                return None
-                
-            # 保存文件到static目录
-            audio_dir = "static/audio"
-            os.makedirs(audio_dir, exist_ok=True)
-            
-            # 处理文件名
-            safe_filename = filename.replace(' ', '_').replace('/', '_')
-            local_filename = f"anki_{safe_filename}"
-            local_path = os.path.join(audio_dir, local_filename)
-            
-            # 解码并保存文件
-            with open(local_path, 'wb') as f:
-                f.write(base64.b64decode(file_content))
-            
-            return f"/static/audio/{local_filename}"
-            
-        except Exception as e:
-            print(f"处理Anki音频文件失败: {e}")
-            return None
+        return self._fetch_anki_media(filename, 'audio')
     
     def _get_anki_media_url(self, filename):
         """获取Anki媒体文件的URL"""
+        return self._fetch_anki_media(filename, 'images')
+    
+    def _fetch_anki_media(self, filename, kind):
+        """通过AnkiConnect获取媒体文件并保存到static目录"""
         try:
             import requests
-            import base64
-            import os
             
-            # 通过AnkiConnect获取媒体文件
             request_data = {
                 "action": "retrieveMediaFile",
                 "version": 6,
@@ -168,72 +220,67 @@ class LangChainService:
             if result.get("error"):
                 print(f"获取Anki媒体文件失败: {result['error']}")
                 return None
-                
-            # 获取base64编码的文件内容
-            file_content = result.get("result")
-            if not file_content:
-                return None
-                
-            # 保存文件到static目录
-            media_dir = "static/images"
-            os.makedirs(media_dir, exist_ok=True)
             
-            # 处理文件名
-            safe_filename = filename.replace(' ', '_').replace('/', '_')
-            local_filename = f"anki_{safe_filename}"
-            local_path = os.path.join(media_dir, local_filename)
-            
-            # 解码并保存文件
-            with open(local_path, 'wb') as f:
-                f.write(base64.b64decode(file_content))
-            
-            return f"/static/images/{local_filename}"
+            return self._store_anki_media(filename, result.get("result"), kind)
             
         except Exception as e:
             print(f"处理Anki媒体文件失败: {e}")
             return None
     
+    def _store_anki_media(self, filename, file_content, kind):
+        """保存base64编码的Anki媒体文件，返回媒体URL"""
+        import base64
+        import os
+        
+        if not file_content:
+            return None
+        
+        media_dir = os.path.join("static", kind)
+        os.makedirs(media_dir, exist_ok=True)
+        
+        # 处理文件名
+        safe_filename = filename.replace(' ', '_').replace('/', '_')
+        local_filename = f"anki_{safe_filename}"
+        local_path = os.path.join(media_dir, local_filename)
+        
+        # 解码并保存文件
+        with open(local_path, 'wb') as f:
+            f.write(base64.b64decode(file_content))
+        
+        return media_url(kind, local_filename)
+    
     def generate_audio(self, word):
-        """使用pyttsx3生成单词发音音频文件"""
+        """使用pyttsx3生成单词发音音频文件
+        
+        合成由常驻TTS进程池完成，相同单词、语音和语速的音频只生成一次。
+        """
         try:
-            import pyttsx3
-            
-            # 初始化TTS引擎
-            engine = pyttsx3.init()
-            
-            # 设置语音属性
-            engine.setProperty('rate', 150)  # 语速
-            engine.setProperty('volume', 0.9)  # 音量
-            
-            # 尝试设置英语语音
-            voices = engine.getProperty('voices')
-            for voice in voices:
-                if 'english' in voice.name.lower() or 'en' in voice.id.lower():
-                    engine.setProperty('voice', voice.id)
-                    break
-            
-            # 创建音频目录
-            audio_dir = "static/audio"
-            os.makedirs(audio_dir, exist_ok=True)
-            
-            # 生成音频文件
-            audio_filename = f"{word.lower().replace(' ', '_')}.wav"
-            audio_path = os.path.join(audio_dir, audio_filename)
-            
-            # 保存音频到文件
-            engine.save_to_file(word, audio_path)
-            engine.runAndWait()
-            
-            # 返回音频文件的相对路径
-            return f"/static/audio/{audio_filename}"
-            
+            from .tts_service import get_tts_service
+            return get_tts_service().synthesize(word)
         except Exception as e:
             print(f"生成音频失败: {e}")
             return None
     
+    def generate_audio_batch(self, words):
+        """批量生成单词发音，返回{word: audio_url}"""
+        try:
+            from .tts_service import get_tts_service
+            return get_tts_service().synthesize_batch(words)
+        except Exception as e:
+            print(f"批量生成音频失败: {e}")
+            return {word: None for word in words}
+    
     def get_word_definition(self, word):
         """获取单词定义"""
-        prompt_template = PromptTemplate(
+        try:
+            return self._invoke_llm(self._definition_prompt(word))
+        except Exception as e:
+            print(f"获取单词定义失败: {e}")
+            return f"单词：{word}"
+    
+    def _definition_prompt(self, word):
+        """构造单词定义提示词"""
+        prompt_template = _prompt_template(
             input_variables=["word"],
             template="""
             请为英语单词 '{word}' 提供：
@@ -247,15 +294,251 @@ class LangChainService:
             例句：[英文例句]
             """
         )
+        return prompt_template.format(word=word)
+    
+    def enrich_words(self, words, batch_size=25, max_retries=2):
+        """批量获取单词定义和图片描述
+        
+        将多个单词打包进一次结构化输出请求，返回按单词索引的JSON，
+        校验后拆分结果，只对解析失败的单词重试。
+        
+        Args:
+            words: 单词列表
+            batch_size: 每次请求包含的单词数
+            max_retries: 解析失败单词的最大重试轮数
+            
+        Returns:
+            {word: {'definition': str, 'image_prompt': str}}
+        """
+        unique_words = list(dict.fromkeys(w for w in words if w))
+        results = {}
+        pending = []
+        
+        for word in unique_words:
+            cached = self.cache.get(self._enrich_cache_key(word))
+            if cached is not None:
+                results[word] = json.loads(cached)
+            else:
+                pending.append(word)
         
+        if not self.llm:
+            for word in pending:
+                results[word] = self._default_enrichment(word)
+            return results
+        
+        attempt = 0
+        while pending and attempt <= max_retries:
+            failed = []
+            for start in range(0, len(pending), batch_size):
+                batch = pending[start:start + batch_size]
+                parsed = self._invoke_enrich_batch(batch)
+                for word in batch:
+                    entry = self._validate_enrichment(parsed.get(word))
+                    if entry is None:
+                        failed.append(word)
+                        continue
+                    results[word] = entry
+                    self.cache.set(
+                        self._enrich_cache_key(word),
+                        json.dumps(entry, ensure_ascii=False),
+                        model=self.model_name
+                    )
+            pending = failed
+            attempt += 1
+        
+        for word in pending:
+            print(f"批量富化失败，使用默认内容: {word}")
+            results[word] = self._default_enrichment(word)
+        
+        return results
+    
+    def _invoke_enrich_batch(self, batch):
+        """发送一次批量请求并解析JSON，失败时返回空字典"""
+        prompt = self._build_enrich_prompt(batch)
         try:
-            prompt = prompt_template.format(word=word)
             response = self.llm.invoke(prompt)
-            # Gemini返回的是AIMessage对象，需要获取content
-            if hasattr(response, 'content'):
-                return response.content.strip()
-            else:
-                return str(response).strip()
         except Exception as e:
-            print(f"获取单词定义失败: {e}")
-            return f"单词：{word}"
\ No newline at end of file
+            print(f"批量富化请求失败: {e}")
+            return {}
+        
+        return self._parse_enrich_response(self._response_text(response))
+    
+    def _build_enrich_prompt(self, batch):
+        """构造批量结构化输出提示词"""
+        prompt_template = _prompt_template(
+            input_variables=["words"],
+            template="""
+            为下列每个英语单词提供学习资料，适合儿童学习使用。
+            只返回一个JSON对象，键为单词原文，值包含以下字段：
+            - meaning: 中文含义（简洁明了）
+            - part_of_speech: 词性
+            - example: 一个简单的英文例句
+            - image_prompt: 简单清晰的英文插图描述
+            
+            示例：{{"apple": {{"meaning": "苹果", "part_of_speech": "n.",
+            "example": "I eat an apple.", "image_prompt": "A red apple"}}}}
+            
+            WORDS: {words}
+            """
+        )
+        return prompt_template.format(
+            words=json.dumps(batch, ensure_ascii=False)
+        )
+    
+    def _parse_enrich_response(self, content):
+        """解析批量响应，兼容```json代码块包裹"""
+        text = content.strip()
+        if text.startswith('```'):
+            text = text.strip('`')
+            if text.startswith('json'):
+                text = text[4:]
+        
+        start = text.find('{')
+        end = text.rfind('}')
+        if start == -1 or end <= start:
+            return {}
+        
+        try:
+            data = json.loads(text[start:end + 1])
+        except ValueError as e:
+            print(f"解析批量响应失败: {e}")
+            return {}
+        
+        return data if isinstance(data, dict) else {}
+    
+    def _validate_enrichment(self, entry):
+        """校验单个单词的结果，合法时转换为定义和图片描述"""
+        if not isinstance(entry, dict):
+            return None
+        
+        for field in self.ENRICH_FIELDS:
+            value = entry.get(field)
+            if not isinstance(value, str) or not value.strip():
+                return None
+        
+        return {
+            'definition': (
+                f"含义：{entry['meaning'].strip()}\n"
+                f"词性：{entry['part_of_speech'].strip()}\n"
+                f"例句：{entry['example'].strip()}"
+            ),
+            'image_prompt': entry['image_prompt'].strip()
+        }
+    
+    def _enrich_cache_key(self, word):
+        """批量富化结果按单词缓存"""
+        return self.cache.make_key(
+            self.model_name, self.temperature, f"enrich:{word}"
+        )
+    
+    def _default_enrichment(self, word):
+        """LLM不可用或多次失败时的默认内容"""
+        return {
+            'definition': f"单词：{word}",
+            'image_prompt': f"A simple illustration of {word}"
+        }
+    
+    def is_default_enrichment(self, word, entry):
+        """判断富化结果是否只是默认内容"""
+        return entry == self._default_enrichment(word)
+    
+    def get_async_executor(self):
+        """获取当前事件循环对应的异步执行器
+        
+        每个后台任务（asyncio.run）使用新的事件循环，同一线程上旧循环的
+        执行器在替换时关闭；RPM/TPM配额由进程级共享的令牌桶统一限制。
+        """
+        loop = asyncio.get_running_loop()
+        state = self._async_state
+        if getattr(state, 'loop', None) is not loop:
+            previous = getattr(state, 'executor', None)
+            if previous is not None:
+                previous.close()
+            state.executor = AsyncLLMExecutor(self.llm)
+            state.loop = loop
+        return state.executor
+    
+    async def aenrich_words(self, words, batch_size=25, max_retries=2):
+        """enrich_words的异步版本，多个批次并发请求"""
+        unique_words = list(dict.fromkeys(w for w in words if w))
+        results = {}
+        pending = []
+        
+        for word in unique_words:
+            cached = self.cache.get(self._enrich_cache_key(word))
+            if cached is not None:
+                results[word] = json.loads(cached)
+            else:
+                pending.append(word)
+        
+        if not self.llm:
+            for word in pending:
+                results[word] = self._default_enrichment(word)
+            return results
+        
+        executor = self.get_async_executor()
+        attempt = 0
+        while pending and attempt <= max_retries:
+            batches = [
+                pending[start:start + batch_size]
+                for start in range(0, len(pending), batch_size)
+            ]
+            responses = await executor.map(
+                [self._build_enrich_prompt(batch) for batch in batches],
+                expected_output=80 * batch_size
+            )
+            failed = []
+            for batch, response in zip(batches, responses):
+                if isinstance(response, BaseException):
+                    print(f"批量富化请求失败: {response}")
+                    parsed = {}
+                else:
+                    parsed = self._parse_enrich_response(
+                        self._response_text(response)
+                    )
+                for word in batch:
+                    entry = self._validate_enrichment(parsed.get(word))
+                    if entry is None:
+                        failed.append(word)
+                        continue
+                    results[word] = entry
+                    self.cache.set(
+                        self._enrich_cache_key(word),
+                        json.dumps(entry, ensure_ascii=False),
+                        model=self.model_name
+                    )
+            pending = failed
+            attempt += 1
+        
+        for word in pending:
+            print(f"批量富化失败，使用默认内容: {word}")
+            results[word] = self._default_enrichment(word)
+        
+        return results
+    
+    async def aprocess_anki_media(self, anki, image_info, audio_info):
+        """并发处理一个单词的Anki图片和音频
+        
+        Args:
+            anki: AsyncAnkiConnectService，用于异步下载Anki媒体文件
+        
+        Returns:
+            (image_url, audio_url)
+        """
+        async def resolve(info, kind, process):
+            if not info:
+                return None
+            if info.get('type') != 'anki_media':
+                # 内联图片和网络地址只涉及本地处理
+                return process(info)
+            try:
+                content = await anki.aretrieve_media_file(info.get('data'))
+                return self._store_anki_media(info.get('data'), content, kind)
+            except Exception as e:
+                print(f"处理Anki媒体文件失败: {e}")
+                return None
+        
+        return tuple(await asyncio.gather(
+            resolve(image_info, 'images', self._process_anki_image),
+            resolve(audio_info, 'audio', self._process_anki_audio)
+        ))
@@ -0,0 +1,308 @@
+"""学习历史的增量统计
+
+推荐引擎分析的是最近30天（session_date >= 今天 - 30天）的学习会话，
+UserLearningStats.day_buckets按天保存这段时间的聚合量，
+固定WINDOW_DAYS + 1个槽位的环形数组，槽位由日期序号取模得出：
+- 每天的会话数、准确率/单词数/时长的次数与和
+- 当天最近5次会话的准确率，用于趋势回归
+- 当天按开始小时分桶的准确率之和与次数，用于最佳学习时间
+记录会话时只更新一个槽位（旧日期的槽位直接覆盖），分析时合并窗口内
+的槽位，结果与逐条扫描30天内的会话相同，耗时与历史长度无关。
+
+全部历史的Welford均值/方差、最近准确率和小时桶仍然同时维护，作为终身统计。
+"""
+
+import math
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from .models import LearningSession, UserLearningStats, db
+
+RECENT_ACCURACY_SIZE = 5
+
+# 分析窗口：今天及之前30天（与逐条查询时的session_date >= 今天 - 30天一致）
+WINDOW_DAYS = 30
+DAY_SLOTS = WINDOW_DAYS + 1
+
+DEFAULT_ANALYSIS = {
+    'total_sessions': 0,
+    'avg_accuracy': 0.8,
+    'avg_words_per_session': 10,
+    'avg_duration': 20,
+    'accuracy_trend': 0.0,
+    'learning_consistency': 0.5,
+    'optimal_time': {'hour': 14, 'preference': 0.7},
+}
+
+
+def default_analysis() -> Dict:
+    """新用户（没有学习记录）的默认分析结果"""
+    analysis = dict(DEFAULT_ANALYSIS)
+    analysis['optimal_time'] = dict(DEFAULT_ANALYSIS['optimal_time'])
+    return analysis
+
+
+def welford_update(count: int, mean: float, m2: float,
+                   value: float) -> Tuple[int, float, float]:
+    """加入一个样本，返回新的(count, mean, m2)"""
+    count += 1
+    delta = value - mean
+    mean += delta / count
+    m2 += delta * (value - mean)
+    return count, mean, m2
+
+
+def get_or_create_stats(user_id: str) -> UserLearningStats:
+    """获取用户统计行，不存在时创建（不提交）"""
+    stats = UserLearningStats.query.filter_by(user_id=user_id).first()
+    if stats is None:
+        stats = UserLearningStats(
+            user_id=user_id,
+            session_count=0,
+            accuracy_count=0, accuracy_mean=0.0, accuracy_m2=0.0,
+            words_count=0, words_mean=0.0,
+            duration_count=0, duration_mean=0.0,
+            recent_accuracies=[],
+            interval_count=0, interval_mean=0.0, interval_m2=0.0,
+            hour_buckets={}, day_buckets=[None] * DAY_SLOTS
+        )
+        db.session.add(stats)
+    return stats
+
+
+def session_data_from(session: LearningSession) -> Dict:
+    """从学习会话中取出统计需要的字段"""
+    return {
+        'accuracy_rate': session.accuracy_rate,
+        'total_words': session.total_words,
+        'duration_minutes': session.duration_minutes,
+        'session_date': session.session_date,
+        'start_time': session.start_time,
+    }
+
+
+def record_session(stats: UserLearningStats, session_data: Dict) -> None:
+    """把一次学习会话计入统计"""
+    accuracy = session_data.get('accuracy_rate') or 0.0
+    total_words = session_data.get('total_words') or 0
+    duration = session_data.get('duration_minutes') or 0
+
+    stats.session_count += 1
+
+    if accuracy > 0:
+        (stats.accuracy_count, stats.accuracy_mean,
+         stats.accuracy_m2) = welford_update(
+            stats.accuracy_count, stats.accuracy_mean, stats.accuracy_m2,
+            accuracy
+        )
+    if total_words > 0:
+        stats.words_count, stats.words_mean, _ = welford_update(
+            stats.words_count, stats.words_mean, 0.0, total_words
+        )
+    if duration > 0:
+        stats.duration_count, stats.duration_mean, _ = welford_update(
+            stats.duration_count, stats.duration_mean, 0.0, duration
+        )
+
+    # JSON列需要整体赋值才会被标记为已修改
+    stats.recent_accuracies = (
+        [accuracy] + list(stats.recent_accuracies or [])
+    )[:RECENT_ACCURACY_SIZE]
+
+    session_date = _as_date(session_data.get('session_date'))
+    if session_date is not None:
+        if stats.last_session_date is not None:
+            interval = abs((session_date - stats.last_session_date).days)
+            (stats.interval_count, stats.interval_mean,
+             stats.interval_m2) = welford_update(
+                stats.interval_count, stats.interval_mean,
+                stats.interval_m2, interval
+            )
+        stats.last_session_date = session_date
+
+    start_time = session_data.get('start_time')
+    if isinstance(start_time, datetime) and accuracy > 0:
+        buckets = dict(stats.hour_buckets or {})
+        total, count = buckets.get(str(start_time.hour), (0.0, 0))
+        buckets[str(start_time.hour)] = [total + accuracy, count + 1]
+        stats.hour_buckets = buckets
+
+    if session_date is not None:
+        _record_day(stats, session_date, accuracy, total_words, duration,
+                    start_time)
+
+
+def _record_day(stats: UserLearningStats, session_date: date,
+                accuracy: float, total_words: int, duration: int,
+                start_time) -> None:
+    """把会话计入所在日期的槽位"""
+    slots = list(stats.day_buckets or [None] * DAY_SLOTS)
+    index = session_date.toordinal() % DAY_SLOTS
+    ordinal = session_date.toordinal()
+    bucket = slots[index]
+
+    if bucket is not None and bucket['day'] > ordinal:
+        # 槽位已被更晚的日期占用，该会话早已超出分析窗口
+        return
+    if bucket is None or bucket['day'] < ordinal:
+        bucket = {'day': ordinal, 'sessions': 0, 'accuracy': [0, 0.0],
+                  'words': [0, 0], 'duration': [0, 0], 'recent': [],
+                  'hours': {}}
+    else:
+        bucket = dict(bucket)
+
+    bucket['sessions'] += 1
+    for key, value in (('accuracy', accuracy), ('words', total_words),
+                       ('duration', duration)):
+        if value > 0:
+            count, total = bucket[key]
+            bucket[key] = [count + 1, total + value]
+    bucket['recent'] = ([accuracy] + bucket['recent'])[:RECENT_ACCURACY_SIZE]
+    if isinstance(start_time, datetime) and accuracy > 0:
+        # 最近用到的小时排在最前，准确率相同时与逐条扫描的先后顺序一致
+        hour = str(start_time.hour)
+        total, count = bucket['hours'].get(hour, (0.0, 0))
+        bucket['hours'] = {
+            hour: [total + accuracy, count + 1],
+            **{h: v for h, v in bucket['hours'].items() if h != hour}
+        }
+
+    # JSON列需要整体赋值才会被标记为已修改
+    slots[index] = bucket
+    stats.day_buckets = slots
+
+
+def window_buckets(day_buckets: Optional[List],
+                   today: date = None) -> List[Dict]:
+    """分析窗口内的日槽位，按日期从新到旧排列"""
+    today = today or datetime.utcnow().date()
+    cutoff = (today - timedelta(days=WINDOW_DAYS)).toordinal()
+    return sorted(
+        (bucket for bucket in (day_buckets or ())
+         if bucket is not None and bucket['day'] >= cutoff),
+        key=lambda bucket: bucket['day'], reverse=True
+    )
+
+
+def analyze(stats: Optional[UserLearningStats], today: date = None) -> Dict:
+    """由统计行得出推荐引擎使用的学习分析（最近30天）"""
+    if stats is None:
+        return default_analysis()
+    return analyze_buckets(stats.day_buckets, today)
+
+
+def analyze_buckets(day_buckets: Optional[List], today: date = None) -> Dict:
+    """由日槽位得出学习分析，窗口内没有会话时返回默认分析"""
+    buckets = window_buckets(day_buckets, today)
+    total_sessions = sum(bucket['sessions'] for bucket in buckets)
+    if not total_sessions:
+        return default_analysis()
+
+    def average(key):
+        count = sum(bucket[key][0] for bucket in buckets)
+        total = sum(bucket[key][1] for bucket in buckets)
+        return total / count if count else None
+
+    avg_accuracy = average('accuracy')
+    avg_words = average('words')
+    avg_duration = average('duration')
+    return {
+        'total_sessions': total_sessions,
+        'avg_accuracy': (DEFAULT_ANALYSIS['avg_accuracy']
+                         if avg_accuracy is None else avg_accuracy),
+        'avg_words_per_session': (
+            DEFAULT_ANALYSIS['avg_words_per_session']
+            if avg_words is None else avg_words
+        ),
+        'avg_duration': (DEFAULT_ANALYSIS['avg_duration']
+                         if avg_duration is None else avg_duration),
+        'accuracy_trend': accuracy_trend(buckets, total_sessions),
+        'learning_consistency': learning_consistency(buckets,
+                                                     total_sessions),
+        'optimal_time': optimal_time(buckets),
+    }
+
+
+def accuracy_trend(buckets: List[Dict], total_sessions: int) -> float:
+    """最近5次会话准确率的线性回归斜率（横轴0为最近一次）"""
+    if total_sessions < 3:
+        return 0.0
+
+    recent = [accuracy for bucket in buckets
+              for accuracy in bucket['recent']][:RECENT_ACCURACY_SIZE]
+    y = [a for a in recent if a > 0]
+    n = len(y)
+    if n < 2:
+        return 0.0
+
+    sum_x = n * (n - 1) / 2
+    sum_x2 = (n - 1) * n * (2 * n - 1) / 6
+    sum_y = sum(y)
+    sum_xy = sum(i * value for i, value in enumerate(y))
+
+    denominator = n * sum_x2 - sum_x ** 2
+    if denominator == 0:
+        return 0.0
+    return (n * sum_xy - sum_x * sum_y) / denominator
+
+
+def learning_consistency(buckets: List[Dict], total_sessions: int) -> float:
+    """学习一致性 = 1 - 间隔标准差 / 间隔均值
+
+    会话按日期排序后相邻两次的间隔（天）：同一天的k次会话贡献k-1个0，
+    相邻的学习日之间贡献日期差，不需要逐条会话。
+    """
+    if total_sessions < 2:
+        return 0.5
+
+    same_day = total_sessions - len(buckets)
+    gaps = [newer['day'] - older['day']
+            for newer, older in zip(buckets, buckets[1:])]
+    count = same_day + len(gaps)
+    mean = sum(gaps) / count
+    if mean == 0:
+        return 1.0
+
+    std_interval = 0.0
+    if count > 1:
+        squared = sum((gap - mean) ** 2 for gap in gaps) + same_day * mean ** 2
+        std_interval = math.sqrt(squared / (count - 1))
+    consistency = 1.0 - min(1.0, std_interval / mean)
+    return max(0.0, consistency)
+
+
+def optimal_time(buckets: List[Dict]) -> Dict:
+    """平均准确率最高的学习小时"""
+    hours: Dict[str, List[float]] = {}
+    for bucket in buckets:
+        for hour, (total, count) in bucket['hours'].items():
+            merged = hours.setdefault(hour, [0.0, 0])
+            merged[0] += total
+            merged[1] += count
+
+    best_hour = 14
+    best_performance = 0.0
+    for hour, (total, count) in hours.items():
+        if not count:
+            continue
+        avg_accuracy = total / count
+        if avg_accuracy > best_performance:
+            best_performance = avg_accuracy
+            best_hour = int(hour)
+
+    if best_performance == 0.0:
+        return default_analysis()['optimal_time']
+    return {
+        'hour': best_hour,
+        'preference': min(1.0, best_performance)
+    }
+
+
+def _as_date(value) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    return None
@@ -0,0 +1,209 @@
+"""LLM异步并发执行器
+
+基于asyncio和ainvoke并发调用LLM：
+- 信号量限制同时进行的请求数
+- 令牌桶分别限制每分钟请求数(RPM)和每分钟token数(TPM)，
+  令牌桶为进程级共享，所有线程和事件循环上的执行器共同受同一配额约束
+- 遇到限流错误时按带抖动的指数退避重试
+- 执行器被替换或进程退出时取消所有未完成的请求
+"""
+
+import asyncio
+import atexit
+import os
+import random
+import threading
+import time
+import weakref
+from typing import Any, List, Optional, Tuple
+
+
+class TokenBucket:
+    """线程安全的令牌桶，可在多个线程的事件循环中共享"""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self.updated_at
+        self.tokens = min(
+            self.capacity, self.tokens + elapsed * self.refill_per_second
+        )
+        self.updated_at = now
+
+    def _try_take(self, amount: float) -> float:
+        """尝试取出令牌，成功返回0，否则返回需要等待的秒数"""
+        with self._lock:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return 0.0
+            return (amount - self.tokens) / self.refill_per_second
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        """获取指定数量的令牌，不足时等待补充"""
+        # 单次请求超过桶容量时按容量计，避免永远等待
+        amount = min(float(amount), self.capacity)
+        while True:
+            wait = self._try_take(amount)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+_rate_limiters = None
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiters() -> Tuple[TokenBucket, TokenBucket]:
+    """获取进程级共享的(RPM令牌桶, TPM令牌桶)"""
+    global _rate_limiters
+    if _rate_limiters is None:
+        with _rate_limiters_lock:
+            if _rate_limiters is None:
+                rpm = int(os.getenv('LLM_REQUESTS_PER_MINUTE', 60))
+                tpm = int(os.getenv('LLM_TOKENS_PER_MINUTE', 100000))
+                _rate_limiters = (
+                    TokenBucket(rpm, rpm / 60.0),
+                    TokenBucket(tpm, tpm / 60.0),
+                )
+    return _rate_limiters
+
+
+# 所有存活的执行器，进程退出时统一关闭
+_executors = weakref.WeakSet()
+_executors_lock = threading.Lock()
+_atexit_registered = False
+
+
+def _track_executor(executor) -> None:
+    global _atexit_registered
+    with _executors_lock:
+        _executors.add(executor)
+        if not _atexit_registered:
+            atexit.register(close_all_executors)
+            _atexit_registered = True
+
+
+def close_all_executors() -> None:
+    """关闭所有执行器并取消进行中的请求"""
+    with _executors_lock:
+        executors = list(_executors)
+    for executor in executors:
+        executor.close()
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """判断异常是否为限流错误（HTTP 429 / ResourceExhausted）"""
+    name = type(error).__name__.lower()
+    message = str(error).lower()
+    return (
+        'ratelimit' in name
+        or 'resourceexhausted' in name
+        or '429' in message
+        or 'rate limit' in message
+        or 'quota' in message
+    )
+
+
+class AsyncLLMExecutor:
+    """带并发限制和限流的LLM异步执行器"""
+
+    def __init__(self, llm, max_concurrency: int = None,
+                 requests_per_minute: Optional[int] = None,
+                 tokens_per_minute: Optional[int] = None,
+                 max_retries: int = 5, base_delay: float = 1.0,
+                 max_delay: float = 30.0):
+        self.llm = llm
+        self.max_concurrency = max_concurrency or int(
+            os.getenv('LLM_MAX_CONCURRENCY', 8)
+        )
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        # 并发数按事件循环限制；配额默认使用进程级共享的令牌桶，
+        # 显式传入RPM/TPM时使用独立的令牌桶（例如测试）
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        request_bucket, token_bucket = get_rate_limiters()
+        if requests_per_minute:
+            request_bucket = TokenBucket(
+                requests_per_minute, requests_per_minute / 60.0
+            )
+        if tokens_per_minute:
+            token_bucket = TokenBucket(
+                tokens_per_minute, tokens_per_minute / 60.0
+            )
+        self._request_bucket = request_bucket
+        self._token_bucket = token_bucket
+        self._tasks = set()
+        self._closed = False
+        _track_executor(self)
+
+        self.retries = 0
+        self.completed = 0
+
+    @staticmethod
+    def estimate_tokens(prompt: str, expected_output: int = 256) -> int:
+        """粗略估算一次请求消耗的token数（约4个字符1个token）"""
+        return len(prompt) // 4 + expected_output
+
+    async def run(self, prompt: str, expected_output: int = 256) -> Any:
+        """执行单个请求，限流错误时带抖动重试"""
+        if self._closed:
+            raise RuntimeError('AsyncLLMExecutor已关闭')
+
+        task = asyncio.current_task()
+        if task is not None:
+            self._tasks.add(task)
+        try:
+            attempt = 0
+            while True:
+                await self._request_bucket.acquire(1)
+                await self._token_bucket.acquire(
+                    self.estimate_tokens(prompt, expected_output)
+                )
+                try:
+                    async with self._semaphore:
+                        response = await self.llm.ainvoke(prompt)
+                    self.completed += 1
+                    return response
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    if (not is_rate_limit_error(e)
+                            or attempt >= self.max_retries):
+                        raise
+                    # 全抖动指数退避
+                    delay = random.uniform(
+                        0, min(self.max_delay, self.base_delay * 2 ** attempt)
+                    )
+                    attempt += 1
+                    self.retries += 1
+                    await asyncio.sleep(delay)
+        finally:
+            if task is not None:
+                self._tasks.discard(task)
+
+    async def map(self, prompts: List[str],
+                  expected_output: int = 256) -> List[Any]:
+        """并发执行多个请求，结果顺序与输入一致，失败项为异常对象"""
+        tasks = [
+            asyncio.ensure_future(self.run(prompt, expected_output))
+            for prompt in prompts
+        ]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    def close(self) -> None:
+        """同步关闭：停止接收新请求，并在各自的事件循环中取消进行中的请求"""
+        self._closed = True
+        for task in list(self._tasks):
+            loop = task.get_loop()
+            if not task.done() and not loop.is_closed():
+                loop.call_soon_threadsafe(task.cancel)
+        self._tasks.clear()
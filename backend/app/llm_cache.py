@@ -0,0 +1,240 @@
+"""LLM响应持久化缓存
+
+两级缓存：进程内LRU作为前端层，SQLite作为持久层。
+缓存键由模型名、温度和规范化后的提示词哈希组成，
+命中时无需再次调用Gemini，并且在进程重启后依然有效。
+
+命中时只在内存中记录访问时间，积累到一定数量或间隔后批量写回SQLite，
+读路径不再每次提交事务。条目数在进程内累计，超过上限时才用COUNT(*)
+校准，并一次淘汰到低水位，避免每次写入都统计全表。
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+# 访问时间批量写回的条数和最长间隔（秒）
+ACCESS_FLUSH_BATCH = 64
+ACCESS_FLUSH_INTERVAL = 30.0
+# 超过上限时淘汰到max_entries的该比例，下次校准前可以再写入一批
+EVICT_LOW_WATER = 0.9
+
+
+class LLMResponseCache:
+    """LLM响应缓存（内存LRU + SQLite）"""
+
+    def __init__(self, path: str = None, ttl_seconds: int = None,
+                 max_entries: int = None, memory_entries: int = None):
+        self.path = path or os.getenv('LLM_CACHE_PATH', 'llm_cache.db')
+        self.ttl_seconds = (
+            ttl_seconds if ttl_seconds is not None
+            else int(os.getenv('LLM_CACHE_TTL', 30 * 24 * 3600))
+        )
+        self.max_entries = (
+            max_entries if max_entries is not None
+            else int(os.getenv('LLM_CACHE_MAX_ENTRIES', 50000))
+        )
+        self.memory_entries = (
+            memory_entries if memory_entries is not None
+            else int(os.getenv('LLM_CACHE_MEMORY_ENTRIES', 1024))
+        )
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> (value, expires_at)
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._pending_access: Dict[str, float] = {}
+        self._last_access_flush = time.time()
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_llm_cache_access '
+            'ON llm_cache (last_access)'
+        )
+        self._conn.commit()
+        # 持久层条目数：启动时统计一次，之后随写入和删除累计
+        self._count = self._conn.execute(
+            'SELECT COUNT(*) FROM llm_cache'
+        ).fetchone()[0]
+
+    @staticmethod
+    def normalize_prompt(prompt: str) -> str:
+        """规范化提示词：去掉缩进和多余空白，避免格式差异导致缓存失效"""
+        return ' '.join(prompt.split())
+
+    @classmethod
+    def make_key(cls, model: str, temperature: float, prompt: str) -> str:
+        """根据模型、温度和提示词生成缓存键"""
+        digest = hashlib.sha256(
+            cls.normalize_prompt(prompt).encode('utf-8')
+        ).hexdigest()
+        return f"{model}:{float(temperature):.3f}:{digest}"
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存，未命中或已过期返回None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._touch(key, now)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return value
+                del self._memory[key]
+
+            row = self._conn.execute(
+                'SELECT value, expires_at FROM llm_cache WHERE key = ?',
+                (key,)
+            ).fetchone()
+
+            if row is None or row[1] <= now:
+                if row is not None:
+                    self._count -= self._conn.execute(
+                        'DELETE FROM llm_cache WHERE key = ?', (key,)
+                    ).rowcount
+                    self._pending_access.pop(key, None)
+                    self._conn.commit()
+                self.misses += 1
+                return None
+
+            value, expires_at = row
+            self._touch(key, now)
+            self._remember(key, value, expires_at)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: str, model: str = '') -> None:
+        """写入缓存，超出容量时按最近访问时间淘汰"""
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._pending_access.pop(key, None)
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_cache
+                    (key, model, value, created_at, expires_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (key, model, value, now, expires_at, now)
+            )
+            # 覆盖已有键时计数偏大，超过上限时会用COUNT(*)校准
+            self._count += 1
+            self._evict_if_needed(now)
+            self._conn.commit()
+            self._remember(key, value, expires_at)
+
+    def _remember(self, key: str, value: str, expires_at: float) -> None:
+        """写入内存LRU层"""
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _touch(self, key: str, now: float) -> None:
+        """记录命中的访问时间，攒够一批或超过间隔时写回持久层"""
+        self._pending_access[key] = now
+        if (len(self._pending_access) >= ACCESS_FLUSH_BATCH
+                or now - self._last_access_flush >= ACCESS_FLUSH_INTERVAL):
+            self._flush_access(now)
+            self._conn.commit()
+
+    def _flush_access(self, now: float) -> None:
+        """批量写回访问时间（不提交事务）"""
+        if self._pending_access:
+            self._conn.executemany(
+                'UPDATE llm_cache SET last_access = ? WHERE key = ?',
+                [(at, key) for key, at in self._pending_access.items()]
+            )
+            self._pending_access.clear()
+        self._last_access_flush = now
+
+    def _evict_if_needed(self, now: float) -> None:
+        """累计条数超过max_entries时清理过期条目，并淘汰到低水位"""
+        if self._count <= self.max_entries:
+            return
+
+        # 其他进程也可能写入同一个文件，淘汰前用真实条数校准
+        self._flush_access(now)
+        self._conn.execute(
+            'DELETE FROM llm_cache WHERE expires_at <= ?', (now,)
+        )
+        self._count = self._conn.execute(
+            'SELECT COUNT(*) FROM llm_cache'
+        ).fetchone()[0]
+        if self._count <= self.max_entries:
+            return
+
+        overflow = self._count - int(self.max_entries * EVICT_LOW_WATER)
+        if overflow > 0:
+            self._conn.execute(
+                """
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache
+                    ORDER BY last_access ASC LIMIT ?
+                )
+                """,
+                (overflow,)
+            )
+            self._count -= overflow
+            self.evictions += overflow
+
+    def clear(self) -> None:
+        """清空全部缓存"""
+        with self._lock:
+            self._memory.clear()
+            self._pending_access.clear()
+            self._conn.execute('DELETE FROM llm_cache')
+            self._conn.commit()
+            self._count = 0
+
+    def stats(self) -> Dict:
+        """获取命中统计"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'memory_hits': self.memory_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'memory_entries': len(self._memory),
+                'persisted_entries': self._count,
+                'pending_access_updates': len(self._pending_access)
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """获取进程级共享的LLM缓存实例"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMResponseCache()
+    return _cache
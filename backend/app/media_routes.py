@@ -0,0 +1,90 @@
+"""媒体文件服务
+
+为static/audio和static/images下的媒体文件提供专用端点：
+- 内容哈希命名的文件使用强ETag并设置Cache-Control: immutable
+- 支持If-None-Match条件请求和HTTP Range（音频拖动）
+- 客户端接受压缩时优先返回预压缩的.br/.gz文件
+- 文件内容交给WSGI服务器的file_wrapper/X-Sendfile发送，不经过Python复制
+"""
+
+import mimetypes
+import os
+import re
+
+from flask import Blueprint, abort, current_app, request, send_file
+from werkzeug.security import safe_join
+
+media = Blueprint('media', __name__, url_prefix='/media')
+
+MEDIA_KINDS = ('audio', 'images')
+
+# 由本项目写入、内容不会原地改变的文件名：媒体存储的内容哈希文件
+# （3f2a...e1.png）、TTS缓存（tts_83837b393da52927.wav）和占位图
+# （placeholder_...svg）。Anki同步的anki_*文件沿用Anki的文件名，
+# 可能被原地覆盖，即使文件名是十六进制也不能当作不可变
+HASHED_FILENAME = re.compile(
+    r'^(?:tts_|placeholder_)?(?P<hash>[0-9a-f]{16,64})\.\w+$'
+)
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+PRECOMPRESSED_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _media_directory(kind):
+    return os.path.join(current_app.static_folder, kind)
+
+
+def _pick_precompressed(path):
+    """根据Accept-Encoding选择已存在的预压缩文件"""
+    accepted = request.accept_encodings
+    for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+        if accepted[encoding] and os.path.isfile(path + suffix):
+            return path + suffix, encoding
+    return path, None
+
+
+@media.route('/<kind>/<path:filename>', methods=['GET', 'HEAD'])
+def serve_media(kind, filename):
+    """发送媒体文件"""
+    if kind not in MEDIA_KINDS:
+        abort(404)
+
+    path = safe_join(_media_directory(kind), filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    send_path, encoding = _pick_precompressed(path)
+
+    match = HASHED_FILENAME.match(filename)
+    if match:
+        # 文件名即内容哈希，ETag稳定且内容永不变化
+        etag = match.group('hash')
+        if encoding:
+            etag = f"{etag}-{encoding}"
+        max_age = IMMUTABLE_MAX_AGE
+    else:
+        # 非哈希命名的文件（如anki_*.mp3）可能被覆盖，交给werkzeug生成ETag
+        etag = True
+        max_age = None
+
+    response = send_file(
+        send_path,
+        mimetype=mimetype,
+        conditional=True,
+        etag=etag,
+        max_age=max_age
+    )
+
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+
+    if match:
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+
+    return response
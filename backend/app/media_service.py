@@ -0,0 +1,103 @@
+"""单词媒体按需生成服务
+
+单词的图片和音频不再在同步时预先生成，而是在第一次被请求时生成。
+同一单词同一媒体类型的并发请求通过singleflight合并为一次生成，
+生成结果写回Word表，之后的请求直接读取。
+"""
+
+import asyncio
+from typing import Optional
+
+from .data_version import WORDS, bump_data_version
+from .models import Word, db
+from .singleflight import SingleFlight
+
+MEDIA_KINDS = {
+    'audio': 'audio_url',
+    'image': 'image_url',
+}
+
+_flights = SingleFlight()
+
+
+class MediaService:
+    """单词媒体按需生成"""
+
+    def resolve_media(self, word: Word, kind: str) -> Optional[str]:
+        """获取单词媒体URL，不存在时生成
+
+        Args:
+            word: 单词对象
+            kind: audio 或 image
+
+        Returns:
+            媒体URL，生成失败返回None
+        """
+        column = MEDIA_KINDS[kind]
+        current = getattr(word, column)
+        if current:
+            return current
+
+        url, _ = _flights.do(
+            f"{kind}:{word.id}", self._generate_and_store,
+            word.id, word.word, kind
+        )
+        return url
+
+    def _generate_and_store(self, word_id: int, text: str,
+                            kind: str) -> Optional[str]:
+        """生成媒体并写回数据库（每个key同一时刻只有一个调用者执行）"""
+        column = MEDIA_KINDS[kind]
+        # 其他进程或前一次调用可能已经生成
+        stored = db.session.query(
+            getattr(Word, column)
+        ).filter(Word.id == word_id).scalar()
+        if stored:
+            return stored
+
+        url = self._generate(text, kind)
+        if url:
+            Word.query.filter_by(id=word_id).update(
+                {column: url}, synchronize_session=False
+            )
+            bump_data_version(WORDS)
+            db.session.commit()
+
+        return url
+
+    @staticmethod
+    def _generate(text: str, kind: str) -> Optional[str]:
+        """生成媒体文件（不访问数据库）"""
+        from .langchain_service import get_langchain_service
+
+        service = get_langchain_service()
+        if kind == 'audio':
+            return service.generate_audio(text)
+        return service.generate_image(text, None)
+
+    async def aresolve_media(self, word: Word, kind: str) -> Optional[str]:
+        """resolve_media的异步版本
+
+        生成在线程中执行，并与同步路径使用同一个singleflight key，
+        同一单词同一媒体类型的并发请求只生成一次；数据库写回留在请求线程，
+        只更新仍为空的字段（结果可能已由同步路径的调用者写入）。
+        """
+        column = MEDIA_KINDS[kind]
+        current = getattr(word, column)
+        if current:
+            return current
+
+        url, _ = await asyncio.to_thread(
+            _flights.do, f"{kind}:{word.id}", self._generate, word.word, kind
+        )
+
+        if url:
+            field = getattr(Word, column)
+            updated = Word.query.filter(
+                Word.id == word.id, db.or_(field.is_(None), field == '')
+            ).update({column: url}, synchronize_session=False)
+            if updated:
+                bump_data_version(WORDS)
+                db.session.commit()
+
+        return url
@@ -0,0 +1,146 @@
+"""本地媒体存储
+
+将媒体内容按内容哈希写入static目录，返回短URL。
+相同内容只保存一份，文件名随内容变化，因此可以被长期缓存。
+"""
+
+import base64
+import binascii
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from typing import Optional, Tuple
+from urllib.parse import unquote_to_bytes
+
+MEDIA_ROOT = 'static'
+
+DATA_URI_PATTERN = re.compile(
+    r'^data:(?P<mime>[\w.+-]+/[\w.+-]+)?(?P<params>(;[^;,]*)*?)'
+    r'(?P<base64>;base64)?,(?P<data>.*)$',
+    re.S
+)
+
+MIME_EXTENSIONS = {
+    'image/png': 'png',
+    'image/jpeg': 'jpg',
+    'image/jpg': 'jpg',
+    'image/gif': 'gif',
+    'image/webp': 'webp',
+    'image/bmp': 'bmp',
+    'image/svg+xml': 'svg',
+    'image/avif': 'avif',
+    'image/tiff': 'tif',
+    'image/x-icon': 'ico',
+    'image/vnd.microsoft.icon': 'ico',
+    'audio/wav': 'wav',
+    'audio/x-wav': 'wav',
+    'audio/mpeg': 'mp3',
+    'audio/ogg': 'ogg',
+}
+
+# 不在上表中的MIME类型按mimetypes推断扩展名，仍无法推断时使用此扩展名
+FALLBACK_EXTENSION = 'bin'
+
+# 文本类媒体额外保存gzip预压缩版本，由媒体端点按Accept-Encoding返回
+PRECOMPRESS_EXTENSIONS = {'svg'}
+
+
+def is_data_uri(value) -> bool:
+    """判断是否为内联data URI"""
+    return isinstance(value, str) and value.startswith('data:')
+
+
+def decode_data_uri(uri: str) -> Optional[Tuple[bytes, str]]:
+    """解码data URI
+
+    Returns:
+        (文件内容, 扩展名)，格式错误无法解码时返回None；
+        未知的MIME类型不会丢弃，按推断的扩展名或.bin保存
+    """
+    match = DATA_URI_PATTERN.match(uri.strip())
+    if not match:
+        return None
+
+    mime = (match.group('mime') or 'text/plain').lower()
+    extension = MIME_EXTENSIONS.get(mime) or _guess_extension(mime)
+
+    data = match.group('data')
+    try:
+        if match.group('base64'):
+            content = base64.b64decode(
+                ''.join(data.split()), validate=True
+            )
+        else:
+            content = unquote_to_bytes(data)
+    except (binascii.Error, ValueError):
+        return None
+
+    return content, extension
+
+
+def _guess_extension(mime: str) -> str:
+    guessed = mimetypes.guess_extension(mime)
+    return guessed.lstrip('.') if guessed else FALLBACK_EXTENSION
+
+
+def content_filename(content: bytes, extension: str) -> str:
+    """根据内容哈希生成文件名"""
+    digest = hashlib.sha256(content).hexdigest()[:32]
+    return f"{digest}.{extension}"
+
+
+def save_bytes(content: bytes, kind: str, extension: str,
+               filename: str = None) -> str:
+    """按内容哈希保存文件，已存在时直接复用
+
+    Args:
+        content: 文件内容
+        kind: 媒体类型目录，images或audio
+        extension: 文件扩展名
+        filename: 调用方已确定的哈希文件名，默认使用内容哈希
+
+    Returns:
+        媒体文件URL
+    """
+    directory = os.path.join(MEDIA_ROOT, kind)
+    os.makedirs(directory, exist_ok=True)
+
+    filename = filename or content_filename(content, extension)
+    path = os.path.join(directory, filename)
+    if not os.path.exists(path):
+        # 先写预压缩版本，保证原文件出现时.gz已就绪
+        if extension in PRECOMPRESS_EXTENSIONS:
+            _write_atomic(
+                f"{path}.gz",
+                gzip.compress(content, compresslevel=9, mtime=0)
+            )
+        _write_atomic(path, content)
+
+    return media_url(kind, filename)
+
+
+def _write_atomic(path: str, content: bytes) -> None:
+    """写临时文件后原子替换，避免读到写了一半的文件"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def media_url(kind: str, filename: str) -> str:
+    """媒体文件的访问URL，由media蓝图提供缓存友好的发送"""
+    return f"/media/{kind}/{filename}"
+
+
+def externalize_data_uri(uri: str, kind: str = 'images') -> Optional[str]:
+    """把内联data URI写入媒体存储并返回短URL
+
+    无法解码时返回None，调用方应保留原值而不是丢弃数据。
+    """
+    decoded = decode_data_uri(uri)
+    if decoded is None:
+        return None
+    content, extension = decoded
+    return save_bytes(content, kind, extension)
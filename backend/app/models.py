@@ -1,5 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 from datetime import datetime
+from .media_store import is_data_uri, externalize_data_uri
 
 db = SQLAlchemy()
 
@@ -25,33 +28,59 @@ class Word(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow,
                             onupdate=datetime.utcnow)
     
-    def to_dict(self):
-        """转换为字典格式"""
-        return {
-            'id': self.id,
-            'anki_card_id': self.anki_card_id,
-            'word': self.word,
-            'meaning': self.meaning,
-            'deck_name': self.deck_name,
-            'image_url': self.image_url,
-            'audio_url': self.audio_url,
-            'phonetic': self.phonetic,
-            'etymology': self.etymology,
-            'exam_frequency': self.exam_frequency,
-            'star_level': self.star_level,
-            'example_sentence': self.example_sentence,
-            'example_translation': self.example_translation,
-            'related_words': self.related_words,
-            'created_at': (self.created_at.isoformat()
-                            if self.created_at else None),
-            'updated_at': (self.updated_at.isoformat()
-                            if self.updated_at else None)
-        }
+    # to_dict可输出的字段（按输出顺序）
+    SERIALIZABLE_FIELDS = (
+        'id', 'anki_card_id', 'word', 'meaning', 'deck_name',
+        'image_url', 'audio_url', 'phonetic', 'etymology',
+        'exam_frequency', 'star_level', 'example_sentence',
+        'example_translation', 'related_words', 'created_at', 'updated_at'
+    )
+    
+    def to_dict(self, fields=None):
+        """转换为字典格式
+        
+        Args:
+            fields: 只输出指定字段（列表视图投影），默认输出全部字段
+        """
+        data = {}
+        for name in fields or self.SERIALIZABLE_FIELDS:
+            if name == 'image_url':
+                data[name] = self._media_url('image')
+            elif name == 'audio_url':
+                data[name] = self._media_url('audio')
+            elif name in ('created_at', 'updated_at'):
+                value = getattr(self, name)
+                data[name] = value.isoformat() if value else None
+            else:
+                data[name] = getattr(self, name)
+        return data
+    
+    def _media_url(self, kind):
+        """媒体URL，尚未生成时返回按需生成地址"""
+        url = self.image_url if kind == 'image' else self.audio_url
+        if url or self.id is None:
+            return url
+        return f"/api/words/{self.id}/media/{kind}"
     
     def __repr__(self):
         return f'<Word {self.word}>'
 
 
+@event.listens_for(Session, 'before_flush')
+def externalize_inline_images(session, flush_context, instances):
+    """写入前把单词的内联data URI图片外置到媒体存储，数据库只保存短URL
+    
+    只在flush时处理新增和修改的单词；无法解码的data URI保留原值，不丢弃数据。
+    """
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Word) and is_data_uri(obj.image_url):
+            url = externalize_data_uri(obj.image_url, 'images')
+            if url is None:
+                print(f"无法解码内联图片，保留原值: {obj.word}")
+            else:
+                obj.image_url = url
+
+
 class PracticeSession(db.Model):
     """练习会话模型"""
     id = db.Column(db.Integer, primary_key=True)
@@ -218,6 +247,8 @@ class DailyPracticeRecommendation(db.Model):
     # 推荐理由
     reasoning = db.Column(db.Text)
     confidence_level = db.Column(db.Float, default=0.8)
+    # 计算时用户画像的数据版本，与当前版本一致时可直接复用
+    profile_version = db.Column(db.Integer)
     
     # 执行状态
     is_accepted = db.Column(db.Boolean, default=None)
@@ -228,8 +259,10 @@ class DailyPracticeRecommendation(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow,
                            onupdate=datetime.utcnow)
     
-    # 添加复合索引
-    __table_args__ = (db.Index('idx_user_date', 'user_id', 'date'),)
+    # 每个用户每天只有一条推荐
+    __table_args__ = (
+        db.Index('idx_user_date', 'user_id', 'date', unique=True),
+    )
     
     def to_dict(self):
         """转换为字典格式"""
@@ -343,4 +376,206 @@ class LearningSession(db.Model):
         }
     
     def __repr__(self):
-        return f'<LearningSession {self.user_id} {self.session_date}>'
\ No newline at end of file
+        return f'<LearningSession {self.user_id} {self.session_date}>'
+
+
+class CardReservation(db.Model):
+    """练习卡片预留（多个标签页、多个工作进程之间共享）"""
+    __tablename__ = 'card_reservation'
+    
+    # 不设外键：预留会自然过期，删除单词时无需级联
+    word_id = db.Column(db.Integer, primary_key=True)
+    client_id = db.Column(db.String(64), nullable=False, index=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<CardReservation {self.word_id}: {self.client_id}>'
+
+
+class BackgroundJob(db.Model):
+    """后台任务状态（任意工作进程都可查询）"""
+    __tablename__ = 'background_job'
+    
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    # 相同kind和key的任务在运行期间只执行一个
+    key = db.Column(db.String(100), nullable=False, default='')
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow,
+                           onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('idx_job_kind_key_status', 'kind', 'key', 'status'),
+    )
+    
+    def to_dict(self):
+        """转换为字典格式"""
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error,
+            'created_at': (self.created_at.isoformat()
+                           if self.created_at else None),
+            'updated_at': (self.updated_at.isoformat()
+                           if self.updated_at else None)
+        }
+    
+    def __repr__(self):
+        return f'<BackgroundJob {self.kind} {self.id}: {self.status}>'
+
+
+class DataVersion(db.Model):
+    """数据版本计数器，用于读接口的ETag"""
+    __tablename__ = 'data_version'
+    
+    scope = db.Column(db.String(120), primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow,
+                           onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<DataVersion {self.scope}={self.version}>'
+
+
+class PracticeCounter(db.Model):
+    """练习计数器（单行），供/api/stats以O(1)读取"""
+    __tablename__ = 'practice_counter'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    total_words = db.Column(db.Integer, default=0, nullable=False)
+    total_sessions = db.Column(db.Integer, default=0, nullable=False)
+    correct_sessions = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow,
+                           onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        """转换为字典格式"""
+        return {
+            'total_words': self.total_words,
+            'total_sessions': self.total_sessions,
+            'correct_sessions': self.correct_sessions
+        }
+    
+    def __repr__(self):
+        return (f'<PracticeCounter words={self.total_words} '
+                f'sessions={self.total_sessions}>')
+
+
+class UserLearningStats(db.Model):
+    """用户学习统计（增量维护）
+    
+    每记录一次学习会话就增量更新一次，推荐引擎分析学习历史时
+    只需读取这一行，耗时与历史长度无关。day_buckets保存最近30天的
+    按日聚合，供推荐分析使用；其余列是全部历史的终身统计。
+    """
+    __tablename__ = 'user_learning_stats'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.String(100), unique=True, nullable=False)
+    session_count = db.Column(db.Integer, default=0, nullable=False)
+    
+    # 终身统计：准确率、单词数、时长的Welford均值/方差（只统计大于0的值）
+    accuracy_count = db.Column(db.Integer, default=0, nullable=False)
+    accuracy_mean = db.Column(db.Float, default=0.0, nullable=False)
+    accuracy_m2 = db.Column(db.Float, default=0.0, nullable=False)
+    words_count = db.Column(db.Integer, default=0, nullable=False)
+    words_mean = db.Column(db.Float, default=0.0, nullable=False)
+    duration_count = db.Column(db.Integer, default=0, nullable=False)
+    duration_mean = db.Column(db.Float, default=0.0, nullable=False)
+    
+    # 最近5次会话的准确率（新的在前），用于趋势回归
+    recent_accuracies = db.Column(db.JSON, default=list)
+    
+    # 学习间隔（天）的Welford均值/方差
+    last_session_date = db.Column(db.Date)
+    interval_count = db.Column(db.Integer, default=0, nullable=False)
+    interval_mean = db.Column(db.Float, default=0.0, nullable=False)
+    interval_m2 = db.Column(db.Float, default=0.0, nullable=False)
+    
+    # 按开始小时分桶的准确率：{"14": [准确率之和, 次数]}
+    hour_buckets = db.Column(db.JSON, default=dict)
+    
+    # 最近30天的按日聚合（环形数组，见learning_stats），推荐分析只读取这一列
+    day_buckets = db.Column(db.JSON, default=list)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow,
+                           onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<UserLearningStats {self.user_id}: {self.session_count}>'
+
+
+class UserLearningPattern(db.Model):
+    """用户学习模式（批量计算结果）
+    
+    由jobs/compute_learning_patterns.py批量写入，供管理后台展示。
+    session_count和computed_at用于增量重算：会话数变化或有会话
+    在computed_at之后更新的用户才会重新计算。
+    """
+    __tablename__ = 'user_learning_pattern'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.String(100), unique=True, nullable=False)
+    overall_pattern = db.Column(db.String(200), nullable=False)
+    preferred_time = db.Column(db.String(50))
+    time_confidence = db.Column(db.Float, default=0.0)
+    frequency_pattern = db.Column(db.String(50))
+    avg_interval_hours = db.Column(db.Float, default=0.0)
+    intensity_pattern = db.Column(db.String(50))
+    avg_duration = db.Column(db.Float, default=0.0)
+    avg_words = db.Column(db.Float, default=0.0)
+    session_count = db.Column(db.Integer, default=0, nullable=False)
+    computed_at = db.Column(db.DateTime, nullable=False)
+    
+    def to_dict(self):
+        """转换为字典格式"""
+        return {
+            'user_id': self.user_id,
+            'overall_pattern': self.overall_pattern,
+            'preferred_time': self.preferred_time,
+            'time_confidence': self.time_confidence,
+            'frequency_pattern': self.frequency_pattern,
+            'avg_interval_hours': self.avg_interval_hours,
+            'intensity_pattern': self.intensity_pattern,
+            'avg_duration': self.avg_duration,
+            'avg_words': self.avg_words,
+            'session_count': self.session_count,
+            'computed_at': (self.computed_at.isoformat()
+                            if self.computed_at else None)
+        }
+    
+    def __repr__(self):
+        return f'<UserLearningPattern {self.user_id}: {self.overall_pattern}>'
+
+
+class DailyRollup(db.Model):
+    """每日汇总（增量维护）
+    
+    趋势查询按天读取本表，无需扫描原始练习记录。
+    user_id为GLOBAL_ROLLUP_USER的行是全局汇总（练习次数来自逐次答题，
+    按UTC日期归档），其余行是单个用户的汇总（练习次数来自学习会话的
+    total_words，练习记录不含user_id）。两种口径不同，全局行不等于各用户行之和。
+    准确率为accuracy_sum / practice_count。
+    """
+    __tablename__ = 'daily_rollup'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False)
+    user_id = db.Column(db.String(100), nullable=False)
+    practice_count = db.Column(db.Integer, default=0, nullable=False)
+    accuracy_sum = db.Column(db.Float, default=0.0, nullable=False)
+    new_words = db.Column(db.Integer, default=0, nullable=False)
+    # 仅全局行使用：当天有学习会话的用户数
+    active_users = db.Column(db.Integer, default=0, nullable=False)
+    
+    __table_args__ = (
+        db.Index('idx_rollup_user_day', 'user_id', 'day', unique=True),
+    )
+    
+    def __repr__(self):
+        return f'<DailyRollup {self.user_id} {self.day}>'
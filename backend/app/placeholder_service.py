@@ -0,0 +1,65 @@
+"""本地占位图生成
+
+没有图片的单词使用本地渲染的SVG占位图，样式与原来的绿色卡片一致，
+不再依赖via.placeholder.com。占位图按(单词, 样式)缓存到磁盘，
+通过/media端点以immutable方式提供。
+"""
+
+import hashlib
+import json
+import os
+from xml.sax.saxutils import escape
+
+from .media_store import MEDIA_ROOT, media_url, save_bytes
+
+PLACEHOLDER_STYLES = {
+    'default': {
+        'size': 200,
+        'background': '#4CAF50',
+        'color': '#FFFFFF',
+        'font_family': 'Arial, Helvetica, sans-serif',
+    },
+}
+
+SVG_TEMPLATE = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="{size}" height="{size}" '
+    'viewBox="0 0 {size} {size}">'
+    '<rect width="100%" height="100%" fill="{background}"/>'
+    '<text x="50%" y="50%" fill="{color}" font-family="{font_family}" '
+    'font-size="{font_size}" text-anchor="middle" '
+    'dominant-baseline="central">{text}</text>'
+    '</svg>'
+)
+
+
+def placeholder_filename(word: str, style_name: str = 'default') -> str:
+    """按单词和样式生成缓存文件名"""
+    style = PLACEHOLDER_STYLES[style_name]
+    content = json.dumps([word, style], sort_keys=True, ensure_ascii=False)
+    digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:32]
+    return f"placeholder_{digest}.svg"
+
+
+def render_placeholder_svg(word: str, style_name: str = 'default') -> bytes:
+    """渲染占位图SVG"""
+    style = PLACEHOLDER_STYLES[style_name]
+    # 长单词缩小字号，保证文字在卡片内
+    font_size = max(12, min(32, int(style['size'] * 1.6 / max(len(word), 1))))
+    svg = SVG_TEMPLATE.format(
+        text=escape(word),
+        font_size=font_size,
+        **style
+    )
+    return svg.encode('utf-8')
+
+
+def get_placeholder_url(word: str, style_name: str = 'default') -> str:
+    """获取单词占位图URL，磁盘上已有时不再渲染"""
+    filename = placeholder_filename(word, style_name)
+    if os.path.exists(os.path.join(MEDIA_ROOT, 'images', filename)):
+        return media_url('images', filename)
+
+    return save_bytes(
+        render_placeholder_svg(word, style_name), 'images', 'svg',
+        filename=filename
+    )
@@ -0,0 +1,70 @@
+"""练习计数器维护
+
+/api/stats需要的单词总数、练习总数和正确次数保存在practice_counter
+单行表中，由写入练习记录和单词的代码在同一事务内增量更新，
+读取时只需一次主键查询。计数器缺失或不一致时可调用rebuild_counters重建。
+"""
+
+from typing import Dict
+
+from .daily_rollups import record_practice_rollup
+from .models import PracticeCounter, PracticeSession, Word, db
+
+COUNTER_ID = 1
+
+
+def increment_counters(words: int = 0, sessions: int = 0,
+                       correct: int = 0) -> None:
+    """增量更新计数器和当天的全局汇总，随调用方的事务一起提交"""
+    record_practice_rollup(sessions, correct)
+    updated = PracticeCounter.query.filter_by(id=COUNTER_ID).update(
+        {
+            PracticeCounter.total_words:
+                PracticeCounter.total_words + words,
+            PracticeCounter.total_sessions:
+                PracticeCounter.total_sessions + sessions,
+            PracticeCounter.correct_sessions:
+                PracticeCounter.correct_sessions + correct,
+        },
+        synchronize_session=False
+    )
+    if not updated:
+        # 计数器尚未初始化：先写入本事务中的新记录，再整体重建
+        db.session.flush()
+        rebuild_counters()
+
+
+def record_practice(is_correct: bool) -> None:
+    """记录一次练习"""
+    increment_counters(sessions=1, correct=1 if is_correct else 0)
+
+
+def rebuild_counters() -> PracticeCounter:
+    """从原始表重新计算计数器（不提交事务）"""
+    total_words = db.session.query(db.func.count(Word.id)).scalar() or 0
+    total_sessions = db.session.query(
+        db.func.count(PracticeSession.id)
+    ).scalar() or 0
+    correct_sessions = db.session.query(
+        db.func.count(PracticeSession.id)
+    ).filter(PracticeSession.is_correct.is_(True)).scalar() or 0
+
+    counter = db.session.get(PracticeCounter, COUNTER_ID)
+    if counter is None:
+        counter = PracticeCounter(id=COUNTER_ID)
+        db.session.add(counter)
+
+    counter.total_words = total_words
+    counter.total_sessions = total_sessions
+    counter.correct_sessions = correct_sessions
+    db.session.flush()
+    return counter
+
+
+def get_counters() -> Dict[str, int]:
+    """读取计数器，首次读取时初始化"""
+    counter = db.session.get(PracticeCounter, COUNTER_ID)
+    if counter is None:
+        counter = rebuild_counters()
+        db.session.commit()
+    return counter.to_dict()
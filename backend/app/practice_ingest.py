@@ -0,0 +1,250 @@
+"""练习答题的异步批量写入
+
+check_answer和submit_practice判定对错后只把答题事件放入进程内的有界队列，
+由后台线程每隔PRACTICE_FLUSH_INTERVAL_MS毫秒或累计PRACTICE_FLUSH_ROWS条
+时在一个事务中批量写入，减少SQLite在高并发答题时的逐条提交。
+队列已满时调用方退回同步写入；进程退出时把队列中剩余的事件全部写入。
+批量写入失败（如SQLite短暂锁库）时按退避重试，仍失败则逐条同步写入，
+只有逐条写入也失败的事件才计为失败。
+默认关闭，需设置PRACTICE_WRITE_BEHIND=true启用；启用后答题响应没有session_id。
+"""
+
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .data_version import PRACTICE, bump_data_version
+from .models import PracticeSession, db
+from .practice_counters import increment_counters
+
+
+class PracticeIngestBuffer:
+    """练习答题写入缓冲"""
+
+    def __init__(self, app, max_queue: int = None,
+                 flush_interval_ms: int = None, flush_rows: int = None):
+        self.app = app
+        self.max_queue = max_queue or int(
+            os.getenv('PRACTICE_QUEUE_SIZE', 10000)
+        )
+        self.flush_interval = (flush_interval_ms or int(
+            os.getenv('PRACTICE_FLUSH_INTERVAL_MS', 200)
+        )) / 1000.0
+        self.flush_rows = flush_rows or int(
+            os.getenv('PRACTICE_FLUSH_ROWS', 100)
+        )
+        self.max_retries = int(os.getenv('PRACTICE_FLUSH_RETRIES', 3))
+        self.retry_backoff = 0.05
+
+        self._queue = queue.Queue(maxsize=self.max_queue)
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        self.enqueued = 0
+        self.rejected = 0
+        self.flushed_rows = 0
+        self.failed_rows = 0
+        self.retried_batches = 0
+        self.flush_count = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def submit(self, word_id: int, user_input: str, is_correct: bool) -> bool:
+        """加入一条答题事件，队列已满或已关闭时返回False"""
+        if self._stop.is_set():
+            return False
+        self._ensure_started()
+
+        event = {
+            'word_id': word_id,
+            'user_input': user_input,
+            'is_correct': is_correct,
+            'created_at': datetime.utcnow()
+        }
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.rejected += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    def _ensure_started(self) -> None:
+        """首次提交时启动后台写入线程"""
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run,
+                        name='practice-ingest',
+                        daemon=True
+                    )
+                    self._thread.start()
+
+    def _run(self) -> None:
+        """后台线程：按时间或条数攒批后写入"""
+        while not self._stop.is_set():
+            batch = self._collect()
+            if batch:
+                self._write(batch)
+
+    def _collect(self) -> List[Dict]:
+        """等待第一条事件，再在flush_interval内最多攒flush_rows条"""
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.flush_rows:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain_queue(self) -> List[Dict]:
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _write(self, batch: List[Dict]) -> None:
+        """写入一批事件并标记完成，flush()通过队列的join等待在途批次"""
+        try:
+            self._flush(batch)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _flush(self, batch: List[Dict]) -> None:
+        """写入一批答题记录：失败时按退避重试，仍失败则逐条写入"""
+        start = time.perf_counter()
+        with self.app.app_context():
+            try:
+                error = self._commit_with_retry(batch)
+                if error is None:
+                    self.flushed_rows += len(batch)
+                else:
+                    print(f"批量写入练习记录失败（{len(batch)}条），"
+                          f"改为逐条写入: {error}")
+                    for event in batch:
+                        error = self._commit_with_retry([event])
+                        if error is None:
+                            self.flushed_rows += 1
+                        else:
+                            self.failed_rows += 1
+                            print(f"写入练习记录失败，已放弃: {event} {error}")
+            finally:
+                db.session.remove()
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.flush_count += 1
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+
+    def _commit_with_retry(self, batch: List[Dict]) -> Optional[Exception]:
+        """写入失败时按指数退避重试max_retries次，返回最后一次的异常"""
+        for attempt in range(self.max_retries + 1):
+            error = self._commit(batch)
+            if error is None:
+                return None
+            if attempt < self.max_retries:
+                self.retried_batches += 1
+                time.sleep(min(self.retry_backoff * 2 ** attempt, 1.0))
+        return error
+
+    @staticmethod
+    def _commit(batch: List[Dict]) -> Optional[Exception]:
+        """在一个事务中写入事件并更新计数器和数据版本，失败时回滚并返回异常"""
+        try:
+            db.session.add_all([PracticeSession(**event) for event in batch])
+            increment_counters(
+                sessions=len(batch),
+                correct=sum(1 for event in batch if event['is_correct'])
+            )
+            bump_data_version(PRACTICE)
+            db.session.commit()
+            return None
+        except Exception as e:
+            db.session.rollback()
+            return e
+
+    def flush(self) -> None:
+        """立即写入队列中的全部事件，并等待后台线程正在写入的批次，返回时已提交"""
+        with self._flush_lock:
+            while True:
+                batch = self._drain_queue()
+                if not batch:
+                    break
+                for i in range(0, len(batch), self.flush_rows):
+                    self._write(batch[i:i + self.flush_rows])
+        self._queue.join()
+
+    def shutdown(self, timeout: Optional[float] = 5.0) -> None:
+        """停止后台线程并写入剩余事件"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+    def stats(self) -> Dict:
+        return {
+            'queue_depth': self._queue.qsize(),
+            'max_queue': self.max_queue,
+            'flush_interval_ms': int(self.flush_interval * 1000),
+            'flush_rows': self.flush_rows,
+            'enqueued': self.enqueued,
+            'rejected': self.rejected,
+            'flushed_rows': self.flushed_rows,
+            'failed_rows': self.failed_rows,
+            'retried_batches': self.retried_batches,
+            'flush_count': self.flush_count,
+            'last_flush_ms': round(self.last_flush_ms, 2),
+            'avg_flush_ms': round(
+                self._total_flush_ms / self.flush_count, 2
+            ) if self.flush_count else 0.0,
+            'max_flush_ms': round(self.max_flush_ms, 2)
+        }
+
+
+_ingest_buffer = None
+_ingest_lock = threading.Lock()
+
+
+def practice_ingest_enabled() -> bool:
+    return os.getenv('PRACTICE_WRITE_BEHIND', 'false').lower() == 'true'
+
+
+def get_practice_ingest(app=None) -> PracticeIngestBuffer:
+    """获取进程级共享的写入缓冲"""
+    global _ingest_buffer
+    if _ingest_buffer is None:
+        with _ingest_lock:
+            if _ingest_buffer is None:
+                if app is None:
+                    from flask import current_app
+                    app = current_app._get_current_object()
+                _ingest_buffer = PracticeIngestBuffer(app)
+                atexit.register(_ingest_buffer.shutdown)
+    return _ingest_buffer
+
+
+def flush_pending_practice() -> None:
+    """同步写入尚在队列中的答题事件（缓冲未创建时不做任何事）"""
+    if _ingest_buffer is not None:
+        _ingest_buffer.flush()
@@ -1,51 +1,229 @@
-from datetime import datetime, date, timedelta
-from typing import Dict, List
-import statistics
+from datetime import datetime, date
+from typing import Dict
+import threading
 from .models import (
     UserLearningProfile, DailyPracticeRecommendation,
-    LearningSession, db
+    UserLearningStats, db
 )
-from sqlalchemy import and_
+from sqlalchemy.exc import IntegrityError
+from .data_version import (
+    bump_data_version, get_data_versions, profile_scope
+)
+from .daily_rollups import record_session_rollup
+from .learning_stats import (
+    analyze as analyze_learning_stats, default_analysis,
+    get_or_create_stats, record_session
+)
+
+# 每日推荐的进程内缓存：(user_id, date) -> (画像数据版本, 推荐结果)
+# 记录学习会话和更新画像都会递增画像数据版本，版本变化即缓存失效
+_daily_cache = {}
+_daily_cache_lock = threading.Lock()
+
+# 推荐记录中由算法计算的字段，更新已有记录时不覆盖执行状态
+RECOMMENDATION_FIELDS = (
+    'recommended_word_count', 'recommended_session_length',
+    'target_accuracy', 'difficulty_level', 'autonomy_score',
+    'competence_score', 'motivation_boost', 'reasoning',
+    'confidence_level'
+)
+
+# 推荐算法参数（RecommendationEngine和batch_recommendations的向量化计算共用）
+BASE_WORD_COUNT = 10        # 基础单词数量（画像未设置时）
+MAX_WORD_COUNT = 50         # 最大单词数量
+MIN_WORD_COUNT = 5          # 最小单词数量
+DEFAULT_SESSION_LENGTH = 20
+DEFAULT_OPTIMAL_DIFFICULTY = 0.6
+
+# 心理学参数权重
+AUTONOMY_WEIGHT = 0.3
+COMPETENCE_WEIGHT = 0.4
+MOTIVATION_WEIGHT = 0.3
+
+# 学习能力评估参数
+LEARNING_SPEED_FACTOR = 1.2
+ACCURACY_THRESHOLD = 0.7
+DIFFICULTY_ADJUSTMENT = 0.1
+
+# 单词数调整：准确率高于ACCURACY_THRESHOLD或低于LOW_ACCURACY，
+# 趋势超出±TREND_THRESHOLD时乘以对应系数
+LOW_ACCURACY = 0.6
+HIGH_ACCURACY_FACTOR = 1.1
+LOW_ACCURACY_FACTOR = 0.8
+TREND_THRESHOLD = 0.1
+TREND_UP_FACTOR = 1.05
+TREND_DOWN_FACTOR = 0.9
+
+# 目标准确率与难度：准确率高于HARD_ACCURACY加难，低于EASY_ACCURACY降难
+TARGET_ACCURACY_MARGIN = 0.05
+MAX_TARGET_ACCURACY = 0.95
+HARD_ACCURACY = 0.85
+EASY_ACCURACY = 0.65
+MAX_DIFFICULTY = 1.0
+MIN_DIFFICULTY = 0.3
+
+# 自主性：单词数匹配、时长匹配、学习一致性的权重及匹配度归一化范围
+AUTONOMY_FACTORS = (0.4, 0.3, 0.3)
+WORD_COUNT_MATCH_RANGE = 20.0
+DURATION_MATCH_RANGE = 30.0
+
+# 胜任感：准确率信心、难度匹配、进步趋势的权重
+COMPETENCE_FACTORS = (0.4, 0.3, 0.3)
+CONFIDENT_ACCURACY = 0.8
+PROGRESS_TREND_OFFSET = 0.2
+PROGRESS_TREND_RANGE = 0.4
+
+# 动机奖励
+STREAK_BONUS_PER_DAY = 0.02
+MAX_STREAK_BONUS = 0.2
+CONSISTENCY_BONUS = 0.1
+
+# 置信度：数据量、学习稳定性、画像完整性的权重
+CONFIDENCE_FACTORS = (0.4, 0.3, 0.3)
+CONFIDENT_SESSION_COUNT = 10.0
+PROFILE_COMPLETENESS = 0.8  # 假设画像相对完整
+MIN_CONFIDENCE = 0.5
+
+# 推荐理由：心理评分超过REASON_SCORE_THRESHOLD、连续学习超过
+# REASON_STREAK_DAYS天时加入对应文案，按下列顺序以“；”连接
+REASON_SCORE_THRESHOLD = 0.8
+REASON_STREAK_DAYS = 7
+REASONING_TEMPLATES = {
+    'high_accuracy': "您的学习表现优秀，建议适当增加挑战难度",
+    'low_accuracy': "建议先巩固基础，降低学习强度以提升信心",
+    'trend_up': "您的学习呈上升趋势，可以尝试更多单词",
+    'trend_down': "最近表现有所波动，建议保持稳定的学习节奏",
+    'autonomy': "推荐参数符合您的学习偏好",
+    'competence': "难度设置有助于提升您的胜任感",
+    'streak': "您已连续学习{streak}天，保持良好习惯",
+    'default': "基于您的学习数据制定的个性化推荐",
+}
+
+
+def build_reasoning(avg_accuracy: float, accuracy_trend: float,
+                    autonomy_score: float, competence_score: float,
+                    current_streak: int) -> str:
+    """按推荐结果拼接推荐理由"""
+    reasons = []
+    
+    # 基于学习表现的理由
+    if avg_accuracy > HARD_ACCURACY:
+        reasons.append(REASONING_TEMPLATES['high_accuracy'])
+    elif avg_accuracy < EASY_ACCURACY:
+        reasons.append(REASONING_TEMPLATES['low_accuracy'])
+    
+    # 基于学习趋势的理由
+    if accuracy_trend > TREND_THRESHOLD:
+        reasons.append(REASONING_TEMPLATES['trend_up'])
+    elif accuracy_trend < -TREND_THRESHOLD:
+        reasons.append(REASONING_TEMPLATES['trend_down'])
+    
+    # 基于心理因素的理由
+    if autonomy_score > REASON_SCORE_THRESHOLD:
+        reasons.append(REASONING_TEMPLATES['autonomy'])
+    if competence_score > REASON_SCORE_THRESHOLD:
+        reasons.append(REASONING_TEMPLATES['competence'])
+    
+    # 基于连续性的理由
+    if current_streak > REASON_STREAK_DAYS:
+        reasons.append(
+            REASONING_TEMPLATES['streak'].format(streak=current_streak)
+        )
+    
+    return "；".join(reasons) if reasons else REASONING_TEMPLATES['default']
 
 
 class RecommendationEngine:
     """智能推荐引擎 - 基于心理学理论的每日练习量推荐系统"""
     
     def __init__(self):
-        # 推荐算法参数
-        self.base_word_count = 10  # 基础单词数量
-        self.max_word_count = 50   # 最大单词数量
-        self.min_word_count = 5    # 最小单词数量
+        # 推荐算法参数（模块级常量，批量预计算使用同一组值）
+        self.base_word_count = BASE_WORD_COUNT
+        self.max_word_count = MAX_WORD_COUNT
+        self.min_word_count = MIN_WORD_COUNT
         
         # 心理学参数权重
-        self.autonomy_weight = 0.3
-        self.competence_weight = 0.4
-        self.motivation_weight = 0.3
+        self.autonomy_weight = AUTONOMY_WEIGHT
+        self.competence_weight = COMPETENCE_WEIGHT
+        self.motivation_weight = MOTIVATION_WEIGHT
         
         # 学习能力评估参数
-        self.learning_speed_factor = 1.2
-        self.accuracy_threshold = 0.7
-        self.difficulty_adjustment = 0.1
+        self.learning_speed_factor = LEARNING_SPEED_FACTOR
+        self.accuracy_threshold = ACCURACY_THRESHOLD
+        self.difficulty_adjustment = DIFFICULTY_ADJUSTMENT
+    
+    def get_daily_recommendation(self, user_id: str,
+                                 target_date: date = None) -> Dict:
+        """获取每日练习推荐，同一用户同一天在输入不变时只计算一次
+        
+        Args:
+            user_id: 用户ID
+            target_date: 目标日期，默认为今天（UTC日期，与数据版本和每日汇总一致）
+            
+        Returns:
+            推荐结果字典
+        """
+        if target_date is None:
+            target_date = datetime.utcnow().date()
+        
+        scope = profile_scope(user_id)
+        # 在计算之前读取版本号，计算期间发生的更新会让下次请求重新计算
+        version = get_data_versions([scope])[scope]
+        key = (user_id, target_date)
+        
+        with _daily_cache_lock:
+            cached = _daily_cache.get(key)
+        if cached is not None and cached[0] == version:
+            return dict(cached[1])
+        
+        # 新用户的画像在创建时会更新版本号，先创建画像再读取版本，
+        # 否则保存和缓存的推荐带着旧版本号，下一次请求又要重新计算
+        self._get_or_create_user_profile(user_id)
+        db.session.commit()
+        version = get_data_versions([scope])[scope]
+        
+        # 夜间批处理或其他进程已按当前画像版本算好时直接读取
+        stored = DailyPracticeRecommendation.query.filter_by(
+            user_id=user_id, date=target_date
+        ).first()
+        if stored is not None and stored.profile_version == version:
+            recommendation = self._recommendation_from_row(stored)
+        else:
+            recommendation = self.generate_daily_recommendation(
+                user_id, target_date, profile_version=version
+            )
+        
+        with _daily_cache_lock:
+            # 只保留当天的推荐
+            for stale in [k for k in _daily_cache if k[1] != target_date]:
+                del _daily_cache[stale]
+            _daily_cache[key] = (version, recommendation)
+        
+        return dict(recommendation)
     
     def generate_daily_recommendation(self, user_id: str,
-                                      target_date: date = None) -> Dict:
+                                      target_date: date = None,
+                                      profile_version: int = None) -> Dict:
         """生成每日练习推荐
         
         Args:
             user_id: 用户ID
-            target_date: 目标日期，默认为今天
+            target_date: 目标日期，默认为今天（UTC日期，与数据版本和每日汇总一致）
+            profile_version: 计算前读取的画像数据版本，随推荐记录保存
             
         Returns:
             推荐结果字典
         """
         if target_date is None:
-            target_date = date.today()
+            target_date = datetime.utcnow().date()
         
         # 获取或创建用户学习画像
         profile = self._get_or_create_user_profile(user_id)
         
-        # 分析用户学习历史
-        learning_analysis = self._analyze_learning_history(user_id)
+        # 分析用户学习历史（截至目标日期的30天）
+        learning_analysis = self._analyze_learning_history(
+            user_id, target_date
+        )
         
         # 计算推荐参数
         recommendation = self._calculate_recommendation(
@@ -69,12 +247,12 @@ class RecommendationEngine:
         }
         
         # 保存推荐记录
-        self._save_recommendation(final_recommendation)
+        self._save_recommendation(final_recommendation, profile_version)
         
         return final_recommendation
     
     def _get_or_create_user_profile(self, user_id: str) -> UserLearningProfile:
-        """获取或创建用户学习画像"""
+        """获取或创建用户学习画像（只flush，随调用方的事务一起提交）"""
         profile = UserLearningProfile.query.filter_by(
             user_id=user_id
         ).first()
@@ -90,69 +268,20 @@ class RecommendationEngine:
                 optimal_difficulty=0.6
             )
             db.session.add(profile)
-            db.session.commit()
+            bump_data_version(profile_scope(user_id))
+            db.session.flush()
         
         return profile
     
-    def _analyze_learning_history(self, user_id: str) -> Dict:
-        """分析用户学习历史"""
-        # 获取最近30天的学习会话
-        thirty_days_ago = date.today() - timedelta(days=30)
-        recent_sessions = LearningSession.query.filter(
-            and_(
-                LearningSession.user_id == user_id,
-                LearningSession.session_date >= thirty_days_ago
-            )
-        ).order_by(LearningSession.session_date.desc()).all()
-        
-        if not recent_sessions:
-            return self._get_default_analysis()
-        
-        # 计算学习统计
-        total_sessions = len(recent_sessions)
-        avg_accuracy = statistics.mean(
-            [s.accuracy_rate for s in recent_sessions if s.accuracy_rate > 0]
-        ) if recent_sessions else 0.8
-        
-        avg_words_per_session = statistics.mean(
-            [s.total_words for s in recent_sessions if s.total_words > 0]
-        ) if recent_sessions else 10
-        
-        avg_duration = statistics.mean(
-            [s.duration_minutes for s in recent_sessions
-             if s.duration_minutes > 0]
-        ) if recent_sessions else 20
-        
-        # 计算学习趋势
-        recent_accuracy_trend = self._calculate_accuracy_trend(recent_sessions)
-        learning_consistency = self._calculate_consistency(recent_sessions)
-        
-        # 分析最佳学习时间
-        optimal_time_analysis = self._analyze_optimal_time(recent_sessions)
-        
-        return {
-            'total_sessions': total_sessions,
-            'avg_accuracy': avg_accuracy,
-            'avg_words_per_session': avg_words_per_session,
-            'avg_duration': avg_duration,
-            'accuracy_trend': recent_accuracy_trend,
-            'learning_consistency': learning_consistency,
-            'optimal_time': optimal_time_analysis,
-            'recent_sessions': recent_sessions[:7]  # 最近7天
-        }
+    def _analyze_learning_history(self, user_id: str,
+                                  today: date = None) -> Dict:
+        """分析用户最近30天的学习历史（读取增量维护的统计行）"""
+        stats = UserLearningStats.query.filter_by(user_id=user_id).first()
+        return analyze_learning_stats(stats, today)
     
     def _get_default_analysis(self) -> Dict:
         """获取默认分析结果（新用户）"""
-        return {
-            'total_sessions': 0,
-            'avg_accuracy': 0.8,
-            'avg_words_per_session': 10,
-            'avg_duration': 20,
-            'accuracy_trend': 0.0,
-            'learning_consistency': 0.5,
-            'optimal_time': {'hour': 14, 'preference': 0.7},
-            'recent_sessions': []
-        }
+        return default_analysis()
     
     def _calculate_recommendation(self, profile: UserLearningProfile,
                                   analysis: Dict, target_date: date) -> Dict:
@@ -167,18 +296,18 @@ class RecommendationEngine:
         # 准确率调整
         if analysis['avg_accuracy'] > self.accuracy_threshold:
             # 准确率高，可以增加难度
-            adjusted_count *= 1.1
-        elif analysis['avg_accuracy'] < 0.6:
+            adjusted_count *= HIGH_ACCURACY_FACTOR
+        elif analysis['avg_accuracy'] < LOW_ACCURACY:
             # 准确率低，减少数量
-            adjusted_count *= 0.8
+            adjusted_count *= LOW_ACCURACY_FACTOR
         
         # 趋势调整
-        if analysis['accuracy_trend'] > 0.1:
+        if analysis['accuracy_trend'] > TREND_THRESHOLD:
             # 进步趋势，可以增加挑战
-            adjusted_count *= 1.05
-        elif analysis['accuracy_trend'] < -0.1:
+            adjusted_count *= TREND_UP_FACTOR
+        elif analysis['accuracy_trend'] < -TREND_THRESHOLD:
             # 退步趋势，降低难度
-            adjusted_count *= 0.9
+            adjusted_count *= TREND_DOWN_FACTOR
         
         # 确保在合理范围内
         recommended_count = max(
@@ -187,20 +316,29 @@ class RecommendationEngine:
         )
         
         # 计算推荐学习时长
-        base_duration = profile.preferred_session_length or 20
+        base_duration = (profile.preferred_session_length
+                         or DEFAULT_SESSION_LENGTH)
         recommended_duration = int(
             base_duration * (recommended_count / base_count)
         )
         
         # 计算目标准确率
-        target_accuracy = min(0.95, analysis['avg_accuracy'] + 0.05)
+        target_accuracy = min(
+            MAX_TARGET_ACCURACY,
+            analysis['avg_accuracy'] + TARGET_ACCURACY_MARGIN
+        )
         
         # 计算难度级别
-        difficulty_level = profile.optimal_difficulty or 0.6
-        if analysis['avg_accuracy'] > 0.85:
-            difficulty_level = min(1.0, difficulty_level + 0.1)
-        elif analysis['avg_accuracy'] < 0.65:
-            difficulty_level = max(0.3, difficulty_level - 0.1)
+        difficulty_level = (profile.optimal_difficulty
+                            or DEFAULT_OPTIMAL_DIFFICULTY)
+        if analysis['avg_accuracy'] > HARD_ACCURACY:
+            difficulty_level = min(
+                MAX_DIFFICULTY, difficulty_level + self.difficulty_adjustment
+            )
+        elif analysis['avg_accuracy'] < EASY_ACCURACY:
+            difficulty_level = max(
+                MIN_DIFFICULTY, difficulty_level - self.difficulty_adjustment
+            )
         
         return {
             'recommended_word_count': recommended_count,
@@ -248,21 +386,22 @@ class RecommendationEngine:
         # 基于用户偏好与推荐的匹配度
         word_count_match = 1.0 - abs(
             recommendation['recommended_word_count'] -
-            (profile.preferred_daily_words or 10)
-        ) / 20.0
+            (profile.preferred_daily_words or BASE_WORD_COUNT)
+        ) / WORD_COUNT_MATCH_RANGE
         
         duration_match = 1.0 - abs(
             recommendation['recommended_session_length'] -
-            (profile.preferred_session_length or 20)
-        ) / 30.0
+            (profile.preferred_session_length or DEFAULT_SESSION_LENGTH)
+        ) / DURATION_MATCH_RANGE
         
         # 学习一致性影响自主感
         consistency_factor = analysis['learning_consistency']
         
+        word_weight, duration_weight, consistency_weight = AUTONOMY_FACTORS
         autonomy_score = (
-            word_count_match * 0.4 +
-            duration_match * 0.3 +
-            consistency_factor * 0.3
+            word_count_match * word_weight +
+            duration_match * duration_weight +
+            consistency_factor * consistency_weight
         )
         
         return max(0.0, min(1.0, autonomy_score))
@@ -272,23 +411,30 @@ class RecommendationEngine:
                                     recommendation: Dict) -> float:
         """计算胜任感评分"""
         # 基于历史表现和推荐难度的匹配
-        accuracy_confidence = min(1.0, analysis['avg_accuracy'] / 0.8)
+        accuracy_confidence = min(
+            1.0, analysis['avg_accuracy'] / CONFIDENT_ACCURACY
+        )
         
         # 难度适配性
-        optimal_difficulty = profile.optimal_difficulty or 0.6
+        optimal_difficulty = (profile.optimal_difficulty
+                              or DEFAULT_OPTIMAL_DIFFICULTY)
         difficulty_match = 1.0 - abs(
             recommendation['difficulty_level'] - optimal_difficulty
         )
         
         # 进步趋势
         progress_factor = max(0.0, min(1.0, 
-            (analysis['accuracy_trend'] + 0.2) / 0.4
+            (analysis['accuracy_trend'] + PROGRESS_TREND_OFFSET)
+            / PROGRESS_TREND_RANGE
         ))
         
+        accuracy_weight, difficulty_weight, progress_weight = (
+            COMPETENCE_FACTORS
+        )
         competence_score = (
-            accuracy_confidence * 0.4 + 
-            difficulty_match * 0.3 + 
-            progress_factor * 0.3
+            accuracy_confidence * accuracy_weight + 
+            difficulty_match * difficulty_weight + 
+            progress_factor * progress_weight
         )
         
         return max(0.0, min(1.0, competence_score))
@@ -304,10 +450,13 @@ class RecommendationEngine:
         )
         
         # 学习连续性奖励
-        streak_bonus = min(0.2, profile.current_streak * 0.02)
+        streak_bonus = min(
+            MAX_STREAK_BONUS, profile.current_streak * STREAK_BONUS_PER_DAY
+        )
         
         # 一致性奖励
-        consistency_bonus = analysis['learning_consistency'] * 0.1
+        consistency_bonus = (analysis['learning_consistency']
+                             * CONSISTENCY_BONUS)
         
         motivation_boost = base_motivation + streak_bonus + consistency_bonus
         
@@ -318,157 +467,75 @@ class RecommendationEngine:
                           autonomy_score: float, competence_score: float,
                           motivation_boost: float) -> str:
         """生成推荐理由说明"""
-        reasons = []
-        
-        # 基于学习表现的理由
-        if analysis['avg_accuracy'] > 0.85:
-            reasons.append("您的学习表现优秀，建议适当增加挑战难度")
-        elif analysis['avg_accuracy'] < 0.65:
-            reasons.append("建议先巩固基础，降低学习强度以提升信心")
-        
-        # 基于学习趋势的理由
-        if analysis['accuracy_trend'] > 0.1:
-            reasons.append("您的学习呈上升趋势，可以尝试更多单词")
-        elif analysis['accuracy_trend'] < -0.1:
-            reasons.append("最近表现有所波动，建议保持稳定的学习节奏")
-        
-        # 基于心理因素的理由
-        if autonomy_score > 0.8:
-            reasons.append("推荐参数符合您的学习偏好")
-        if competence_score > 0.8:
-            reasons.append("难度设置有助于提升您的胜任感")
-        
-        # 基于连续性的理由
-        if profile.current_streak > 7:
-            reasons.append(f"您已连续学习{profile.current_streak}天，保持良好习惯")
-        
-        return "；".join(reasons) if reasons else "基于您的学习数据制定的个性化推荐"
-    
-    def _calculate_accuracy_trend(self, sessions: List[LearningSession]) -> float:
-        """计算准确率趋势"""
-        if len(sessions) < 3:
-            return 0.0
-        
-        # 取最近的会话计算趋势
-        recent_accuracies = [s.accuracy_rate for s in sessions[:5] 
-                           if s.accuracy_rate > 0]
-        
-        if len(recent_accuracies) < 2:
-            return 0.0
-        
-        # 简单线性趋势计算
-        x = list(range(len(recent_accuracies)))
-        y = recent_accuracies
-        
-        n = len(x)
-        sum_x = sum(x)
-        sum_y = sum(y)
-        sum_xy = sum(x[i] * y[i] for i in range(n))
-        sum_x2 = sum(x[i] ** 2 for i in range(n))
-        
-        if n * sum_x2 - sum_x ** 2 == 0:
-            return 0.0
-        
-        slope = (n * sum_xy - sum_x * sum_y) / (n * sum_x2 - sum_x ** 2)
-        return slope
-    
-    def _calculate_consistency(self, sessions: List[LearningSession]) -> float:
-        """计算学习一致性"""
-        if len(sessions) < 2:
-            return 0.5
-        
-        # 计算学习间隔的标准差
-        dates = [s.session_date for s in sessions]
-        dates.sort()
-        
-        intervals = []
-        for i in range(1, len(dates)):
-            interval = (dates[i-1] - dates[i]).days
-            intervals.append(abs(interval))
-        
-        if not intervals:
-            return 0.5
-        
-        # 一致性 = 1 - (标准差 / 平均值)
-        avg_interval = statistics.mean(intervals)
-        if avg_interval == 0:
-            return 1.0
-        
-        std_interval = statistics.stdev(intervals) if len(intervals) > 1 else 0
-        consistency = 1.0 - min(1.0, std_interval / avg_interval)
-        
-        return max(0.0, consistency)
-    
-    def _analyze_optimal_time(self, sessions: List[LearningSession]) -> Dict:
-        """分析最佳学习时间"""
-        if not sessions:
-            return {'hour': 14, 'preference': 0.7}
-        
-        # 统计不同时间段的学习表现
-        time_performance = {}
-        for session in sessions:
-            if session.start_time and session.accuracy_rate > 0:
-                hour = session.start_time.hour
-                if hour not in time_performance:
-                    time_performance[hour] = []
-                time_performance[hour].append(session.accuracy_rate)
-        
-        if not time_performance:
-            return {'hour': 14, 'preference': 0.7}
-        
-        # 找到表现最好的时间段
-        best_hour = 14
-        best_performance = 0.0
-        
-        for hour, accuracies in time_performance.items():
-            avg_accuracy = statistics.mean(accuracies)
-            if avg_accuracy > best_performance:
-                best_performance = avg_accuracy
-                best_hour = hour
-        
-        return {
-            'hour': best_hour,
-            'preference': min(1.0, best_performance)
-        }
+        return build_reasoning(
+            analysis['avg_accuracy'], analysis['accuracy_trend'],
+            autonomy_score, competence_score, profile.current_streak
+        )
     
     def _calculate_confidence(self, profile: UserLearningProfile,
                             analysis: Dict) -> float:
         """计算推荐置信度"""
         # 基于数据量的置信度
-        data_confidence = min(1.0, analysis['total_sessions'] / 10.0)
+        data_confidence = min(
+            1.0, analysis['total_sessions'] / CONFIDENT_SESSION_COUNT
+        )
         
         # 基于学习稳定性的置信度
         stability_confidence = analysis['learning_consistency']
         
         # 基于用户画像完整性的置信度
-        profile_completeness = 0.8  # 假设画像相对完整
+        profile_completeness = PROFILE_COMPLETENESS
         
+        data_weight, stability_weight, profile_weight = CONFIDENCE_FACTORS
         overall_confidence = (
-            data_confidence * 0.4 + 
-            stability_confidence * 0.3 + 
-            profile_completeness * 0.3
+            data_confidence * data_weight + 
+            stability_confidence * stability_weight + 
+            profile_completeness * profile_weight
         )
         
-        return max(0.5, min(1.0, overall_confidence))
+        return max(MIN_CONFIDENCE, min(1.0, overall_confidence))
+    
+    def _save_recommendation(self, recommendation_data: Dict,
+                             profile_version: int = None) -> None:
+        """保存推荐记录到数据库，每个用户每天只保留一条"""
+        try:
+            # 冲突时只回滚保存点，同一事务中新建的画像不受影响
+            with db.session.begin_nested():
+                self._upsert_recommendation(
+                    recommendation_data, profile_version
+                )
+        except IntegrityError:
+            # 并发请求已插入同一天的推荐，改为更新该记录
+            self._upsert_recommendation(recommendation_data, profile_version)
+        db.session.commit()
     
-    def _save_recommendation(self, recommendation_data: Dict) -> None:
-        """保存推荐记录到数据库"""
-        recommendation = DailyPracticeRecommendation(
+    def _upsert_recommendation(self, recommendation_data: Dict,
+                               profile_version: int = None) -> None:
+        recommendation = DailyPracticeRecommendation.query.filter_by(
             user_id=recommendation_data['user_id'],
-            date=recommendation_data['date'],
-            recommended_word_count=recommendation_data['recommended_word_count'],
-            recommended_session_length=recommendation_data['recommended_session_length'],
-            target_accuracy=recommendation_data['target_accuracy'],
-            difficulty_level=recommendation_data['difficulty_level'],
-            autonomy_score=recommendation_data['autonomy_score'],
-            competence_score=recommendation_data['competence_score'],
-            motivation_boost=recommendation_data['motivation_boost'],
-            reasoning=recommendation_data['reasoning'],
-            confidence_level=recommendation_data['confidence_level']
-        )
+            date=recommendation_data['date']
+        ).first()
         
-        db.session.add(recommendation)
-        db.session.commit()
+        if recommendation is None:
+            recommendation = DailyPracticeRecommendation(
+                user_id=recommendation_data['user_id'],
+                date=recommendation_data['date']
+            )
+            db.session.add(recommendation)
+        
+        for field in RECOMMENDATION_FIELDS:
+            setattr(recommendation, field, recommendation_data[field])
+        recommendation.profile_version = profile_version
+    
+    @staticmethod
+    def _recommendation_from_row(row: DailyPracticeRecommendation) -> Dict:
+        """把已保存的推荐记录转换为generate_daily_recommendation的返回格式"""
+        recommendation = {
+            field: getattr(row, field) for field in RECOMMENDATION_FIELDS
+        }
+        recommendation['user_id'] = row.user_id
+        recommendation['date'] = row.date
+        return recommendation
     
     def update_user_profile(self, user_id: str, 
                           session_data: Dict) -> None:
@@ -493,7 +560,7 @@ class RecommendationEngine:
             )
         
         # 更新连续学习天数
-        today = date.today()
+        today = datetime.utcnow().date()
         last_session_date = session_data.get('session_date', today)
         
         if isinstance(last_session_date, str):
@@ -511,4 +578,9 @@ class RecommendationEngine:
         
         profile.total_study_days += 1
         
+        # 增量更新学习统计，推荐时无需重新扫描历史会话
+        record_session(get_or_create_stats(user_id), session_data)
+        record_session_rollup(user_id, session_data)
+        
+        bump_data_version(profile_scope(user_id))
         db.session.commit()
\ No newline at end of file
@@ -1,29 +1,121 @@
-from flask import Blueprint, jsonify, request
+from flask import (
+    Blueprint, Response, current_app, jsonify, redirect, request,
+    stream_with_context, url_for
+)
+from sqlalchemy.orm import load_only
 
-from .anki_service import AnkiConnectService
-from .langchain_service import LangChainService
+from .anki_service import AsyncAnkiConnectService
+from .background_jobs import get_job, submit_job
 from .models import (
     Word, PracticeSession, UserLearningProfile,
-    LearningSession, db
+    LearningSession, UserLearningPattern, CardReservation, db
 )
 from .recommendation_engine import RecommendationEngine
-from .analytics_engine import LearningAnalytics
+from .data_version import (
+    PRACTICE, REVIEWS, WORDS, bump_data_version,
+    conditional_on_data_version, profile_scope
+)
+from .serialization import api_response
+from .session_prefetch import release_card
+from .practice_counters import (
+    get_counters, increment_counters, rebuild_counters, record_practice
+)
+from .daily_rollups import rebuild_rollups
+from .practice_ingest import (
+    flush_pending_practice, get_practice_ingest, practice_ingest_enabled
+)
 from datetime import datetime
+import asyncio
+import hashlib
+import os
 import random
 
 api = Blueprint('api', __name__, url_prefix='/api')
 
 
+# /api/words 流式输出时每次读取和写出的行数
+WORDS_STREAM_CHUNK = 500
+WORDS_MAX_PAGE_SIZE = 1000
+# 同步Anki时并发下载媒体文件的数量
+ANKI_MEDIA_CONCURRENCY = int(os.getenv('ANKI_MEDIA_CONCURRENCY', 8))
+
+
 @api.route('/words', methods=['GET'])
+@conditional_on_data_version(lambda: [WORDS])
 def get_words():
-    """获取单词列表"""
+    """获取单词列表
+    
+    查询参数:
+        fields: 逗号分隔的输出字段，列表视图可跳过词源、例句等长文本
+        limit: 每页数量，提供时使用keyset分页
+        after_id: 上一页最后一个单词ID
+    
+    未提供limit时以分块流式JSON数组返回全部单词。
+    """
     try:
-        words = Word.query.all()
-        return jsonify([word.to_dict() for word in words])
+        fields = _parse_word_fields(request.args.get('fields'))
+        if fields is None:
+            return jsonify({'error': 'fields包含未知字段'}), 400
+        
+        query = _word_list_query(fields)
+        limit = request.args.get('limit', type=int)
+        
+        if limit is not None:
+            limit = max(1, min(limit, WORDS_MAX_PAGE_SIZE))
+            after_id = request.args.get('after_id', 0, type=int)
+            words = query.filter(Word.id > after_id).limit(limit + 1).all()
+            has_more = len(words) > limit
+            words = words[:limit]
+            return jsonify({
+                'items': [word.to_dict(fields) for word in words],
+                'next_cursor': words[-1].id if has_more else None
+            })
+        
+        return Response(
+            stream_with_context(_stream_words(query, fields)),
+            mimetype='application/json'
+        )
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+def _parse_word_fields(raw_fields):
+    """解析fields参数，返回字段元组；未指定时返回全部字段，非法时返回None"""
+    if not raw_fields:
+        return Word.SERIALIZABLE_FIELDS
+    
+    requested = [f.strip() for f in raw_fields.split(',') if f.strip()]
+    if any(f not in Word.SERIALIZABLE_FIELDS for f in requested):
+        return None
+    if 'id' not in requested:
+        requested.insert(0, 'id')
+    return tuple(requested)
+
+
+def _word_list_query(fields):
+    """只加载输出需要的列（fields总是包含id），按ID排序"""
+    return Word.query.options(
+        load_only(*[getattr(Word, field) for field in fields])
+    ).order_by(Word.id)
+
+
+def _stream_words(query, fields):
+    """基于yield_per分块读取并输出JSON数组"""
+    dumps = current_app.json.dumps
+    yield '['
+    first = True
+    chunk = []
+    for word in query.yield_per(WORDS_STREAM_CHUNK):
+        chunk.append(dumps(word.to_dict(fields)))
+        if len(chunk) >= WORDS_STREAM_CHUNK:
+            yield ('' if first else ',') + ','.join(chunk)
+            first = False
+            chunk = []
+    if chunk:
+        yield ('' if first else ',') + ','.join(chunk)
+    yield ']'
+
+
 # 推荐系统API接口
 @api.route('/recommendation/daily-goal', methods=['GET'])
 def get_daily_recommendation():
@@ -31,30 +123,9 @@ def get_daily_recommendation():
     try:
         user_id = request.args.get('user_id', 'default_user')
         
-        # 获取或创建用户学习画像
-        profile = UserLearningProfile.query.filter_by(
-            user_id=user_id
-        ).first()
-        
-        if not profile:
-            # 创建默认用户画像
-            profile = UserLearningProfile(
-                user_id=user_id,
-                learning_style='balanced',
-                difficulty_preference='medium',
-                daily_goal=20,
-                motivation_level=0.7,
-                attention_span=25,
-                peak_performance_time='morning'
-            )
-            db.session.add(profile)
-            db.session.commit()
-        
-        # 使用推荐引擎生成推荐
+        # 推荐引擎负责创建缺失的用户画像；结果按用户和日期缓存
         engine = RecommendationEngine()
-        recommendation = engine.generate_daily_recommendation(
-            user_id, profile
-        )
+        recommendation = engine.get_daily_recommendation(user_id)
         
         return jsonify(recommendation)
         
@@ -91,6 +162,7 @@ def update_user_profile():
         if 'peak_performance_time' in data:
             profile.peak_performance_time = data['peak_performance_time']
         
+        bump_data_version(profile_scope(user_id))
         db.session.commit()
         
         return jsonify({
@@ -106,27 +178,45 @@ def update_user_profile():
 def record_learning_session():
     """记录学习会话"""
     try:
+        from app.learning_stats import session_data_from
+        
         data = request.get_json()
+        user_id = data.get('user_id', 'default_user')
         
-        session = LearningSession(
-            user_id=data.get('user_id', 'default_user'),
-            session_type=data.get('session_type', 'practice'),
-            words_practiced=data.get('words_practiced', 0),
-            correct_answers=data.get('correct_answers', 0),
-            session_duration=data.get('session_duration', 0),
-            difficulty_level=data.get('difficulty_level', 'medium'),
-            engagement_score=data.get('engagement_score', 0.5),
-            fatigue_level=data.get('fatigue_level', 0.3)
+        start_time = (_parse_datetime(data.get('start_time'))
+                      or datetime.utcnow())
+        end_time = _parse_datetime(data.get('end_time'))
+        # 兼容前端使用的words_practiced/correct_answers/session_duration
+        total_words = data.get('total_words', data.get('words_practiced', 0))
+        correct_words = data.get(
+            'correct_words', data.get('correct_answers', 0)
+        )
+        duration_minutes = data.get(
+            'duration_minutes', data.get('session_duration', 0)
         )
         
+        session = LearningSession(
+            user_id=user_id,
+            session_date=start_time.date(),
+            start_time=start_time,
+            end_time=end_time,
+            duration_minutes=duration_minutes,
+            total_words=total_words,
+            correct_words=correct_words,
+            accuracy_rate=(correct_words / total_words
+                           if total_words else 0.0),
+            perceived_difficulty=data.get('perceived_difficulty', 3),
+            satisfaction_level=data.get('satisfaction_level', 3),
+            motivation_after=data.get('motivation_after', 3),
+            interruption_count=data.get('interruption_count', 0)
+        )
         db.session.add(session)
-        db.session.commit()
+        db.session.flush()
         
-        # 更新用户画像
+        # 更新用户画像和增量学习统计，与会话在同一事务中提交
+        # （_get_or_create_user_profile只flush，不会提前提交会话）
         engine = RecommendationEngine()
-        engine.update_user_profile_from_session(
-            data.get('user_id', 'default_user'), session
-        )
+        engine.update_user_profile(user_id, session_data_from(session))
         
         return jsonify({
             'message': 'Session recorded successfully',
@@ -134,10 +224,21 @@ def record_learning_session():
         })
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 
+def _parse_datetime(value):
+    """解析ISO格式时间，空值返回None"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(
+        tzinfo=None
+    )
+
+
 @api.route('/recommendation/profile/<user_id>', methods=['GET'])
+@conditional_on_data_version(lambda user_id: [profile_scope(user_id)])
 def get_user_profile(user_id):
     """获取用户学习画像"""
     try:
@@ -154,103 +255,233 @@ def get_user_profile(user_id):
         return jsonify({'error': str(e)}), 500
 
 
+def _job_accepted(job):
+    """任务已提交：返回202和查询地址"""
+    status_url = url_for('api.get_background_job', job_id=job.id)
+    response = jsonify({
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': status_url
+    })
+    response.status_code = 202
+    response.headers['Location'] = status_url
+    return response
+
+
+@api.route('/jobs/<job_id>', methods=['GET'])
+def get_background_job(job_id):
+    """查询后台任务状态，完成后result为原接口的返回内容"""
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({'error': '任务不存在'}), 404
+    return jsonify(job.to_dict())
+
+
 @api.route('/sync-anki', methods=['POST'])
 def sync_anki():
-    """从Anki同步单词"""
+    """从Anki同步单词
+    
+    同步在后台任务中执行，立即返回202和任务ID，通过/api/jobs/<id>查询结果。
+    同步进行期间再次请求返回同一个任务。
+    """
     try:
-        anki_service = AnkiConnectService()
-        langchain_service = LangChainService()
-        words_data = anki_service.get_learning_cards()
+        return _job_accepted(submit_job('sync_anki', _sync_anki_job))
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+async def _sync_anki_job():
+    """后台任务：多个单词的媒体文件并发获取；数据库查询和写入在并发段
+    之外同步执行，不会与媒体下载交错"""
+    from app.langchain_service import get_langchain_service
+    
+    langchain_service = get_langchain_service()
+    async with AsyncAnkiConnectService() as anki_service:
+        words_data = await anki_service.aget_learning_cards()
 
         print(f"\n=== 开始同步Anki单词，共获取到 {len(words_data)} 个单词 ===")
 
-        synced_count = 0
-        for i, word_data in enumerate(words_data, 1):
-            print(f"\n--- 处理第 {i} 个单词 ---")
-            print(f"Anki卡片ID: {word_data['id']}")
-            print(f"单词: {word_data['word']}")
-            print(f"含义: {word_data.get('meaning', 'N/A')}")
-            print(f"牌组: {word_data.get('deck', 'N/A')}")
-            print(f"图片信息: {word_data.get('image_info', 'N/A')}")
-            print(f"音频信息: {word_data.get('audio_info', 'N/A')}")
-
-            # 检查是否已存在
-            existing_word = Word.query.filter_by(
-                anki_card_id=word_data['id']
-            ).first()
-
-            if existing_word:
+        # 一次查询已存在的卡片
+        card_ids = [word_data['id'] for word_data in words_data]
+        existing_ids = {
+            card_id for (card_id,) in db.session.query(
+                Word.anki_card_id
+            ).filter(Word.anki_card_id.in_(card_ids))
+        }
+        new_words = []
+        for word_data in words_data:
+            if word_data['id'] in existing_ids:
                 print(f"单词已存在，跳过: {word_data['word']}")
                 continue
+            existing_ids.add(word_data['id'])
+            new_words.append(word_data)
+
+        # 只处理Anki自带的媒体；缺失的图片和音频在首次请求时按需生成
+        limit = asyncio.Semaphore(ANKI_MEDIA_CONCURRENCY)
+
+        async def process_media(word_data):
+            async with limit:
+                return await langchain_service.aprocess_anki_media(
+                    anki_service,
+                    word_data.get('image_info'),
+                    word_data.get('audio_info')
+                )
+
+        media = await asyncio.gather(
+            *(process_media(word_data) for word_data in new_words)
+        )
 
-            print("新单词，开始处理媒体文件...")
+    synced_count = 0
+    for word_data, (image_url, audio_url) in zip(new_words, media):
+        print(f"新单词: {word_data['word']} (Anki卡片ID: {word_data['id']})")
+        print(f"图片URL: {image_url}")
+        print(f"音频URL: {audio_url}")
+
+        word = Word(
+            anki_card_id=word_data['id'],
+            word=word_data['word'],
+            meaning=word_data.get('meaning'),
+            deck_name=word_data.get('deck'),
+            image_url=image_url,
+            audio_url=audio_url,
+            phonetic=word_data.get('phonetic'),
+            etymology=word_data.get('etymology'),
+            exam_frequency=word_data.get('exam_frequency'),
+            star_level=word_data.get('star_level'),
+            example_sentence=word_data.get('example_sentence'),
+            example_translation=word_data.get('example_translation'),
+            related_words=word_data.get('related_words')
+        )
+        db.session.add(word)
+        synced_count += 1
 
-            # 处理图片和音频
-            image_info = word_data.get('image_info')
-            audio_info = word_data.get('audio_info')
+    if synced_count:
+        increment_counters(words=synced_count)
+        bump_data_version(WORDS)
+    db.session.commit()
+    print(f"\n=== 同步完成，成功添加 {synced_count} 个新单词 ===")
+    return {
+        'message': f'成功同步 {synced_count} 个单词',
+        'synced_count': synced_count
+    }
 
-            print("生成图片URL...")
-            image_url = langchain_service.generate_image(
-                word_data['word'], image_info
-            )
-            print(f"图片URL: {image_url}")
 
-            print("处理音频URL...")
-            audio_url = langchain_service.process_audio_url(
-                word_data['word'], audio_info
-            )
-            print(f"音频URL: {audio_url}")
-
-            word = Word(
-                anki_card_id=word_data['id'],
-                word=word_data['word'],
-                meaning=word_data.get('meaning'),
-                deck_name=word_data.get('deck'),
-                image_url=image_url,
-                audio_url=audio_url,
-                phonetic=word_data.get('phonetic'),
-                etymology=word_data.get('etymology'),
-                exam_frequency=word_data.get('exam_frequency'),
-                star_level=word_data.get('star_level'),
-                example_sentence=word_data.get('example_sentence'),
-                example_translation=word_data.get('example_translation'),
-                related_words=word_data.get('related_words')
-            )
-            db.session.add(word)
-            synced_count += 1
-            print(f"单词 '{word_data['word']}' 已添加到数据库")
+@api.route('/words/<int:word_id>/generate-media', methods=['POST'])
+def generate_media(word_id):
+    """为单词生成图片和音频
+    
+    生成在后台任务中执行，立即返回202和任务ID，任务结果为更新后的单词。
+    """
+    try:
+        if db.session.get(Word, word_id) is None:
+            return jsonify({'error': '单词不存在'}), 404
+        return _job_accepted(submit_job(
+            'generate_media', _generate_media_job, word_id,
+            key=str(word_id)
+        ))
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
 
-        db.session.commit()
-        print(f"\n=== 同步完成，成功添加 {synced_count} 个新单词 ===")
-        return jsonify({
-            'message': f'成功同步 {synced_count} 个单词',
-            'synced_count': synced_count
-        })
 
+async def _generate_media_job(word_id):
+    """后台任务：图片和音频在线程中并发生成"""
+    from app.media_service import MediaService
+    
+    word = db.session.get(Word, word_id)
+    if word is None:
+        raise ValueError(f'单词{word_id}不存在')
+    media_service = MediaService()
+
+    await asyncio.gather(
+        media_service.aresolve_media(word, 'image'),
+        media_service.aresolve_media(word, 'audio')
+    )
+
+    # 结果可能由其他请求写入，重新加载
+    db.session.expire(word)
+    return word.to_dict()
+
+
+@api.route('/words/enrich', methods=['POST'])
+def enrich_words():
+    """用LLM批量补全缺少释义的单词
+    
+    请求体可选word_ids指定单词，默认处理前ENRICH_MAX_WORDS个没有释义的单词。
+    补全在后台任务中执行，立即返回202和任务ID；多个批次通过异步执行器
+    并发请求，受进程级RPM/TPM配额限制。
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        word_ids = sorted({int(i) for i in data.get('word_ids') or ()})
+        key = hashlib.sha1(
+            ','.join(map(str, word_ids)).encode('utf-8')
+        ).hexdigest()
+        return _job_accepted(submit_job(
+            'enrich_words', _enrich_words_job, word_ids, key=key
+        ))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'word_ids必须是单词ID列表'}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 
-@api.route('/words/<int:word_id>/generate-media', methods=['POST'])
-def generate_media(word_id):
-    """为单词生成图片和音频"""
+async def _enrich_words_job(word_ids):
+    """后台任务：补全释义，默认内容不写回"""
+    from app.langchain_service import get_langchain_service
+    
+    limit = int(os.getenv('ENRICH_MAX_WORDS', 200))
+    query = Word.query
+    if word_ids:
+        query = query.filter(Word.id.in_(word_ids))
+    else:
+        query = query.filter(db.or_(Word.meaning.is_(None),
+                                    Word.meaning == ''))
+    words = query.order_by(Word.id).limit(limit).all()
+    
+    service = get_langchain_service()
+    results = await service.aenrich_words([word.word for word in words])
+    
+    enriched = 0
+    for word in words:
+        entry = results.get(word.word)
+        # 默认内容不写回，下次仍会尝试补全
+        if (not entry or word.meaning
+                or service.is_default_enrichment(word.word, entry)):
+            continue
+        word.meaning = entry['definition']
+        enriched += 1
+    
+    if enriched:
+        bump_data_version(WORDS)
+    db.session.commit()
+    return {
+        'message': f'成功补全 {enriched} 个单词',
+        'enriched_count': enriched,
+        'requested_count': len(words)
+    }
+
+
+@api.route('/words/<int:word_id>/media/<kind>', methods=['GET'])
+def get_word_media(word_id, kind):
+    """按需获取单词媒体，首次请求时生成并重定向到媒体文件"""
     try:
+        from app.media_service import MEDIA_KINDS, MediaService
+        
+        if kind not in MEDIA_KINDS:
+            return jsonify({'error': '不支持的媒体类型'}), 404
+        
         word = Word.query.get_or_404(word_id)
-        langchain_service = LangChainService()
-
-        # 生成图片URL
-        if not word.image_url:
-            image_url = langchain_service.generate_image(word.word, None)
-            word.image_url = image_url
-
-        # 生成音频URL
-        if not word.audio_url:
-            audio_url = langchain_service.generate_audio(word.word)
-            word.audio_url = audio_url
-
-        db.session.commit()
-        return jsonify(word.to_dict())
+        url = MediaService().resolve_media(word, kind)
+        
+        if not url:
+            return jsonify({'error': '媒体生成失败'}), 404
+        
+        response = redirect(url, code=302)
+        response.cache_control.no_cache = True
+        return response
 
     except Exception as e:
         db.session.rollback()
@@ -271,20 +502,9 @@ def check_answer():
         word = Word.query.get_or_404(word_id)
         is_correct = user_answer.lower().strip() == word.word.lower()
 
-        # 记录练习会话
-        session = PracticeSession(
-            word_id=word_id,
-            user_input=user_answer,
-            is_correct=is_correct
+        return api_response(
+            _record_answer(word, user_answer, is_correct)
         )
-        db.session.add(session)
-        db.session.commit()
-
-        return jsonify({
-            'is_correct': is_correct,
-            'correct_word': word.word,
-            'session_id': session.id
-        })
 
     except Exception as e:
         db.session.rollback()
@@ -305,35 +525,74 @@ def submit_practice():
         word = Word.query.get_or_404(word_id)
         is_correct = user_input.lower().strip() == word.word.lower()
 
-        # 记录练习会话
-        session = PracticeSession(
-            word_id=word_id,
-            user_input=user_input,
-            is_correct=is_correct
+        return api_response(
+            _record_answer(word, user_input, is_correct)
         )
-        db.session.add(session)
-        db.session.commit()
-
-        return jsonify({
-            'is_correct': is_correct,
-            'correct_word': word.word,
-            'session_id': session.id
-        })
 
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 
+def _record_answer(word, user_input, is_correct):
+    """记录答题：优先放入写入缓冲，缓冲不可用时同步写入"""
+    result = {
+        'is_correct': is_correct,
+        'correct_word': word.word
+    }
+
+    # 已作答的卡片释放预留，其他标签页可以再次取到
+    released = release_card(word.id)
+
+    if practice_ingest_enabled():
+        if get_practice_ingest().submit(word.id, user_input, is_correct):
+            if released:
+                db.session.commit()
+            # 记录尚未落库，没有session_id
+            result['session_id'] = None
+            result['queued'] = True
+            return result
+
+    session = PracticeSession(
+        word_id=word.id,
+        user_input=user_input,
+        is_correct=is_correct
+    )
+    db.session.add(session)
+    record_practice(is_correct)
+    bump_data_version(PRACTICE)
+    db.session.commit()
+
+    result['session_id'] = session.id
+    result['queued'] = False
+    return result
+
+
+@api.route('/practice/ingest-stats', methods=['GET'])
+def get_practice_ingest_stats():
+    """答题写入缓冲的队列深度和写入耗时"""
+    if not practice_ingest_enabled():
+        return jsonify({'enabled': False})
+    stats = get_practice_ingest().stats()
+    stats['enabled'] = True
+    return jsonify(stats)
+
+
 @api.route('/clear-database', methods=['POST'])
 def clear_database():
     """清空数据库中的所有记录"""
     try:
+        # 先写入缓冲中的答题，避免清空后再被写回
+        flush_pending_practice()
         # 删除所有练习会话记录
         PracticeSession.query.delete()
-        # 删除所有单词记录
+        # 删除所有单词记录及其预留
         Word.query.delete()
+        CardReservation.query.delete()
 
+        rebuild_counters()
+        rebuild_rollups()
+        bump_data_version(WORDS, PRACTICE, REVIEWS)
         db.session.commit()
         return jsonify({'message': '数据库已清空'})
 
@@ -363,12 +622,73 @@ def get_next_word():
         else:
             word_dict['memory'] = None
             
-        return jsonify(word_dict)
+        return api_response(word_dict)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@api.route('/session/prefetch', methods=['GET'])
+def prefetch_session():
+    """一次获取接下来K张卡片（含记忆状态和媒体URL），并为客户端预留"""
+    try:
+        from app.session_prefetch import new_client_id, prefetch_cards
+        
+        k = max(1, min(request.args.get('k', 10, type=int), 50))
+        client_id = request.args.get('client') or new_client_id()
+        held = request.args.get('held', '')
+        held_ids = [int(i) for i in held.split(',') if i.strip()]
+        
+        return api_response(prefetch_cards(client_id, k, held_ids))
+        
+    except ValueError:
+        return jsonify({'error': 'held必须是逗号分隔的单词ID'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@api.route('/session/prefetch/validate', methods=['GET'])
+def validate_session_prefetch():
+    """检查预取的卡片是否仍然有效，客户端据此决定是否提前补充"""
+    try:
+        from app.session_prefetch import validate_prefetch
+        
+        client_id = request.args.get('client')
+        token = request.args.get('token')
+        if not client_id or not token:
+            return jsonify({'error': '缺少必要参数'}), 400
+        
+        return api_response(validate_prefetch(client_id, token))
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@api.route('/session/audio-bundle', methods=['GET'])
+def get_session_audio_bundle():
+    """获取接下来K个单词的发音合集"""
+    try:
+        from app.fsrs_service import FSRSService
+        from app.audio_sprite import AudioSpriteService
+        
+        word_ids = request.args.get('word_ids')
+        if word_ids:
+            ids = [int(i) for i in word_ids.split(',') if i.strip()]
+            words = Word.query.filter(Word.id.in_(ids)).all()
+        else:
+            k = max(1, min(request.args.get('k', 10, type=int), 50))
+            words = FSRSService().get_next_words(k)
+        
+        bundle = AudioSpriteService().build_bundle(words)
+        bundle['word_ids'] = [word.id for word in words]
+        
+        return jsonify(bundle)
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
 @api.route('/words/<int:word_id>/review', methods=['POST'])
 def review_word(word_id):
     """记录单词复习结果（FSRS算法）"""
@@ -384,13 +704,17 @@ def review_word(word_id):
         fsrs_service = FSRSService()
         result = fsrs_service.review_word(word_id, rating)
         
-        return jsonify(result)
+        release_card(word_id)
+        db.session.commit()
+        
+        return api_response(result)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
 @api.route('/review-stats', methods=['GET'])
+@conditional_on_data_version(lambda: [WORDS, REVIEWS], daily=True)
 def get_review_stats():
     """获取复习统计信息"""
     try:
@@ -416,7 +740,7 @@ def get_due_words():
         fsrs_service = FSRSService()
         due_words = fsrs_service.get_due_words(limit)
         
-        return jsonify([word.to_dict() for word in due_words])
+        return api_response([word.to_dict() for word in due_words])
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -449,14 +773,14 @@ def reset_word_memory(word_id):
 
 
 @api.route('/stats', methods=['GET'])
+@conditional_on_data_version(lambda: [WORDS, PRACTICE])
 def get_stats():
     """获取练习统计"""
     try:
-        total_words = Word.query.count()
-        total_sessions = PracticeSession.query.count()
-        correct_sessions = PracticeSession.query.filter_by(
-            is_correct=True
-        ).count()
+        counters = get_counters()
+        total_words = counters['total_words']
+        total_sessions = counters['total_sessions']
+        correct_sessions = counters['correct_sessions']
 
         accuracy = (correct_sessions / total_sessions * 100
                     if total_sessions > 0 else 0)
@@ -584,8 +908,14 @@ def generate_motivation_recommendations(motivation, stress, confidence):
 def get_learning_patterns():
     """获取学习模式分析"""
     try:
+        from app.analytics_data import load_pattern_aggregates
+        from app.analytics_engine import LearningAnalytics
+        
+        user_id = request.args.get('user_id', 'default_user')
         analytics = LearningAnalytics()
-        patterns = analytics.analyze_learning_patterns()
+        patterns = analytics.analyze_aggregates(
+            load_pattern_aggregates(user_id)
+        )
         return jsonify({
             'success': True,
             'patterns': patterns
@@ -601,8 +931,19 @@ def get_learning_patterns():
 def get_personalized_recommendations():
     """获取个性化学习建议"""
     try:
+        from app.analytics_data import (
+            load_current_performance, load_pattern_aggregates
+        )
+        from app.analytics_engine import LearningAnalytics
+        
+        user_id = request.args.get('user_id', 'default_user')
         analytics = LearningAnalytics()
-        recommendations = analytics.generate_personalized_recommendations()
+        patterns = analytics.analyze_aggregates(
+            load_pattern_aggregates(user_id)
+        )
+        recommendations = analytics.generate_personalized_recommendations(
+            patterns, load_current_performance()
+        )
         return jsonify({
             'success': True,
             'recommendations': recommendations
@@ -618,8 +959,21 @@ def get_personalized_recommendations():
 def get_performance_insights():
     """获取学习表现洞察"""
     try:
+        from app.analytics_data import (
+            load_current_performance, load_daily_accuracy,
+            load_pattern_aggregates
+        )
+        from app.analytics_engine import LearningAnalytics
+        
+        user_id = request.args.get('user_id', 'default_user')
+        days = request.args.get('days', 14, type=int)
         analytics = LearningAnalytics()
-        insights = analytics.get_performance_insights()
+        patterns = analytics.analyze_aggregates(
+            load_pattern_aggregates(user_id)
+        )
+        insights = analytics.build_performance_insights(
+            patterns, load_current_performance(), load_daily_accuracy(days)
+        )
         return jsonify({
             'success': True,
             'insights': insights
@@ -631,6 +985,36 @@ def get_performance_insights():
         }), 500
 
 
+@api.route('/analytics/user-patterns', methods=['GET'])
+def get_user_patterns():
+    """获取批量计算的全部用户学习模式（管理后台）"""
+    try:
+        page = request.args.get('page', 1, type=int)
+        per_page = min(request.args.get('per_page', 50, type=int), 200)
+        pattern = request.args.get('pattern')
+
+        query = UserLearningPattern.query
+        if pattern:
+            query = query.filter(
+                UserLearningPattern.overall_pattern.contains(pattern)
+            )
+        pagination = query.order_by(UserLearningPattern.user_id).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+        return jsonify({
+            'success': True,
+            'patterns': [item.to_dict() for item in pagination.items],
+            'total': pagination.total,
+            'page': page,
+            'per_page': per_page
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 # 用户偏好设置API端点
 @api.route('/user/preferences', methods=['GET'])
 def get_user_preferences():
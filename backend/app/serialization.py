@@ -0,0 +1,82 @@
+"""响应序列化与内容协商
+
+练习接口和GraphQL视图共用同一条编码路径：
+客户端发送 Accept: application/msgpack 或 application/cbor 时返回紧凑的
+二进制编码，否则返回JSON。msgpack、cbor2、orjson均为可选依赖，
+未安装时回退到JSON和Flask自带的编码器。
+"""
+
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from flask import Response, current_app, request
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - 可选依赖
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # pragma: no cover - 可选依赖
+    cbor2 = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+JSON = 'application/json'
+MSGPACK = 'application/msgpack'
+CBOR = 'application/cbor'
+
+
+def available_formats():
+    """当前环境可用的响应格式，JSON优先"""
+    formats = [JSON]
+    if msgpack is not None:
+        formats.append(MSGPACK)
+    if cbor2 is not None:
+        formats.append(CBOR)
+    return formats
+
+
+def negotiate_format() -> str:
+    """根据Accept头选择响应格式，未明确要求二进制时返回JSON"""
+    best = request.accept_mimetypes.best_match(available_formats())
+    return best or JSON
+
+
+def _default(value):
+    """编码JSON原生不支持的类型"""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f'无法序列化类型: {type(value).__name__}')
+
+
+def encode(data, mimetype: str = JSON) -> bytes:
+    """按指定格式编码数据"""
+    if mimetype == MSGPACK:
+        return msgpack.packb(data, use_bin_type=True, default=_default)
+    if mimetype == CBOR:
+        return cbor2.dumps(data, default=lambda enc, v: enc.encode(
+            _default(v)
+        ))
+    if orjson is not None:
+        return orjson.dumps(
+            data, default=_default, option=orjson.OPT_NON_STR_KEYS
+        )
+    return current_app.json.dumps(data).encode('utf-8')
+
+
+def api_response(data, status: int = 200) -> Response:
+    """按内容协商结果编码响应"""
+    mimetype = negotiate_format()
+    response = Response(encode(data, mimetype), status=status,
+                        mimetype=mimetype)
+    response.vary.add('Accept')
+    return response
@@ -1,7 +1,8 @@
 from datetime import datetime, timedelta
 from sqlalchemy import func
+from ..daily_rollups import GLOBAL_ROLLUP_USER
 from ..models import (
-    User, Word, PracticeSession, WordMemory, db
+    DailyRollup, User, Word, PracticeSession, WordMemory, db
 )
 from typing import Dict, List, Optional, Any
 import json
@@ -160,6 +161,22 @@ class AnalyticsService:
         else:
             return []
     
+    @staticmethod
+    def _rollup_rows(
+        start_date: datetime,
+        user_id: Optional[int] = None
+    ) -> List[DailyRollup]:
+        """读取时间范围内的每日汇总（每天一行，最多90行）
+
+        指定user_id时读取用户行（学习会话口径），否则读取全局行（逐次答题口径）。
+        """
+        return DailyRollup.query.filter(
+            DailyRollup.user_id == (
+                str(user_id) if user_id else GLOBAL_ROLLUP_USER
+            ),
+            DailyRollup.day >= start_date.date()
+        ).order_by(DailyRollup.day).all()
+    
     @staticmethod
     def _get_practice_trend(
         start_date: datetime, 
@@ -167,26 +184,13 @@ class AnalyticsService:
         user_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """获取练习次数趋势"""
-        query = db.session.query(
-            func.date(PracticeSession.created_at).label('date'),
-            func.count(PracticeSession.id).label('count')
-        ).filter(
-            PracticeSession.created_at >= start_date
-        )
-        
-        if user_id:
-            query = query.filter(PracticeSession.user_id == user_id)
-        
-        results = query.group_by(
-            func.date(PracticeSession.created_at)
-        ).all()
-        
         return [
             {
-                'date': result.date.strftime(date_format),
-                'value': result.count
+                'date': row.day.strftime(date_format),
+                'value': row.practice_count
             }
-            for result in results
+            for row in AnalyticsService._rollup_rows(start_date, user_id)
+            if row.practice_count
         ]
     
     @staticmethod
@@ -196,26 +200,13 @@ class AnalyticsService:
         user_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """获取准确率趋势"""
-        query = db.session.query(
-            func.date(PracticeSession.created_at).label('date'),
-            func.avg(PracticeSession.accuracy).label('avg_accuracy')
-        ).filter(
-            PracticeSession.created_at >= start_date
-        )
-        
-        if user_id:
-            query = query.filter(PracticeSession.user_id == user_id)
-        
-        results = query.group_by(
-            func.date(PracticeSession.created_at)
-        ).all()
-        
         return [
             {
-                'date': result.date.strftime(date_format),
-                'value': round(result.avg_accuracy or 0, 2)
+                'date': row.day.strftime(date_format),
+                'value': round(row.accuracy_sum / row.practice_count, 2)
             }
-            for result in results
+            for row in AnalyticsService._rollup_rows(start_date, user_id)
+            if row.practice_count
         ]
     
     @staticmethod
@@ -224,27 +215,14 @@ class AnalyticsService:
         date_format: str,
         user_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        """获取新单词学习趋势"""
-        query = db.session.query(
-            func.date(WordMemory.created_at).label('date'),
-            func.count(WordMemory.id).label('count')
-        ).filter(
-            WordMemory.created_at >= start_date
-        )
-        
-        if user_id:
-            query = query.filter(WordMemory.user_id == user_id)
-        
-        results = query.group_by(
-            func.date(WordMemory.created_at)
-        ).all()
-        
+        """获取新单词学习趋势（单词记忆不区分用户，只有全局汇总）"""
         return [
             {
-                'date': result.date.strftime(date_format),
-                'value': result.count
+                'date': row.day.strftime(date_format),
+                'value': row.new_words
             }
-            for result in results
+            for row in AnalyticsService._rollup_rows(start_date)
+            if row.new_words
         ]
     
     @staticmethod
@@ -253,21 +231,13 @@ class AnalyticsService:
         date_format: str
     ) -> List[Dict[str, Any]]:
         """获取活跃用户趋势"""
-        results = db.session.query(
-            func.date(PracticeSession.created_at).label('date'),
-            func.count(func.distinct(PracticeSession.user_id)).label('count')
-        ).filter(
-            PracticeSession.created_at >= start_date
-        ).group_by(
-            func.date(PracticeSession.created_at)
-        ).all()
-        
         return [
             {
-                'date': result.date.strftime(date_format),
-                'value': result.count
+                'date': row.day.strftime(date_format),
+                'value': row.active_users
             }
-            for result in results
+            for row in AnalyticsService._rollup_rows(start_date)
+            if row.active_users
         ]
     
     @staticmethod
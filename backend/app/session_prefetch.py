@@ -0,0 +1,174 @@
+"""练习会话预取
+
+前端一次取回接下来K张卡片（含记忆状态和媒体URL），本地依次练习，
+快用完时再补充。取出的卡片在card_reservation表中为该客户端预留一段时间，
+同时打开的多个标签页（包括落在不同工作进程上的请求）不会拿到同一张卡片。
+卡片通过任何答题路径作答后立即释放预留。
+"""
+
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from .data_version import (
+    PRACTICE, REVIEWS, WORDS, get_data_versions, make_etag
+)
+from .models import CardReservation, WordMemory, db
+
+# 被其他进程抢先预留时重新选卡的次数
+MAX_RESERVE_ATTEMPTS = 3
+
+
+class CardReservations:
+    """卡片预留：word_id -> (client_id, 过期时间)，保存在数据库中"""
+
+    def __init__(self, ttl_seconds: int = None):
+        self.ttl = ttl_seconds or int(
+            os.getenv('SESSION_RESERVATION_TTL', 600)
+        )
+
+    @staticmethod
+    def _purge_expired(now: datetime) -> None:
+        CardReservation.query.filter(
+            CardReservation.expires_at <= now
+        ).delete(synchronize_session=False)
+
+    def reserve_next(self, client_id: str, k: int,
+                     held_ids: Optional[List[int]] = None) -> List:
+        """为客户端选出并预留接下来K张卡片（提交事务）
+
+        Args:
+            client_id: 客户端标识（每个标签页一个）
+            k: 需要补充的卡片数
+            held_ids: 客户端本地队列中尚未练习的卡片，续期并排除
+        """
+        from .fsrs_service import FSRSService
+
+        held_ids = list(held_ids or [])
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl)
+        self._purge_expired(now)
+
+        # 续期客户端仍持有的卡片；其他客户端的有效预留保持不变
+        if held_ids:
+            CardReservation.query.filter(
+                CardReservation.word_id.in_(held_ids),
+                CardReservation.client_id == client_id
+            ).update({'expires_at': expires_at}, synchronize_session=False)
+            reserved = {word_id for (word_id,) in db.session.query(
+                CardReservation.word_id
+            ).filter(CardReservation.word_id.in_(held_ids))}
+            for word_id in held_ids:
+                if word_id not in reserved:
+                    self._try_reserve(word_id, client_id, expires_at)
+
+        words = []
+        for _ in range(MAX_RESERVE_ATTEMPTS):
+            others = [word_id for (word_id,) in db.session.query(
+                CardReservation.word_id
+            ).filter(CardReservation.client_id != client_id)]
+            candidates = FSRSService().get_next_words(
+                k - len(words),
+                exclude_ids=others + held_ids + [w.id for w in words]
+            )
+            for word in candidates:
+                # 主键冲突说明其他进程刚刚预留了这张卡片
+                if self._try_reserve(word.id, client_id, expires_at):
+                    words.append(word)
+            if len(words) >= k or len(candidates) < k - len(words):
+                break
+
+        db.session.commit()
+        return words
+
+    @staticmethod
+    def _try_reserve(word_id: int, client_id: str,
+                     expires_at: datetime) -> bool:
+        try:
+            with db.session.begin_nested():
+                db.session.add(CardReservation(
+                    word_id=word_id, client_id=client_id,
+                    expires_at=expires_at
+                ))
+            return True
+        except IntegrityError:
+            return False
+
+    @staticmethod
+    def release(word_id: int) -> bool:
+        """卡片已作答，取消预留（随调用方的事务一起提交），返回是否有预留"""
+        return bool(CardReservation.query.filter_by(word_id=word_id).delete(
+            synchronize_session=False
+        ))
+
+    @staticmethod
+    def held_by(client_id: str) -> List[int]:
+        """客户端当前有效的预留"""
+        return [word_id for (word_id,) in db.session.query(
+            CardReservation.word_id
+        ).filter(
+            CardReservation.client_id == client_id,
+            CardReservation.expires_at > datetime.utcnow()
+        )]
+
+
+_reservations = CardReservations()
+
+
+def new_client_id() -> str:
+    return uuid.uuid4().hex
+
+
+def revalidation_token(client_id: str) -> str:
+    """重新验证令牌：单词数据、练习记录或复习记录变化后失效
+
+    其他设备上的作答会改变卡片的到期时间，令牌包含练习和复习的版本号，
+    预取之后记录的任何作答都会让客户端重新取卡。一次查询读取三个版本号。
+    """
+    versions = get_data_versions([WORDS, PRACTICE, REVIEWS])
+    return make_etag('session-prefetch', versions, client_id)
+
+
+def prefetch_cards(client_id: str, k: int,
+                   held_ids: Optional[List[int]] = None) -> Dict:
+    """取回并预留接下来K张卡片"""
+    words = _reservations.reserve_next(client_id, k, held_ids)
+
+    # 一次查询取回全部记忆状态，避免逐个加载关系
+    memories = {}
+    if words:
+        memories = {
+            memory.word_id: memory.to_dict()
+            for memory in db.session.query(WordMemory).filter(
+                WordMemory.word_id.in_([word.id for word in words])
+            )
+        }
+
+    cards = []
+    for word in words:
+        card = word.to_dict()
+        card['memory'] = memories.get(word.id)
+        cards.append(card)
+
+    return {
+        'client_id': client_id,
+        'cards': cards,
+        'token': revalidation_token(client_id),
+        'reservation_ttl': _reservations.ttl
+    }
+
+
+def validate_prefetch(client_id: str, token: str) -> Dict:
+    """检查客户端队列是否仍然有效"""
+    return {
+        'valid': token == revalidation_token(client_id),
+        'reserved': len(_reservations.held_by(client_id))
+    }
+
+
+def release_card(word_id: int) -> bool:
+    """释放卡片预留，随调用方的事务一起提交，返回是否有预留"""
+    return _reservations.release(word_id)
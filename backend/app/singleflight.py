@@ -0,0 +1,75 @@
+"""请求合并（singleflight）
+
+同一个key同时只执行一次任务，并发到达的其他调用者等待这次执行的结果，
+避免重复的TTS合成或重复写入同一文件。
+"""
+
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+
+class _Call:
+    """一次进行中的调用"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """按key合并并发调用"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key: str, fn: Callable, *args, **kwargs) -> Tuple[Any, bool]:
+        """执行fn，同key的并发调用共享同一结果
+
+        Returns:
+            (结果, 是否复用了其他调用者的执行结果)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+        return call.result, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict:
+        return {
+            'executed': self.executed,
+            'shared': self.shared,
+            'in_flight': self.in_flight()
+        }
@@ -0,0 +1,173 @@
+"""TTS语音合成服务
+
+使用少量常驻工作进程执行pyttsx3合成：每个进程启动时初始化一次引擎
+并选定语音，之后通过进程池的任务队列处理合成请求，支持批量提交。
+合成结果按(单词, 语音, 语速)的内容哈希命名，文件已存在时直接复用。
+"""
+
+import atexit
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+from .media_store import media_url
+
+AUDIO_DIR = os.path.join('static', 'audio')
+
+# 工作进程内的TTS引擎，由_init_worker初始化
+_engine = None
+
+
+def _init_worker(rate: int, volume: float, voice_hint: str) -> None:
+    """工作进程初始化：创建引擎并选定语音，只执行一次"""
+    global _engine
+    import pyttsx3
+
+    _engine = pyttsx3.init()
+    _engine.setProperty('rate', rate)
+    _engine.setProperty('volume', volume)
+
+    for voice in _engine.getProperty('voices'):
+        if (voice_hint in voice.name.lower()
+                or voice_hint[:2] in voice.id.lower()):
+            _engine.setProperty('voice', voice.id)
+            break
+
+
+def _synthesize(word: str, path: str) -> str:
+    """在工作进程中合成单个单词，先写临时文件再原子替换"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    _engine.save_to_file(word, tmp_path)
+    _engine.runAndWait()
+    os.replace(tmp_path, path)
+    return path
+
+
+class TTSService:
+    """常驻进程池TTS服务"""
+
+    def __init__(self, workers: int = None, rate: int = None,
+                 volume: float = 0.9, voice: str = None,
+                 audio_dir: str = AUDIO_DIR):
+        self.workers = workers or int(os.getenv('TTS_WORKERS', 2))
+        self.rate = rate or int(os.getenv('TTS_RATE', 150))
+        self.volume = volume
+        self.voice = (voice or os.getenv('TTS_VOICE', 'english')).lower()
+        self.audio_dir = audio_dir
+        self._pool = None
+        self._lock = threading.Lock()
+
+        self.cache_hits = 0
+        self.synthesized = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """首次合成时启动进程池"""
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    # pyttsx3底层驱动不保证fork安全，使用spawn启动
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context('spawn'),
+                        initializer=_init_worker,
+                        initargs=(self.rate, self.volume, self.voice)
+                    )
+        return self._pool
+
+    def cache_key(self, word: str) -> str:
+        """按单词、语音和语速生成内容哈希"""
+        content = f"{word.strip().lower()}|{self.voice}|{self.rate}"
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+
+    def audio_filename(self, word: str) -> str:
+        return f"tts_{self.cache_key(word)}.wav"
+
+    def audio_url(self, filename: str) -> str:
+        return media_url('audio', filename)
+
+    def synthesize(self, word: str) -> Optional[str]:
+        """合成单个单词，返回音频URL"""
+        return self.synthesize_batch([word]).get(word)
+
+    def synthesize_batch(self, words: List[str]) -> Dict[str, Optional[str]]:
+        """批量合成，已缓存的单词跳过合成
+
+        Returns:
+            {word: audio_url或None}
+        """
+        os.makedirs(self.audio_dir, exist_ok=True)
+
+        results = {}
+        futures = {}
+        for word in dict.fromkeys(w for w in words if w):
+            filename = self.audio_filename(word)
+            path = os.path.join(self.audio_dir, filename)
+            if os.path.exists(path):
+                self.cache_hits += 1
+                results[word] = self.audio_url(filename)
+                continue
+            try:
+                futures[word] = (
+                    filename,
+                    self._get_pool().submit(_synthesize, word, path)
+                )
+            except Exception as e:
+                print(f"提交语音合成任务失败: {e}")
+                if isinstance(e, BrokenProcessPool):
+                    self._reset_pool()
+                results[word] = None
+
+        for word, (filename, future) in futures.items():
+            try:
+                future.result()
+                self.synthesized += 1
+                results[word] = self.audio_url(filename)
+            except BrokenProcessPool as e:
+                print(f"TTS工作进程异常退出，将重建进程池: {e}")
+                self._reset_pool()
+                results[word] = None
+            except Exception as e:
+                print(f"生成音频失败: {e}")
+                results[word] = None
+
+        return results
+
+    def stats(self) -> Dict:
+        return {
+            'workers': self.workers,
+            'cache_hits': self.cache_hits,
+            'synthesized': self.synthesized
+        }
+
+    def _reset_pool(self) -> None:
+        """丢弃已损坏的进程池，下次合成时重新启动"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def shutdown(self) -> None:
+        """关闭进程池"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+
+
+_tts_service = None
+_tts_lock = threading.Lock()
+
+
+def get_tts_service() -> TTSService:
+    """获取进程级共享的TTS服务"""
+    global _tts_service
+    if _tts_service is None:
+        with _tts_lock:
+            if _tts_service is None:
+                _tts_service = TTSService()
+                atexit.register(_tts_service.shutdown)
+    return _tts_service
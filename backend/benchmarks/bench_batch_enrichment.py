@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量富化基准测试
+使用FakeEnrichmentLLM离线比较逐词调用与批量调用的请求次数和吞吐量
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+# 使用临时缓存文件，避免命中历史结果
+os.environ['LLM_CACHE_PATH'] = os.path.join(
+    tempfile.mkdtemp(), 'bench_llm_cache.db'
+)
+
+from app.langchain_service import LangChainService  # noqa: E402
+from app.fake_llm import FakeEnrichmentLLM  # noqa: E402
+
+
+def main(word_count=500, batch_size=25):
+    words = [f'word{i}' for i in range(word_count)]
+
+    # 逐词调用：每个单词一次定义请求 + 一次图片描述请求
+    single_llm = FakeEnrichmentLLM()
+    service = LangChainService(llm=single_llm)
+    service.cache.clear()
+    start = time.perf_counter()
+    for word in words:
+        service.get_word_definition(word)
+        service.generate_image_prompt(word)
+    single_elapsed = time.perf_counter() - start
+
+    # 批量调用，其中2%的单词首次返回非法结果
+    batch_llm = FakeEnrichmentLLM(malformed_words=set(words[::50]))
+    service = LangChainService(llm=batch_llm)
+    service.cache.clear()
+    start = time.perf_counter()
+    results = service.enrich_words(words, batch_size=batch_size)
+    batch_elapsed = time.perf_counter() - start
+
+    print(f"单词数: {word_count}, 批大小: {batch_size}")
+    print(f"逐词调用: {single_llm.calls} 次请求, {single_elapsed:.3f}s")
+    print(f"批量调用: {batch_llm.calls} 次请求, {batch_elapsed:.3f}s")
+    print(f"请求次数减少: {single_llm.calls / batch_llm.calls:.1f}x")
+    print(f"结果完整: {len(results) == word_count}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+每日推荐批量预计算一致性检查
+在内存SQLite中生成一批用户（画像字段含空值、会话跨越分析窗口），
+分别用夜间批处理（batch_recommendations的NumPy列式计算）和
+RecommendationEngine逐用户计算同一天的推荐，断言两条路径的结果一致，
+并比较两者的耗时
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from app import create_app  # noqa: E402
+from app.batch_recommendations import (  # noqa: E402
+    precompute_daily_recommendations
+)
+from app.database import init_db  # noqa: E402
+from app.learning_stats import (  # noqa: E402
+    get_or_create_stats, record_session
+)
+from app.models import (  # noqa: E402
+    DailyPracticeRecommendation, UserLearningProfile, db
+)
+from app.recommendation_engine import (  # noqa: E402
+    RECOMMENDATION_FIELDS, RecommendationEngine
+)
+
+FLOAT_TOLERANCE = 1e-9
+
+
+def seed_users(count, today, seed=42):
+    """生成用户画像和学习统计，部分用户没有会话或统计行"""
+    rng = random.Random(seed)
+    for i in range(count):
+        user_id = f'user{i:05d}'
+        db.session.add(UserLearningProfile(
+            user_id=user_id,
+            learning_speed=rng.choice([0.5, 0.8, 1.0, 1.2, 1.7]),
+            preferred_daily_words=rng.choice([None, 0, 5, 10, 23, 40]),
+            preferred_session_length=rng.choice([None, 0, 10, 20, 45]),
+            optimal_difficulty=rng.choice([None, 0.35, 0.6, 0.95]),
+            current_streak=rng.randint(0, 15),
+        ))
+        if rng.random() < 0.1:
+            continue
+
+        stats = get_or_create_stats(user_id)
+        day = today - timedelta(days=rng.randint(0, 90))
+        for _ in range(rng.randint(0, 40)):
+            day += timedelta(days=rng.choice([0, 0, 1, 1, 2, 3, 7]))
+            if day > today:
+                break
+            total_words = rng.randint(0, 40)
+            correct = rng.randint(0, total_words)
+            record_session(stats, {
+                'accuracy_rate': (correct / total_words
+                                  if total_words else 0.0),
+                'total_words': total_words,
+                'duration_minutes': rng.randint(0, 60),
+                'session_date': day,
+                'start_time': datetime(day.year, day.month, day.day,
+                                       rng.randint(0, 23)),
+            })
+    db.session.commit()
+
+
+def batch_results(today):
+    """夜间批处理路径"""
+    precompute_daily_recommendations(today, workers=1)
+    return {
+        row.user_id: {field: getattr(row, field)
+                      for field in RECOMMENDATION_FIELDS}
+        for row in DailyPracticeRecommendation.query.filter_by(date=today)
+    }
+
+
+def engine_results(user_ids, today):
+    """按需计算路径：逐用户调用RecommendationEngine"""
+    engine = RecommendationEngine()
+    return {
+        user_id: engine.generate_daily_recommendation(user_id, today)
+        for user_id in user_ids
+    }
+
+
+def check_consistent(batch, engine):
+    """逐字段比较两条路径的推荐"""
+    assert set(batch) == set(engine), '用户集合不同'
+    mismatches = []
+    for user_id, expected in engine.items():
+        for field in RECOMMENDATION_FIELDS:
+            actual = batch[user_id][field]
+            wanted = expected[field]
+            if isinstance(wanted, float):
+                same = abs(actual - wanted) <= FLOAT_TOLERANCE
+            else:
+                same = actual == wanted
+            if not same:
+                mismatches.append((user_id, field, actual, wanted))
+    assert not mismatches, f"{len(mismatches)}处不一致，例如{mismatches[:5]}"
+
+
+def main(count=2000):
+    app = create_app()
+    init_db(app)
+    with app.app_context():
+        today = datetime.utcnow().date()
+        seed_users(count, today)
+
+        start = time.perf_counter()
+        batch = batch_results(today)
+        batch_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        engine = engine_results(sorted(batch), today)
+        engine_time = time.perf_counter() - start
+
+        check_consistent(batch, engine)
+
+    print(f"用户数: {count}")
+    print(f"批量预计算（含写入）: {batch_time * 1000:.1f}ms")
+    print(f"逐用户计算（含写入）: {engine_time * 1000:.1f}ms")
+    print(f"全部{len(RECOMMENDATION_FIELDS)}个字段一致")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模块导入时间基准测试
+在独立子进程中测量导入耗时，并检查LLM相关的重量级依赖是否被提前加载；
+同时比较每次请求新建LangChainService与复用共享实例的开销
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+HEAVY_MODULES = ('langchain', 'langchain_google_genai')
+
+IMPORT_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+loaded = [m for m in {heavy!r} if m in sys.modules]
+print(f"{{elapsed * 1000:.1f}}|{{','.join(loaded)}}")
+"""
+
+
+def measure_import(module, repeat=5):
+    """多次冷启动子进程导入模块，返回最短耗时和已加载的重量级模块"""
+    best = None
+    loaded = ''
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c',
+             IMPORT_SNIPPET.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=project_root, capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        elapsed, loaded = output.split('|')
+        best = min(best or float('inf'), float(elapsed))
+    return best, loaded
+
+
+def measure_service_setup(iterations=200):
+    """比较每次新建服务与复用共享服务的耗时"""
+    from app.langchain_service import (
+        _create_llm, get_langchain_service, get_llm
+    )
+
+    # 旧实现在每个请求构造服务时都会新建一个Gemini客户端
+    start = time.perf_counter()
+    for _ in range(iterations):
+        _create_llm()
+    fresh = (time.perf_counter() - start) / iterations
+
+    get_llm()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        get_langchain_service().llm
+    shared = (time.perf_counter() - start) / iterations
+
+    return fresh, shared
+
+
+def main():
+    for module in ('app.langchain_service', 'app.routes',
+                   'langchain_google_genai'):
+        try:
+            elapsed, loaded = measure_import(module)
+        except subprocess.CalledProcessError as e:
+            print(f"{module}: 导入失败 {e.stderr.strip().splitlines()[-1]}")
+            continue
+        print(f"{module}: {elapsed:.1f}ms, 已加载重量级模块: {loaded or '无'}")
+
+    fresh, shared = measure_service_setup()
+    print(f"每次请求新建服务: {fresh * 1e6:.1f}us")
+    print(f"复用共享服务: {shared * 1e6:.1f}us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+学习模式分析基准测试
+用10万条会话的历史比较逐字典多次遍历的旧实现与列式向量化实现的耗时，
+并检查两者的分析结果一致
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from app.analytics_engine import LearningAnalytics  # noqa: E402
+
+ERROR_TYPES = ('spelling', 'meaning', 'pronunciation', 'grammar',
+               'listening', 'unknown')
+DIFFICULTIES = ('easy', 'medium', 'hard')
+
+
+def make_sessions(count, seed=42):
+    """生成按时间递增、带随机错误的会话"""
+    rng = random.Random(seed)
+    moment = datetime(2024, 1, 1, 8)
+    sessions = []
+    for _ in range(count):
+        moment += timedelta(minutes=rng.randint(10, 2000))
+        sessions.append({
+            'timestamp': moment.isoformat(),
+            'duration': rng.randint(5, 90),
+            'words_practiced': rng.randint(5, 80),
+            'errors': [
+                {'type': rng.choice(ERROR_TYPES),
+                 'word_difficulty': rng.choice(DIFFICULTIES)}
+                for _ in range(rng.randint(0, 3))
+            ]
+        })
+    rng.shuffle(sessions)
+    return sessions
+
+
+def legacy_analyze(analytics, sessions):
+    """旧实现：四次遍历会话字典，时间戳重复解析"""
+    hour_counts = defaultdict(int)
+    for session in sessions:
+        if 'timestamp' in session:
+            hour_counts[datetime.fromisoformat(session['timestamp']).hour] += 1
+    pattern_scores = {
+        name: sum(hour_counts.get(h, 0)
+                  for h in range(r['start'], r['end']))
+        for name, r in analytics.learning_patterns.items()
+    }
+    best = max(pattern_scores, key=pattern_scores.get)
+    time_pref = {
+        'preferred_time': best,
+        'confidence': pattern_scores[best] / sum(hour_counts.values()),
+        'distribution': dict(hour_counts),
+        'pattern_scores': pattern_scores
+    }
+
+    ordered = sorted(sessions, key=lambda x: x.get('timestamp', ''))
+    intervals = [
+        (datetime.fromisoformat(ordered[i]['timestamp'])
+         - datetime.fromisoformat(ordered[i - 1]['timestamp'])
+         ).total_seconds() / 3600
+        for i in range(1, len(ordered))
+    ]
+    avg_interval = statistics.mean(intervals)
+    std_interval = statistics.stdev(intervals)
+
+    avg_duration = statistics.mean(s['duration'] for s in sessions)
+    avg_words = statistics.mean(s['words_practiced'] for s in sessions)
+
+    error_types = Counter()
+    difficulty_errors = defaultdict(int)
+    time_errors = defaultdict(int)
+    for session in sessions:
+        for error in session['errors']:
+            error_types[error.get('type', 'unknown')] += 1
+            difficulty_errors[error.get('word_difficulty', 'medium')] += 1
+            hour = datetime.fromisoformat(session['timestamp']).hour
+            time_errors[hour] += 1
+
+    return {
+        'time_preference': time_pref,
+        'avg_interval': avg_interval,
+        'std_interval': std_interval,
+        'avg_duration': avg_duration,
+        'avg_words': avg_words,
+        'common_error_types': dict(error_types.most_common(5)),
+        'difficulty_distribution': dict(difficulty_errors),
+        'time_distribution': dict(time_errors),
+    }
+
+
+def check_consistent(legacy, result):
+    """比较两种实现的关键结果"""
+    close = lambda a, b: abs(a - b) <= 1e-6 * max(1.0, abs(b))  # noqa: E731
+    assert legacy['time_preference'] == result['time_preference']
+    frequency = result['frequency_pattern']
+    assert close(frequency['avg_interval'], legacy['avg_interval'])
+    assert close(frequency['std_interval'], legacy['std_interval'])
+    intensity = result['intensity_pattern']
+    assert close(intensity['avg_duration'], legacy['avg_duration'])
+    assert close(intensity['avg_words_per_session'], legacy['avg_words'])
+    errors = result['error_pattern']
+    for key in ('common_error_types', 'difficulty_distribution',
+                'time_distribution'):
+        assert errors[key] == legacy[key], key
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(count=100_000, repeat=3):
+    analytics = LearningAnalytics()
+    sessions = make_sessions(count)
+
+    legacy_time, legacy = best_of(
+        lambda: legacy_analyze(analytics, sessions), repeat
+    )
+    columnar_time, result = best_of(
+        lambda: analytics.analyze_learning_pattern(sessions), repeat
+    )
+    check_consistent(legacy, result)
+
+    print(f"会话数: {count}")
+    print(f"旧实现（多次遍历字典）: {legacy_time * 1000:.1f}ms")
+    print(f"列式向量化实现: {columnar_time * 1000:.1f}ms")
+    print(f"加速: {legacy_time / columnar_time:.1f}x，结果一致")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+响应序列化基准测试
+比较练习接口典型负载（Word.to_dict + 记忆状态）在JSON、msgpack、CBOR
+下的字节数和编码耗时
+"""
+
+import json
+import os
+import sys
+import timeit
+from datetime import datetime
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from flask import Flask  # noqa: E402
+
+from app.serialization import (  # noqa: E402
+    CBOR, JSON, MSGPACK, available_formats, encode
+)
+
+
+def sample_word(i):
+    """构造与/api/words/next相同结构的负载"""
+    now = datetime.utcnow().isoformat()
+    return {
+        'id': i,
+        'anki_card_id': 1700000000000 + i,
+        'word': f'example{i}',
+        'meaning': '例子；榜样',
+        'deck_name': '英语::小学单词',
+        'image_url': f'/media/images/{i:032x}.png',
+        'audio_url': f'/media/audio/tts_{i:016x}.wav',
+        'phonetic': "/ɪɡˈzɑːmpl/",
+        'etymology': None,
+        'exam_frequency': 3,
+        'star_level': 2,
+        'example_sentence': 'This is an example sentence.',
+        'example_translation': '这是一个例句。',
+        'related_words': 'sample, instance',
+        'created_at': now,
+        'updated_at': now,
+        'memory': {
+            'id': i,
+            'word_id': i,
+            'stability': 3.1415,
+            'difficulty': 5.25,
+            'last_review': now,
+            'next_review': now,
+            'review_count': 4,
+            'consecutive_correct': 2,
+            'total_reviews': 4,
+            'created_at': now,
+            'updated_at': now
+        }
+    }
+
+
+def main(iterations=2000):
+    app = Flask(__name__)
+    payloads = {
+        'single': sample_word(1),
+        'list_50': [sample_word(i) for i in range(50)]
+    }
+
+    with app.app_context():
+        for name, payload in payloads.items():
+            print(f"== {name} ==")
+            baseline = len(json.dumps(payload).encode('utf-8'))
+            print(f"json.dumps基线: {baseline} bytes")
+            for mimetype in (JSON, MSGPACK, CBOR):
+                if mimetype not in available_formats():
+                    print(f"{mimetype}: 未安装")
+                    continue
+                size = len(encode(payload, mimetype))
+                seconds = timeit.timeit(
+                    lambda: encode(payload, mimetype), number=iterations
+                ) / iterations
+                print(f"{mimetype}: {size} bytes "
+                      f"({size / baseline:.0%}), {seconds * 1e6:.1f}us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+应用启动时间基准测试
+在独立子进程中分别测量：导入app包、create_app()、首个请求（不访问数据库
+和访问数据库各一次）、导入graphql_schema，以及显式建表init_db()的耗时，
+用于确认创建应用时不再执行DDL
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+STARTUP_SNIPPET = """
+import time
+timings = []
+
+def step(name, fn):
+    start = time.perf_counter()
+    result = fn()
+    timings.append((name, (time.perf_counter() - start) * 1000))
+    return result
+
+app_pkg = step('import app', lambda: __import__('app'))
+if {init_db!r}:
+    from app.database import init_db
+    flask_app = app_pkg.create_app()
+    step('init_db()', lambda: init_db(flask_app))
+else:
+    flask_app = step('create_app()', app_pkg.create_app)
+client = flask_app.test_client()
+step('首个请求 GET /', lambda: client.get('/'))
+step('首个数据库请求 GET /api/stats', lambda: client.get('/api/stats'))
+step('import app.graphql_schema',
+     lambda: __import__('app.graphql_schema'))
+
+print('|'.join(f'{{name}}={{ms:.1f}}' for name, ms in timings))
+"""
+
+
+def run_once(database_url, init_db=False):
+    """冷启动子进程执行一次启动流程，返回各阶段耗时（毫秒）"""
+    env = dict(os.environ, DATABASE_URL=database_url)
+    output = subprocess.run(
+        [sys.executable, '-c', STARTUP_SNIPPET.format(init_db=init_db)],
+        cwd=project_root, env=env, capture_output=True, text=True,
+        check=True
+    ).stdout.strip().splitlines()[-1]
+    return {
+        name: float(ms)
+        for name, ms in (part.rsplit('=', 1) for part in output.split('|'))
+    }
+
+
+def measure(database_url, init_db=False, repeat=5):
+    """多次运行，每个阶段取最短耗时"""
+    best = {}
+    for _ in range(repeat):
+        for name, ms in run_once(database_url, init_db).items():
+            best[name] = min(best.get(name, float('inf')), ms)
+    return best
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+
+        try:
+            # 先显式建表一次，再测量普通启动
+            bootstrap = measure(database_url, init_db=True, repeat=1)
+            startup = measure(database_url)
+        except subprocess.CalledProcessError as e:
+            print(f"启动失败: {e.stderr.strip().splitlines()[-1]}")
+            return
+
+    print(f"显式建表 init_db(): {bootstrap['init_db()']:.1f}ms（部署时执行一次）")
+    for name, ms in startup.items():
+        print(f"{name}: {ms:.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+学习模式批量计算任务
+默认只重算有新会话的用户，传入--full时重算全部用户。首次运行前需执行
+flask init-db创建user_learning_pattern表。建议由cron定期执行：
+    30 3 * * * cd backend && python jobs/compute_learning_patterns.py
+"""
+
+import sys
+import os
+import time
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from app import create_app  # noqa: E402
+from app.batch_learning_patterns import (  # noqa: E402
+    compute_learning_patterns
+)
+
+
+def main():
+    full = '--full' in sys.argv[1:]
+
+    app = create_app()
+    with app.app_context():
+        mode = 'all users' if full else 'users with new sessions'
+        print(f"Computing learning patterns for {mode}...")
+        start = time.perf_counter()
+        count = compute_learning_patterns(full=full)
+        elapsed = time.perf_counter() - start
+        print(f"✓ Wrote {count} learning patterns in {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+每日推荐夜间预计算任务
+为全部用户批量计算当天（或指定日期）的练习推荐，建议由cron在凌晨执行：
+    0 3 * * * cd backend && python jobs/precompute_daily_recommendations.py
+"""
+
+import sys
+import os
+import time
+from datetime import date, datetime
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from app import create_app  # noqa: E402
+from app.batch_recommendations import (  # noqa: E402
+    precompute_daily_recommendations
+)
+
+
+def main():
+    target_date = (date.fromisoformat(sys.argv[1])
+                   if len(sys.argv) > 1 else datetime.utcnow().date())
+
+    app = create_app()
+    with app.app_context():
+        print(f"Precomputing daily recommendations for {target_date}...")
+        start = time.perf_counter()
+        count = precompute_daily_recommendations(target_date)
+        elapsed = time.perf_counter() - start
+        print(f"✓ Wrote {count} recommendations in {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
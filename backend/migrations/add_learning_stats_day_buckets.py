@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+学习统计按日聚合迁移脚本
+为user_learning_stats表添加day_buckets列，之后运行
+rebuild_learning_stats.py按最近30天的会话填充
+"""
+
+import sys
+import os
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from sqlalchemy import inspect, text  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+
+
+def add_day_buckets_column():
+    """添加day_buckets列（已存在时跳过）"""
+    columns = {
+        column['name'] for column in
+        inspect(db.engine).get_columns('user_learning_stats')
+    }
+    if 'day_buckets' in columns:
+        print("✓ day_buckets column already exists")
+        return
+
+    db.session.execute(text(
+        'ALTER TABLE user_learning_stats ADD COLUMN day_buckets JSON'
+    ))
+    db.session.commit()
+    print("✓ Added day_buckets column")
+    print("  Run migrations/rebuild_learning_stats.py to fill it")
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        add_day_buckets_column()
+
+
+if __name__ == '__main__':
+    main()
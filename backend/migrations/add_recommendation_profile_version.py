@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+推荐记录画像版本迁移脚本
+为daily_practice_recommendation表添加profile_version列
+"""
+
+import sys
+import os
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from sqlalchemy import inspect, text  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+
+
+def add_profile_version_column():
+    """添加profile_version列（已存在时跳过）"""
+    columns = {
+        column['name'] for column in
+        inspect(db.engine).get_columns('daily_practice_recommendation')
+    }
+    if 'profile_version' in columns:
+        print("✓ profile_version column already exists")
+        return
+
+    db.session.execute(text(
+        'ALTER TABLE daily_practice_recommendation '
+        'ADD COLUMN profile_version INTEGER'
+    ))
+    db.session.commit()
+    print("✓ Added profile_version column")
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        add_profile_version_column()
+
+
+if __name__ == '__main__':
+    main()
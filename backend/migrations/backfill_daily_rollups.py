@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+每日汇总回填脚本
+创建daily_rollup表，并从练习记录、单词记忆和学习会话重新计算全部汇总
+"""
+
+import sys
+import os
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from app import create_app, db  # noqa: E402
+from app.daily_rollups import rebuild_rollups  # noqa: E402
+from app.database import init_db  # noqa: E402
+
+
+def backfill_daily_rollups():
+    """重建全部每日汇总"""
+    print("Backfilling daily rollups...")
+    count = rebuild_rollups()
+    db.session.commit()
+    print(f"✓ Wrote {count} daily rollup rows")
+
+
+def main():
+    app = create_app()
+    init_db(app)
+    with app.app_context():
+        backfill_daily_rollups()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+每日推荐去重迁移脚本
+合并同一用户同一天的重复推荐记录（保留最新一条），
+并把idx_user_date索引重建为唯一索引
+"""
+
+import sys
+import os
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from sqlalchemy import func, text  # noqa: E402
+
+from app import create_app, db  # noqa: E402
+from app.models import (  # noqa: E402
+    DailyPracticeRecommendation, LearningSession
+)
+
+
+def dedupe_daily_recommendations():
+    """删除重复的每日推荐"""
+    print("Merging duplicate daily recommendations...")
+
+    duplicates = db.session.query(
+        DailyPracticeRecommendation.user_id,
+        DailyPracticeRecommendation.date,
+        func.max(DailyPracticeRecommendation.id)
+    ).group_by(
+        DailyPracticeRecommendation.user_id,
+        DailyPracticeRecommendation.date
+    ).having(func.count(DailyPracticeRecommendation.id) > 1).all()
+
+    removed = 0
+    for user_id, day, keep_id in duplicates:
+        stale_ids = [
+            row_id for (row_id,) in db.session.query(
+                DailyPracticeRecommendation.id
+            ).filter(
+                DailyPracticeRecommendation.user_id == user_id,
+                DailyPracticeRecommendation.date == day,
+                DailyPracticeRecommendation.id != keep_id
+            )
+        ]
+        # 学习会话改为引用保留的推荐
+        LearningSession.query.filter(
+            LearningSession.recommendation_id.in_(stale_ids)
+        ).update({LearningSession.recommendation_id: keep_id},
+                 synchronize_session=False)
+        DailyPracticeRecommendation.query.filter(
+            DailyPracticeRecommendation.id.in_(stale_ids)
+        ).delete(synchronize_session=False)
+        removed += len(stale_ids)
+
+    db.session.commit()
+    print(f"✓ Removed {removed} duplicate recommendations")
+
+
+def rebuild_unique_index():
+    """把(user_id, date)索引重建为唯一索引"""
+    print("Rebuilding idx_user_date as a unique index...")
+    db.session.execute(text('DROP INDEX IF EXISTS idx_user_date'))
+    db.session.execute(text(
+        'CREATE UNIQUE INDEX idx_user_date '
+        'ON daily_practice_recommendation (user_id, date)'
+    ))
+    db.session.commit()
+    print("✓ Unique index created")
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        dedupe_daily_recommendations()
+        rebuild_unique_index()
+
+
+if __name__ == '__main__':
+    main()
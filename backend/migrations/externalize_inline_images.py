@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内联图片外置迁移脚本
+把Word.image_url中保存的data URI解码写入媒体存储，并替换为短URL；
+无法解码的data URI保留原值
+"""
+
+import sys
+import os
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from app import create_app, db  # noqa: E402
+from app.media_store import externalize_data_uri  # noqa: E402
+from app.models import Word  # noqa: E402
+
+BATCH_SIZE = 200
+
+
+def externalize_inline_images():
+    """分批处理包含内联图片的单词"""
+    print("Externalizing inline images...")
+
+    converted = 0
+    kept = 0
+    last_id = 0
+    while True:
+        words = Word.query.filter(
+            Word.id > last_id,
+            Word.image_url.like('data:%')
+        ).order_by(Word.id).limit(BATCH_SIZE).all()
+
+        if not words:
+            break
+
+        for word in words:
+            url = externalize_data_uri(word.image_url, 'images')
+            if url is None:
+                kept += 1
+                print(f"无法解码内联图片，保留原值: {word.word}")
+            else:
+                word.image_url = url
+                converted += 1
+            last_id = word.id
+
+        db.session.commit()
+
+    print(f"✓ Converted {converted} images, kept {kept} undecodable")
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        externalize_inline_images()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+数据库初始化脚本
+创建缺失的数据库表，部署时在启动应用进程之前执行一次
+（等价于 flask --app run.py init-db）
+"""
+
+import sys
+import os
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from app import create_app  # noqa: E402
+from app.database import init_db  # noqa: E402
+
+
+def main():
+    print("Creating database tables...")
+    app = create_app()
+    init_db(app)
+    print("✓ Tables created successfully")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+学习统计重建脚本
+按时间顺序重放全部学习会话，重新计算user_learning_stats表
+"""
+
+import sys
+import os
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from app import create_app, db  # noqa: E402
+from app.database import init_db  # noqa: E402
+from app.data_version import bump_data_version, profile_scope  # noqa: E402
+from app.learning_stats import (  # noqa: E402
+    get_or_create_stats, record_session, session_data_from
+)
+from app.models import LearningSession, UserLearningStats  # noqa: E402
+
+
+def rebuild_learning_stats():
+    """重建全部用户的学习统计"""
+    print("Rebuilding user learning stats...")
+
+    UserLearningStats.query.delete()
+
+    stats_by_user = {}
+    sessions = LearningSession.query.order_by(
+        LearningSession.user_id,
+        LearningSession.session_date,
+        LearningSession.start_time
+    ).yield_per(1000)
+
+    count = 0
+    for session in sessions:
+        stats = stats_by_user.get(session.user_id)
+        if stats is None:
+            stats = get_or_create_stats(session.user_id)
+            stats_by_user[session.user_id] = stats
+        record_session(stats, session_data_from(session))
+        count += 1
+
+    bump_data_version(*[profile_scope(user_id) for user_id in stats_by_user])
+    db.session.commit()
+    print(f"✓ Replayed {count} sessions for {len(stats_by_user)} users")
+
+
+def main():
+    app = create_app()
+    init_db(app)
+    with app.app_context():
+        rebuild_learning_stats()
+
+
+if __name__ == '__main__':
+    main()
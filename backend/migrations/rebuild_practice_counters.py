@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+练习计数器修复脚本
+从words和practice_sessions表重新计算/api/stats使用的计数器
+"""
+
+import sys
+import os
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from app import create_app, db  # noqa: E402
+from app.database import init_db  # noqa: E402
+from app.data_version import PRACTICE, WORDS, bump_data_version  # noqa: E402
+from app.practice_counters import rebuild_counters  # noqa: E402
+
+
+def rebuild_practice_counters():
+    """重建练习计数器"""
+    print("Rebuilding practice counters...")
+
+    counter = rebuild_counters()
+    bump_data_version(WORDS, PRACTICE)
+    db.session.commit()
+
+    print(f"✓ words={counter.total_words} "
+          f"sessions={counter.total_sessions} "
+          f"correct={counter.correct_sessions}")
+
+
+def main():
+    app = create_app()
+    init_db(app)
+    with app.app_context():
+        rebuild_practice_counters()
+
+
+if __name__ == '__main__':
+    main()
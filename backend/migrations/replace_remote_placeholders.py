@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+占位图迁移脚本
+把仍指向via.placeholder.com的Word.image_url替换为本地渲染的占位图
+"""
+
+import sys
+import os
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from app import create_app, db  # noqa: E402
+from app.models import Word  # noqa: E402
+from app.placeholder_service import get_placeholder_url  # noqa: E402
+
+
+def replace_remote_placeholders():
+    """替换外部占位图URL"""
+    print("Replacing remote placeholder images...")
+
+    words = Word.query.filter(
+        Word.image_url.like('%via.placeholder.com%')
+    ).all()
+
+    for word in words:
+        word.image_url = get_placeholder_url(word.word)
+
+    db.session.commit()
+    print(f"✓ Replaced {len(words)} placeholder images")
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        replace_remote_placeholders()
+
+
+if __name__ == '__main__':
+    main()
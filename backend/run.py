@@ -1,4 +1,9 @@
-from app import app
+from app import create_app
+from app.database import init_db
+
+app = create_app()
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
+    # 开发服务器单进程启动，顺便创建缺失的表
+    init_db(app)
+    app.run(debug=True, host='0.0.0.0', port=5001)
@@ -22,6 +22,45 @@ class FSRSService {
     }
   }
 
+  /**
+   * 预取接下来的多张卡片，服务端会为当前客户端预留
+   * @param {number} k - 需要补充的卡片数
+   * @param {string|null} clientId - 客户端标识，首次调用传null由服务端分配
+   * @param {Array<number>} heldIds - 本地队列中尚未练习的单词ID
+   * @returns {Promise<Object>} {client_id, cards, token, reservation_ttl}
+   */
+  static async prefetchSession(k = 10, clientId = null, heldIds = []) {
+    try {
+      const params = { k };
+      if (clientId) params.client = clientId;
+      if (heldIds.length) params.held = heldIds.join(',');
+      const response = await axios.get(`${API_BASE_URL}/api/session/prefetch`, { params });
+      return response.data;
+    } catch (error) {
+      console.error('预取卡片失败:', error);
+      throw new Error('无法预取卡片');
+    }
+  }
+
+  /**
+   * 检查预取的卡片是否仍然有效
+   * 单词数据变化或预取后记录了新的练习/复习（包括其他设备上的作答）时返回valid: false
+   * @param {string} clientId - 客户端标识
+   * @param {string} token - 预取时返回的令牌
+   * @returns {Promise<Object>} {valid, reserved}
+   */
+  static async validatePrefetch(clientId, token) {
+    try {
+      const response = await axios.get(`${API_BASE_URL}/api/session/prefetch/validate`, {
+        params: { client: clientId, token }
+      });
+      return response.data;
+    } catch (error) {
+      console.error('检查预取卡片失败:', error);
+      throw new Error('无法检查预取卡片');
+    }
+  }
+
   /**
    * 提交单词复习结果
    * @param {number} wordId - 单词ID